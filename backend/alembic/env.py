@@ -7,8 +7,11 @@ from app.core.config import settings
 from app.core.database import Base
 from app.models import (
     inventory,
+    idempotency_key,
     inventory_event,
     notification,
+    notification_counter,
+    notification_outbox,
     purchase_order,
     product,
     refresh_token,
@@ -16,6 +19,7 @@ from app.models import (
     sale,
     expense,
     stock_transfer,
+    stock_level,
     stock_threshold,
     store,
     supplier,
@@ -0,0 +1,64 @@
+"""add composite and partial indexes for hot access paths
+
+Revision ID: 20261017_01
+Revises: 20260208_01
+Create Date: 2026-10-17 09:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261017_01"
+down_revision: Union[str, None] = "20260208_01"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+IN_STOCK = sa.text("quantity_in_stock > 0")
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_inventory_in_stock_lookup",
+        "inventory",
+        ["store_id", "product_id", "updated_at"],
+        unique=False,
+        sqlite_where=IN_STOCK,
+        postgresql_where=IN_STOCK,
+    )
+    op.create_index(
+        "ix_notifications_user_read_created",
+        "notifications",
+        ["user_id", "is_read", "created_at"],
+        unique=False,
+    )
+    op.create_index("ix_sales_store_created", "sales", ["store_id", "created_at"], unique=False)
+    op.create_index(
+        "ix_inventory_events_store_created", "inventory_events", ["store_id", "created_at"], unique=False
+    )
+    op.create_index(
+        "ix_inventory_events_product_store_created",
+        "inventory_events",
+        ["product_id", "store_id", "created_at"],
+        unique=False,
+    )
+
+    # Leading columns of the composites above; the single-column versions only add write cost.
+    op.drop_index(op.f("ix_notifications_user_id"), table_name="notifications")
+    op.drop_index(op.f("ix_sales_store_id"), table_name="sales")
+    op.drop_index(op.f("ix_inventory_events_store_id"), table_name="inventory_events")
+    op.drop_index(op.f("ix_inventory_events_product_id"), table_name="inventory_events")
+
+
+def downgrade() -> None:
+    op.create_index(op.f("ix_inventory_events_product_id"), "inventory_events", ["product_id"], unique=False)
+    op.create_index(op.f("ix_inventory_events_store_id"), "inventory_events", ["store_id"], unique=False)
+    op.create_index(op.f("ix_sales_store_id"), "sales", ["store_id"], unique=False)
+    op.create_index(op.f("ix_notifications_user_id"), "notifications", ["user_id"], unique=False)
+
+    op.drop_index("ix_inventory_events_product_store_created", table_name="inventory_events")
+    op.drop_index("ix_inventory_events_store_created", table_name="inventory_events")
+    op.drop_index("ix_sales_store_created", table_name="sales")
+    op.drop_index("ix_notifications_user_read_created", table_name="notifications")
+    op.drop_index("ix_inventory_in_stock_lookup", table_name="inventory")
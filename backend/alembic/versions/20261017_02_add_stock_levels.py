@@ -0,0 +1,44 @@
+"""add stock_levels aggregate and backfill it from inventory
+
+Revision ID: 20261017_02
+Revises: 20261017_01
+Create Date: 2026-10-17 11:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261017_02"
+down_revision: Union[str, None] = "20261017_01"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stock_levels",
+        sa.Column("store_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("quantity_in_stock", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.ForeignKeyConstraint(["store_id"], ["stores.id"]),
+        sa.PrimaryKeyConstraint("store_id", "product_id"),
+    )
+    op.create_index(op.f("ix_stock_levels_product_id"), "stock_levels", ["product_id"], unique=False)
+
+    op.execute(
+        """
+        INSERT INTO stock_levels (store_id, product_id, quantity_in_stock, updated_at)
+        SELECT store_id, product_id, SUM(quantity_in_stock), COALESCE(MAX(updated_at), CURRENT_TIMESTAMP)
+        FROM inventory
+        GROUP BY store_id, product_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_stock_levels_product_id"), table_name="stock_levels")
+    op.drop_table("stock_levels")
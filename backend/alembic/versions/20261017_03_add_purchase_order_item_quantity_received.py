@@ -0,0 +1,34 @@
+"""track received quantity per purchase order line for partial receipts
+
+Revision ID: 20261017_03
+Revises: 20261017_02
+Create Date: 2026-10-17 13:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261017_03"
+down_revision: Union[str, None] = "20261017_02"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "purchase_order_items",
+        sa.Column("quantity_received", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        """
+        UPDATE purchase_order_items
+        SET quantity_received = quantity
+        WHERE purchase_order_id IN (SELECT id FROM purchase_orders WHERE status = 'received')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("purchase_order_items", "quantity_received")
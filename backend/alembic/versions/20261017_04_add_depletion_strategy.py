@@ -0,0 +1,42 @@
+"""add merchant depletion strategy and key the in-stock index on receipt time
+
+Revision ID: 20261017_04
+Revises: 20261017_03
+Create Date: 2026-10-17 15:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261017_04"
+down_revision: Union[str, None] = "20261017_03"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+IN_STOCK = sa.text("quantity_in_stock > 0")
+
+
+def _in_stock_lookup(order_column: str) -> None:
+    op.create_index(
+        "ix_inventory_in_stock_lookup",
+        "inventory",
+        ["store_id", "product_id", order_column],
+        unique=False,
+        sqlite_where=IN_STOCK,
+        postgresql_where=IN_STOCK,
+    )
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("depletion_strategy", sa.String(length=20), nullable=True))
+    # FIFO and LIFO order batches by created_at, no longer by updated_at.
+    op.drop_index("ix_inventory_in_stock_lookup", table_name="inventory")
+    _in_stock_lookup("created_at")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_inventory_in_stock_lookup", table_name="inventory")
+    _in_stock_lookup("updated_at")
+    op.drop_column("users", "depletion_strategy")
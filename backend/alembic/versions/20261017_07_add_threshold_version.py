@@ -0,0 +1,27 @@
+"""add merchant threshold version stamp
+
+Revision ID: 20261017_07
+Revises: 20261017_06
+Create Date: 2026-10-17 18:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261017_07"
+down_revision: Union[str, None] = "20261017_06"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("threshold_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "threshold_version")
@@ -0,0 +1,27 @@
+"""add notification occurrence count for coalesced alerts
+
+Revision ID: 20261017_08
+Revises: 20261017_07
+Create Date: 2026-10-17 19:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261017_08"
+down_revision: Union[str, None] = "20261017_07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "notifications",
+        sa.Column("occurrences", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("notifications", "occurrences")
@@ -0,0 +1,43 @@
+"""add notification_counters and backfill unread counts
+
+Revision ID: 20261017_09
+Revises: 20261017_08
+Create Date: 2026-10-17 20:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261017_09"
+down_revision: Union[str, None] = "20261017_08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    counters = op.create_table(
+        "notification_counters",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("unread_count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    notifications = sa.table(
+        "notifications",
+        sa.column("user_id", sa.Integer()),
+        sa.column("is_read", sa.Boolean()),
+    )
+    op.execute(
+        counters.insert().from_select(
+            ["user_id", "unread_count", "updated_at"],
+            sa.select(notifications.c.user_id, sa.func.count(), sa.func.current_timestamp())
+            .where(notifications.c.is_read == sa.false())
+            .group_by(notifications.c.user_id),
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("notification_counters")
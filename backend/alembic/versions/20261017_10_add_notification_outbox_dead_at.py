@@ -0,0 +1,25 @@
+"""add notification_outbox.dead_at for rows that used up their attempts
+
+Revision ID: 20261017_10
+Revises: 20261017_09
+Create Date: 2026-10-17 21:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261017_10"
+down_revision: Union[str, None] = "20261017_09"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows already past the limit are retried once more and then marked dead by the dispatcher.
+    op.add_column("notification_outbox", sa.Column("dead_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("notification_outbox", "dead_at")
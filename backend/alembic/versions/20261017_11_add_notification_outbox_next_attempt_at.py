@@ -0,0 +1,24 @@
+"""add notification_outbox.next_attempt_at to back off failing rows
+
+Revision ID: 20261017_11
+Revises: 20261017_10
+Create Date: 2026-10-17 22:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261017_11"
+down_revision: Union[str, None] = "20261017_10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("notification_outbox", sa.Column("next_attempt_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("notification_outbox", "next_attempt_at")
@@ -0,0 +1,120 @@
+"""
+Sampled, non-blocking access log.
+
+The request middleware puts a plain dict on a queue; building the log
+record, JSON serialization and the write happen on a QueueListener thread,
+so the event loop only pays for the sampling decision and a queue put, and a
+slow or blocked log sink never stalls requests. Responses with a 4xx/5xx
+status and requests slower than ACCESS_LOG_SLOW_MS are always logged; 2xx
+and 3xx are sampled at their configured rates. When the queue is full the
+entry is dropped and counted instead of blocking the request.
+ACCESS_LOG_ENABLED=false turns the whole pipeline off.
+
+Records go through the "myduka.access" logger, so its handlers, levels and
+propagation decide where the JSON lines end up. Only when nothing in its
+hierarchy has a handler does the log fall back to stderr.
+"""
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+from logging.handlers import QueueListener
+
+from .config import settings
+
+logger = logging.getLogger("myduka.access")
+# INFO unless logging config says otherwise; the root logger's default WARNING would drop every entry.
+if logger.level == logging.NOTSET:
+    logger.setLevel(logging.INFO)
+
+
+class _DictQueueListener(QueueListener):
+    """Turn queued entry dicts into log records on the listener thread."""
+
+    def prepare(self, entry: dict) -> logging.LogRecord:
+        return logger.makeRecord(
+            logger.name, logging.INFO, __file__, 0, json.dumps(entry), None, None, extra={"access": entry}
+        )
+
+
+class _LoggerHandler(logging.Handler):
+    """Hand listener records to the access logger and its configured handlers."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+
+class AccessLog:
+    def __init__(
+        self,
+        enabled: bool,
+        slow_ms: float,
+        sample_rates: dict[int, float],
+        queue_size: int,
+        handler: logging.Handler | None = None,
+    ):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.sample_rates = sample_rates
+        self.queue_size = queue_size
+        self.stats = {"enqueued": 0, "sampled_out": 0, "dropped": 0}
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        # An explicit handler (tests, benchmarks) bypasses the logger.
+        self._handler = handler
+        self._listener: QueueListener | None = None
+        self._start_lock = threading.Lock()
+
+    def should_log(self, status_code: int, duration_ms: float) -> bool:
+        if status_code >= 400 or duration_ms >= self.slow_ms:
+            return True
+        rate = self.sample_rates.get(status_code // 100, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+    def record(self, entry: dict) -> None:
+        """Queue one access entry; the caller has already applied should_log()."""
+        if self._listener is None:
+            self.start()
+        if self._queue.qsize() >= self.queue_size:
+            self.stats["dropped"] += 1
+            return
+        self._queue.put_nowait(entry)
+        self.stats["enqueued"] += 1
+
+    def log_request(self, status_code: int, duration_ms: float, build_entry) -> None:
+        """Sample, then build and queue the entry; build_entry is only called for kept requests."""
+        if not self.enabled:
+            return
+        if not self.should_log(status_code, duration_ms):
+            self.stats["sampled_out"] += 1
+            return
+        self.record(build_entry())
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._listener is None:
+                if self._handler is None and not logger.hasHandlers():
+                    logger.addHandler(logging.StreamHandler(sys.stderr))
+                handler = self._handler or _LoggerHandler()
+                self._listener = _DictQueueListener(self._queue, handler, respect_handler_level=True)
+                self._listener.start()
+
+    def stop(self) -> None:
+        """Drain queued entries and stop the listener thread."""
+        with self._start_lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._listener = None
+
+    def snapshot(self) -> dict:
+        return {"enabled": self.enabled, "queued": self._queue.qsize(), **self.stats}
+
+
+access_log = AccessLog(
+    enabled=settings.access_log_enabled,
+    slow_ms=settings.access_log_slow_ms,
+    sample_rates={2: settings.access_log_sample_rate_2xx, 3: settings.access_log_sample_rate_3xx},
+    queue_size=settings.access_log_queue_size,
+)
@@ -2,7 +2,7 @@
 Configuration settings for the MyDuka FastAPI application
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -16,6 +16,37 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./myduka.db"
     database_driver: str = "sqlite"  # sqlite or postgresql
+    # Connection pool sizing, applied to both the sync and async engines.
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30.0
+    database_pool_recycle: int = 1800  # seconds; -1 disables recycling
+    # Read path for analytics/dashboards: a replica URL, or (SQLite) a backup
+    # snapshot refreshed when older than read_snapshot_max_age_seconds.
+    # With neither set, reads use the primary.
+    read_database_url: Optional[str] = None
+    read_snapshot_path: Optional[str] = None
+    read_snapshot_max_age_seconds: int = 30
+
+    # Shared directory where each worker publishes its request metrics so
+    # /metrics aggregates across uvicorn workers. Unset: this worker only.
+    metrics_dir: Optional[str] = None
+    metrics_flush_interval_seconds: float = 1.0
+    # SQL insights: statements at or above the threshold are logged with the
+    # request ID; a request repeating one fingerprint n_plus_one_threshold
+    # times is flagged as a suspected N+1.
+    slow_query_threshold_ms: float = 200.0
+    n_plus_one_threshold: int = 10
+    query_log_max_fingerprints: int = 500
+
+    # Access log: JSON lines written from a background thread. 4xx/5xx and
+    # requests at or above access_log_slow_ms are always logged; 2xx/3xx are
+    # sampled at the given rates (0.0-1.0).
+    access_log_enabled: bool = True
+    access_log_slow_ms: float = 1000.0
+    access_log_sample_rate_2xx: float = 1.0
+    access_log_sample_rate_3xx: float = 1.0
+    access_log_queue_size: int = 10000
 
     # JWT Settings
     secret_key: str = "your-secret-key-change-this-in-production"
@@ -24,6 +55,16 @@ class Settings(BaseSettings):
     refresh_token_expire_days: int = 7
     invite_token_expire_hours: int = 48
     reset_token_expire_hours: int = 2
+    # In-process cache of authenticated users for get_current_user. Writes in
+    # this worker invalidate immediately; other workers see changes within the
+    # TTL. A TTL of 0 disables the cache.
+    principal_cache_ttl_seconds: int = 30
+    principal_cache_max_entries: int = 1024
+    # Store alert recipients (active admins + merchant) cached per worker by
+    # store id. User and store changes invalidate the local entry; other workers
+    # pick them up within the TTL. A TTL of 0 disables the cache.
+    recipient_cache_ttl_seconds: int = 60
+    recipient_cache_max_entries: int = 4096
 
     # Email Settings (optional - for later implementation)
     smtp_server: str = "smtp.gmail.com"
@@ -38,6 +79,45 @@ class Settings(BaseSettings):
     # Pagination
     items_per_page: int = 10
     low_stock_default_threshold: int = 20
+    # Low-stock thresholds are cached per merchant in each worker. A worker trusts
+    # its copy for this long before re-reading the merchant's threshold_version
+    # (one primary-key read); 0 checks the version on every lookup.
+    threshold_cache_check_seconds: float = 5.0
+    # How many times decrease_stock re-reads inventory batches when a concurrent
+    # edit changes one between its read and its conditional update.
+    stock_decrement_max_retries: int = 3
+    # Batch consumption order for stores whose merchant has not chosen one
+    # (see app.services.depletion).
+    default_depletion_strategy: Literal["fifo", "lifo", "highest_cost"] = "lifo"
+    # Rows validated and bulk-inserted (and committed) together by the
+    # streaming inventory import.
+    inventory_import_chunk_size: int = 500
+    # Notification outbox: the background dispatcher polls this often when idle
+    # (commits that write outbox rows wake it sooner), delivers up to the batch
+    # size per transaction and gives up on a row after max attempts. A failed row
+    # waits retry seconds before its next attempt, doubling after each failure.
+    notification_dispatch_interval_seconds: float = 1.0
+    notification_dispatch_batch_size: int = 200
+    notification_outbox_max_attempts: int = 5
+    notification_outbox_retry_seconds: float = 10.0
+    # A low-stock or unpaid alert that repeats while the user still has an unread
+    # one for the same store and product from the last N minutes refreshes that
+    # row (message, time, occurrence count) instead of adding another. 0 disables.
+    notification_coalesce_window_minutes: int = 60
+    # How often the dispatcher recounts unread notification counters that
+    # drifted from the notifications table (0 disables the periodic check).
+    notification_counter_reconcile_minutes: int = 60
+    # GET /api/notifications/stream (server-sent events). "local" delivers
+    # within one worker; "postgres" fans out across workers with LISTEN/NOTIFY.
+    # Streams send a heartbeat comment when idle, are told to resync once they
+    # fall queue_size messages behind, and end after max_seconds so the client
+    # reconnects (re-authenticating with its current token).
+    notification_broker_backend: Literal["local", "postgres"] = "local"
+    notification_stream_heartbeat_seconds: float = 15.0
+    notification_stream_queue_size: int = 100
+    notification_stream_max_seconds: float = 300.0
+    # How long a stored Idempotency-Key response is replayed for retries.
+    idempotency_key_ttl_hours: int = 24
     seed_demo_users: bool = True
     # Comma-separated list to allow configuring multiple origins via env.
     cors_origins_raw: str = "http://localhost:3000,http://localhost:3001,http://localhost:5173"
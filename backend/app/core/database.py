@@ -2,9 +2,28 @@
 Database configuration and session management
 """
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
 from typing import AsyncGenerator
 from .config import settings
+from .pool_telemetry import TimedAsyncQueuePool, TimedQueuePool, instrument_engine, pool_options
+
+# asyncio drivers used for the async engine, keyed by backend name.
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def build_async_url(database_url: str) -> str:
+    """Map a sync database URL onto the matching asyncio driver."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
 
 # Create database engine
 if settings.database_driver == "sqlite":
@@ -13,14 +32,30 @@ if settings.database_driver == "sqlite":
         connect_args={"check_same_thread": False},
         echo=settings.debug,
         pool_pre_ping=True,
+        poolclass=TimedQueuePool,
+        **pool_options(settings, "primary"),
     )
 else:
     engine = create_engine(
         settings.database_url,
         echo=settings.debug,
         pool_pre_ping=True,
+        poolclass=TimedQueuePool,
+        **pool_options(settings, "primary"),
     )
 
+# Async engine for routes that must not block the event loop
+async_engine = create_async_engine(
+    build_async_url(settings.database_url),
+    echo=settings.debug,
+    pool_pre_ping=True,
+    poolclass=TimedAsyncQueuePool,
+    **pool_options(settings, "async"),
+)
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 # Create session factory
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -28,6 +63,13 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+# Objects outlive the commit in async routes, so keep them loaded after commit.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Base class for all models
 Base = declarative_base()
 
@@ -42,3 +84,15 @@ async def get_db() -> AsyncGenerator[Session, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency function to get an async database session
+    Usage: In your route: db: AsyncSession = Depends(get_async_db)
+
+    Sync service helpers (stock_service, notification_service) run on the same
+    connection via ``await db.run_sync(helper, ...)``.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -2,15 +2,16 @@
 FastAPI dependencies for authentication and authorization
 """
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from .database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_async_db
+from .principal_cache import principal_cache
 from .security import verify_token
 from typing import Optional
 
 
 async def get_current_user(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get the current authenticated user from JWT token in Authorization header
@@ -45,9 +46,23 @@ async def get_current_user(
         )
     
     payload = verify_token(token)
-    user_id: int = payload.get("sub")
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token subject",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    # Most requests are served from the principal cache; a miss loads the row
+    # and caches it detached from this request's session.
+    user, cache_version = principal_cache.get(user_id)
+    if user is None:
+        user = await db.get(User, user_id)
+        if user is not None:
+            db.expunge(user)
+            principal_cache.put(user_id, user, cache_version)
     
     if not user:
         raise HTTPException(
@@ -98,3 +113,19 @@ def enforce_store_scope(current_user, resource_store_id: Optional[int]) -> None:
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Cannot access resources outside your assigned store",
             )
+
+
+async def get_idempotency_key(request: Request, current_user=Depends(get_current_user)):
+    """
+    The request's Idempotency-Key, scoped to the caller, or None without the header.
+
+    Routes pass it to app.services.idempotency to replay or store responses.
+    """
+    from app.services.idempotency import IDEMPOTENCY_HEADER, build_idempotent_request
+
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return None
+    return build_idempotent_request(
+        current_user.id, key.strip(), request.method, request.url.path, await request.body()
+    )
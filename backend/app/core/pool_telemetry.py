@@ -0,0 +1,95 @@
+"""
+Connection pool sizing and live pool telemetry.
+"""
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Cumulative pool counters keyed by pool logging name ("primary", "async", ...).
+POOL_METRICS: dict[str, dict[str, float]] = {}
+
+
+def _counters(name: str) -> dict[str, float]:
+    return POOL_METRICS.setdefault(
+        name,
+        {
+            "connections_opened": 0,
+            "checkouts": 0,
+            "checkout_timeouts": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+        },
+    )
+
+
+class _TimedCheckoutMixin:
+    """Measure how long each checkout waited before it got a connection."""
+
+    def _do_get(self):
+        counters = _counters(self.logging_name or "default")
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            counters["checkout_timeouts"] += 1
+            raise
+        finally:
+            waited_ms = (time.perf_counter() - start) * 1000
+            counters["wait_ms_total"] += waited_ms
+            counters["wait_ms_max"] = max(counters["wait_ms_max"], waited_ms)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(settings, name: str) -> dict:
+    """Engine keyword arguments for a named, sized pool."""
+    return {
+        "pool_logging_name": name,
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+    }
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach pool event listeners that feed POOL_METRICS."""
+    counters = _counters(engine.pool.logging_name or "default")
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        counters["connections_opened"] += 1
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters["checkouts"] += 1
+
+
+def pool_snapshot(engines: list[Engine]) -> dict:
+    """Live gauges plus cumulative counters for each engine's pool."""
+    snapshot = {}
+    for engine in engines:
+        pool = engine.pool
+        name = pool.logging_name or "default"
+        counters = _counters(name)
+        checkouts = counters["checkouts"]
+        snapshot[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "connections_opened": int(counters["connections_opened"]),
+            "checkouts_total": int(checkouts),
+            "checkout_timeouts": int(counters["checkout_timeouts"]),
+            "wait_ms_total": round(counters["wait_ms_total"], 2),
+            "wait_ms_avg": round(counters["wait_ms_total"] / checkouts, 3) if checkouts else 0.0,
+            "wait_ms_max": round(counters["wait_ms_max"], 2),
+        }
+    return snapshot
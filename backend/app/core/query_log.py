@@ -0,0 +1,146 @@
+"""
+Request-attributed SQL insights: fingerprints, slow-query log and N+1 detection.
+
+Each statement is reduced to a fingerprint (literals and bind markers replaced,
+IN lists collapsed, whitespace folded) so "SELECT ... WHERE id = 1" and
+"... id = 2" count as the same query. Statements slower than
+SLOW_QUERY_THRESHOLD_MS are logged with the request ID; a request that runs
+one fingerprint N_PLUS_ONE_THRESHOLD times or more is logged as a suspected
+N+1. Per-fingerprint totals feed the admin /metrics/queries summary.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+from functools import lru_cache
+from typing import Optional
+
+from .config import settings
+
+logger = logging.getLogger("myduka.sql")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_MARKER = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*\(([^()]*)\)(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> tuple[str, str]:
+    """Return (fingerprint id, normalized SQL) for a statement."""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _BIND_MARKER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    normalized = _IN_LIST.sub("IN (?...)", normalized)
+    normalized = _VALUES_LIST.sub(r"VALUES (\1), ...", normalized)
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+    return digest, normalized
+
+
+class QueryLog:
+    def __init__(self, slow_threshold_ms: float, n_plus_one_threshold: int, max_fingerprints: int):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.max_fingerprints = max_fingerprints
+        self.fingerprints: dict[str, dict] = {}
+        self.untracked_statements = 0
+        self._lock = threading.Lock()
+
+    def record_statement(self, statement: str, elapsed_ms: float, request_id: Optional[str], counts: Optional[dict]) -> None:
+        """Account one executed statement; counts is the current request's per-fingerprint tally."""
+        digest, normalized = fingerprint(statement)
+        if counts is not None:
+            counts[digest] = counts.get(digest, 0) + 1
+        slow = elapsed_ms >= self.slow_threshold_ms
+        with self._lock:
+            entry = self.fingerprints.get(digest)
+            if entry is None:
+                if len(self.fingerprints) >= self.max_fingerprints:
+                    self.untracked_statements += 1
+                else:
+                    entry = self.fingerprints[digest] = {
+                        "sql": normalized,
+                        "calls": 0,
+                        "total_ms": 0.0,
+                        "max_ms": 0.0,
+                        "slow_calls": 0,
+                        "n_plus_one_requests": 0,
+                        "last_route": None,
+                    }
+            if entry is not None:
+                entry["calls"] += 1
+                entry["total_ms"] += elapsed_ms
+                entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+                if slow:
+                    entry["slow_calls"] += 1
+        if slow:
+            logger.warning(
+                json.dumps(
+                    {
+                        "event": "slow_query",
+                        "request_id": request_id,
+                        "fingerprint": digest,
+                        "duration_ms": round(elapsed_ms, 2),
+                        "sql": normalized[:500],
+                    }
+                )
+            )
+
+    def finish_request(self, request_id: Optional[str], route: str, counts: dict) -> list[str]:
+        """Flag fingerprints the request repeated at least n_plus_one_threshold times."""
+        repeated = [digest for digest, count in counts.items() if count >= self.n_plus_one_threshold]
+        if not repeated:
+            return []
+        with self._lock:
+            for digest in repeated:
+                entry = self.fingerprints.get(digest)
+                if entry is not None:
+                    entry["n_plus_one_requests"] += 1
+                    entry["last_route"] = route
+        for digest in repeated:
+            logger.warning(
+                json.dumps(
+                    {
+                        "event": "n_plus_one_suspected",
+                        "request_id": request_id,
+                        "route": route,
+                        "fingerprint": digest,
+                        "executions": counts[digest],
+                    }
+                )
+            )
+        return repeated
+
+    def summary(self, limit: int = 50) -> dict:
+        """Top fingerprints by total time, plus every N+1 suspect."""
+        with self._lock:
+            entries = [
+                {
+                    "fingerprint": digest,
+                    **entry,
+                    "total_ms": round(entry["total_ms"], 2),
+                    "max_ms": round(entry["max_ms"], 2),
+                    "avg_ms": round(entry["total_ms"] / entry["calls"], 3) if entry["calls"] else 0.0,
+                }
+                for digest, entry in self.fingerprints.items()
+            ]
+            untracked = self.untracked_statements
+        entries.sort(key=lambda item: item["total_ms"], reverse=True)
+        return {
+            "slow_query_threshold_ms": self.slow_threshold_ms,
+            "n_plus_one_threshold": self.n_plus_one_threshold,
+            "untracked_statements": untracked,
+            "top_by_total_time": entries[:limit],
+            "n_plus_one_suspects": [item for item in entries if item["n_plus_one_requests"]],
+        }
+
+
+query_log = QueryLog(
+    slow_threshold_ms=settings.slow_query_threshold_ms,
+    n_plus_one_threshold=settings.n_plus_one_threshold,
+    max_fingerprints=settings.query_log_max_fingerprints,
+)
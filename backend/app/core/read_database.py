@@ -0,0 +1,176 @@
+"""
+Read-only database path for analytics and dashboard routes.
+
+Reads go to one of, in order of preference:
+- ``READ_DATABASE_URL``: a streaming replica (staleness = replica lag).
+- ``READ_SNAPSHOT_PATH``: a SQLite backup of the primary, rebuilt whenever a
+  read finds it older than ``READ_SNAPSHOT_MAX_AGE_SECONDS``. Data served from
+  the snapshot is therefore at most that many seconds old (plus the time the
+  backup takes), and long scans never hold locks on the primary file.
+- otherwise the primary async engine.
+
+Sessions from ``get_read_db`` refuse to flush, so writes stay on the primary.
+"""
+import asyncio
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from typing import AsyncGenerator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import async_engine, build_async_url
+from .pool_telemetry import TimedAsyncQueuePool, instrument_engine, pool_options
+
+
+class ReadOnlySession(Session):
+    """Session class for the read path; any flush is a programming error."""
+
+
+@event.listens_for(ReadOnlySession, "before_flush")
+def _reject_writes(session, flush_context, instances):
+    raise RuntimeError("Read-only session cannot write; use get_db or get_async_db for writes.")
+
+
+class ReadSnapshot:
+    """
+    SQLite backup of the primary database, refreshed when it gets too old.
+
+    Sessions lease the current generation's engine. A refresh retires the old
+    generation, whose engine is disposed and file deleted only once the last
+    session leasing it has closed.
+    """
+
+    def __init__(self, source_path: str, snapshot_path: str, max_age_seconds: float):
+        self.source_path = source_path
+        self.snapshot_path = snapshot_path
+        self.max_age_seconds = max_age_seconds
+        self.refreshed_at: Optional[float] = None
+        self.generation = 0
+        self._engine: Optional[AsyncEngine] = None
+        # generation -> open leases; retired generation -> (engine, file) awaiting its last lease
+        self._leases: dict[int, int] = {}
+        self._retired: dict[int, tuple[AsyncEngine, str]] = {}
+        self._lock = threading.Lock()
+
+    def age_seconds(self) -> Optional[float]:
+        if self.refreshed_at is None:
+            return None
+        return time.monotonic() - self.refreshed_at
+
+    def _is_stale(self) -> bool:
+        age = self.age_seconds()
+        return age is None or age >= self.max_age_seconds
+
+    def _refresh_blocking(self) -> None:
+        with self._lock:
+            if not self._is_stale():
+                return
+            generation = self.generation + 1
+            path = f"{self.snapshot_path}.{generation}"
+            source = sqlite3.connect(self.source_path)
+            target = sqlite3.connect(path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            engine = create_async_engine(f"sqlite+aiosqlite:///file:{path}?mode=ro&uri=true")
+            if self._engine is not None:
+                self._retired[self.generation] = (self._engine, f"{self.snapshot_path}.{self.generation}")
+            self._engine = engine
+            self.generation = generation
+            self.refreshed_at = time.monotonic()
+
+    @contextlib.asynccontextmanager
+    async def lease(self) -> AsyncGenerator[AsyncEngine, None]:
+        """The current snapshot's engine, kept (with its file) until the block exits."""
+        if self._is_stale():
+            await asyncio.to_thread(self._refresh_blocking)
+        with self._lock:
+            generation, engine = self.generation, self._engine
+            self._leases[generation] = self._leases.get(generation, 0) + 1
+        try:
+            yield engine
+        finally:
+            with self._lock:
+                self._leases[generation] -= 1
+                if not self._leases[generation]:
+                    del self._leases[generation]
+            await self._release_retired()
+
+    async def _release_retired(self) -> None:
+        with self._lock:
+            idle = [generation for generation in self._retired if generation not in self._leases]
+            released = [self._retired.pop(generation) for generation in idle]
+        for engine, path in released:
+            await engine.dispose()
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+
+read_snapshot: Optional[ReadSnapshot] = None
+replica_engine: Optional[AsyncEngine] = None
+
+if settings.read_database_url:
+    replica_engine = create_async_engine(
+        build_async_url(settings.read_database_url),
+        echo=settings.debug,
+        pool_pre_ping=True,
+        poolclass=TimedAsyncQueuePool,
+        **pool_options(settings, "read"),
+    )
+    instrument_engine(replica_engine.sync_engine)
+elif settings.read_snapshot_path and settings.database_driver == "sqlite":
+    read_snapshot = ReadSnapshot(
+        source_path=make_url(settings.database_url).database,
+        snapshot_path=settings.read_snapshot_path,
+        max_age_seconds=settings.read_snapshot_max_age_seconds,
+    )
+
+
+@contextlib.asynccontextmanager
+async def read_engine() -> AsyncGenerator[AsyncEngine, None]:
+    if replica_engine is not None:
+        yield replica_engine
+    elif read_snapshot is not None:
+        async with read_snapshot.lease() as engine:
+            yield engine
+    else:
+        yield async_engine
+
+
+def read_path_status() -> dict:
+    """Which read path is active and, for snapshots, how old the data is."""
+    if replica_engine is not None:
+        return {"mode": "replica"}
+    if read_snapshot is not None:
+        age = read_snapshot.age_seconds()
+        return {
+            "mode": "snapshot",
+            "generation": read_snapshot.generation,
+            "age_seconds": None if age is None else round(age, 2),
+            "max_age_seconds": read_snapshot.max_age_seconds,
+        }
+    return {"mode": "primary"}
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for read-heavy routes (analytics, dashboards).
+    Usage: In your route: db: AsyncSession = Depends(get_read_db)
+    """
+    async with read_engine() as bind:
+        async with AsyncSession(
+            bind=bind,
+            sync_session_class=ReadOnlySession,
+            autoflush=False,
+            expire_on_commit=False,
+        ) as db:
+            yield db
@@ -0,0 +1,257 @@
+"""
+Per-route request metrics: latency histograms, in-flight gauge and SQL cost.
+
+SQL statement counts and DB time are collected by cursor events on every
+Engine and attributed to the request through a context variable. Latencies
+go into fixed buckets so state from several uvicorn workers can be merged by
+summing counts; quantiles are estimated from the merged buckets the same way
+Prometheus' histogram_quantile does.
+
+With METRICS_DIR set, each worker writes its state to ``http-<pid>.json`` in
+that directory (at most once per flush interval, and on every scrape) and
+/metrics merges all files, so any worker can answer a scrape for the whole
+server. In-flight counts from workers that are no longer running are dropped;
+their counters are kept so totals stay monotonic. Clear the directory on
+deploy.
+"""
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+from .query_log import query_log
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass
+class RequestStats:
+    request_id: Optional[str] = None
+    sql_statements: int = 0
+    db_time_ms: float = 0.0
+    # Executions per SQL fingerprint, for N+1 detection.
+    fingerprint_counts: dict = field(default_factory=dict)
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._myduka_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    if context is None:
+        return
+    elapsed_ms = (time.perf_counter() - getattr(context, "_myduka_started", time.perf_counter())) * 1000
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.sql_statements += 1
+        stats.db_time_ms += elapsed_ms
+    query_log.record_statement(
+        statement,
+        elapsed_ms,
+        stats.request_id if stats is not None else None,
+        stats.fingerprint_counts if stats is not None else None,
+    )
+
+
+def _empty_route() -> dict:
+    return {
+        "count": 0,
+        "errors": 0,
+        "duration_ms_sum": 0.0,
+        "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        "sql_statements": 0,
+        "db_time_ms_sum": 0.0,
+    }
+
+
+class RequestMetrics:
+    def __init__(self, metrics_dir: Optional[str], flush_interval_seconds: float):
+        self.metrics_dir = Path(metrics_dir) if metrics_dir else None
+        self.flush_interval_seconds = flush_interval_seconds
+        self.routes: dict[str, dict] = {}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def start(self, request_id: Optional[str] = None) -> RequestStats:
+        with self._lock:
+            self.in_flight += 1
+        stats = RequestStats(request_id=request_id)
+        current_request_stats.set(stats)
+        return stats
+
+    def finish(self, method: str, route: Optional[str], status_code: int, duration_ms: float, stats: RequestStats) -> None:
+        key = f"{method} {route or UNMATCHED_ROUTE}"
+        bucket = next(
+            (index for index, bound in enumerate(LATENCY_BUCKETS_MS) if duration_ms <= bound),
+            len(LATENCY_BUCKETS_MS),
+        )
+        with self._lock:
+            self.in_flight -= 1
+            entry = self.routes.get(key)
+            if entry is None:
+                entry = self.routes[key] = _empty_route()
+            entry["count"] += 1
+            if status_code >= 500:
+                entry["errors"] += 1
+            entry["duration_ms_sum"] += duration_ms
+            entry["buckets"][bucket] += 1
+            entry["sql_statements"] += stats.sql_statements
+            entry["db_time_ms_sum"] += stats.db_time_ms
+        query_log.finish_request(stats.request_id, key, stats.fingerprint_counts)
+        if self.metrics_dir is not None and time.monotonic() - self._last_flush >= self.flush_interval_seconds:
+            self.flush()
+
+    def _local_state(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "in_flight": self.in_flight,
+                "routes": {key: {**entry, "buckets": list(entry["buckets"])} for key, entry in self.routes.items()},
+            }
+
+    def flush(self) -> None:
+        """Publish this worker's state for the other workers' scrapes."""
+        self._last_flush = time.monotonic()
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        target = self.metrics_dir / f"http-{os.getpid()}.json"
+        scratch = target.with_suffix(".tmp")
+        scratch.write_text(json.dumps(self._local_state()))
+        os.replace(scratch, target)
+
+    def _worker_states(self) -> list[dict]:
+        local = self._local_state()
+        if self.metrics_dir is None:
+            return [local]
+        self.flush()
+        states = [local]
+        for path in self.metrics_dir.glob("http-*.json"):
+            try:
+                state = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if state.get("pid") == local["pid"]:
+                continue
+            if not _pid_alive(state.get("pid")):
+                state["in_flight"] = 0
+            states.append(state)
+        return states
+
+    def aggregate(self) -> dict:
+        """Merge every worker's state into one {in_flight, routes} view."""
+        merged: dict[str, dict] = {}
+        in_flight = 0
+        for state in self._worker_states():
+            in_flight += state.get("in_flight", 0)
+            for key, entry in state.get("routes", {}).items():
+                target = merged.setdefault(key, _empty_route())
+                for field in ("count", "errors", "duration_ms_sum", "sql_statements", "db_time_ms_sum"):
+                    target[field] += entry[field]
+                target["buckets"] = [a + b for a, b in zip(target["buckets"], entry["buckets"])]
+        return {"in_flight": in_flight, "routes": merged}
+
+    def summary(self) -> dict:
+        """JSON view for /metrics with estimated quantiles per route."""
+        aggregated = self.aggregate()
+        routes = {}
+        for key, entry in sorted(aggregated["routes"].items()):
+            count = entry["count"]
+            routes[key] = {
+                "count": count,
+                "errors": entry["errors"],
+                "p50_ms": estimate_quantile(entry["buckets"], 0.50),
+                "p95_ms": estimate_quantile(entry["buckets"], 0.95),
+                "p99_ms": estimate_quantile(entry["buckets"], 0.99),
+                "sql_statements_avg": round(entry["sql_statements"] / count, 2) if count else 0.0,
+                "db_time_ms_avg": round(entry["db_time_ms_sum"] / count, 2) if count else 0.0,
+            }
+        return {"in_flight": aggregated["in_flight"], "routes": routes}
+
+
+def _pid_alive(pid) -> bool:
+    if not isinstance(pid, int):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def estimate_quantile(buckets: list[int], quantile: float) -> float:
+    """Linear interpolation inside the bucket holding the quantile; the +Inf bucket reports the last bound."""
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    rank = quantile * total
+    seen = 0
+    for index, count in enumerate(buckets):
+        if seen + count >= rank and count:
+            if index == len(LATENCY_BUCKETS_MS):
+                return float(LATENCY_BUCKETS_MS[-1])
+            lower = LATENCY_BUCKETS_MS[index - 1] if index else 0.0
+            upper = LATENCY_BUCKETS_MS[index]
+            return round(lower + (upper - lower) * (rank - seen) / count, 2)
+        seen += count
+    return float(LATENCY_BUCKETS_MS[-1])
+
+
+def _labels(key: str) -> str:
+    method, route = key.split(" ", 1)
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+
+def render_prometheus(aggregated: dict) -> str:
+    """Prometheus text exposition (format 0.0.4) of an aggregate() result."""
+    lines = [
+        "# HELP myduka_http_requests_in_flight Requests currently being handled.",
+        "# TYPE myduka_http_requests_in_flight gauge",
+        f"myduka_http_requests_in_flight {aggregated['in_flight']}",
+        "# HELP myduka_http_request_duration_seconds Request latency by route template.",
+        "# TYPE myduka_http_request_duration_seconds histogram",
+    ]
+    routes = sorted(aggregated["routes"].items())
+    for key, entry in routes:
+        labels = _labels(key)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, entry["buckets"]):
+            cumulative += count
+            lines.append(f'myduka_http_request_duration_seconds_bucket{{{labels},le="{bound / 1000:g}"}} {cumulative}')
+        lines.append(f'myduka_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {entry["count"]}')
+        lines.append(f"myduka_http_request_duration_seconds_sum{{{labels}}} {entry['duration_ms_sum'] / 1000:.6f}")
+        lines.append(f"myduka_http_request_duration_seconds_count{{{labels}}} {entry['count']}")
+    counters = (
+        ("myduka_http_request_errors_total", "Requests that returned a 5xx status.", "errors", 1),
+        ("myduka_db_statements_total", "SQL statements executed while handling requests.", "sql_statements", 1),
+        ("myduka_db_time_seconds_total", "Time spent in SQL while handling requests.", "db_time_ms_sum", 1000),
+    )
+    for name, help_text, field, divisor in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for key, entry in routes:
+            lines.append(f"{name}{{{_labels(key)}}} {entry[field] / divisor:g}")
+    return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics(
+    metrics_dir=settings.metrics_dir,
+    flush_interval_seconds=settings.metrics_flush_interval_seconds,
+)
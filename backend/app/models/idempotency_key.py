@@ -0,0 +1,30 @@
+"""
+SQLAlchemy model for stored responses of idempotent write requests.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+
+from app.core.database import Base
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class IdempotencyKey(Base):
+    """
+    The response a user's request produced under an Idempotency-Key header,
+    replayed for retries until expires_at. Written in the same transaction as
+    the change it describes.
+    """
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    # sha256 of method, path and body; a reused key with another request is rejected.
+    request_fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=utc_now, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
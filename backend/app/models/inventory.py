@@ -1,11 +1,12 @@
 """
 SQLAlchemy models for Inventory entity
 """
-from sqlalchemy import Column, Integer, Float, Boolean, DateTime, ForeignKey, String, Enum
+from sqlalchemy import Column, Integer, Float, Boolean, DateTime, ForeignKey, String, Enum, Index, event, inspect, text
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 import enum
 from app.core.database import Base
+from app.models.stock_level import adjust_stock_level
 
 
 def utc_now():
@@ -23,6 +24,17 @@ class Inventory(Base):
     Inventory model tracking product stock and movements
     """
     __tablename__ = "inventory"
+    __table_args__ = (
+        # Stock depletion: in-stock rows for one store/product, by receipt time.
+        Index(
+            "ix_inventory_in_stock_lookup",
+            "store_id",
+            "product_id",
+            "created_at",
+            sqlite_where=text("quantity_in_stock > 0"),
+            postgresql_where=text("quantity_in_stock > 0"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -55,3 +67,33 @@ class Inventory(Base):
     
     def __repr__(self):
         return f"<Inventory(id={self.id}, product_id={self.product_id}, store_id={self.store_id})>"
+
+
+# Keep stock_levels in step with inventory rows, inside the flush that writes them.
+@event.listens_for(Inventory, "after_insert")
+def _stock_level_after_insert(mapper, connection, target):
+    adjust_stock_level(connection, target.store_id, target.product_id, target.quantity_in_stock or 0)
+
+
+@event.listens_for(Inventory, "after_update")
+def _stock_level_after_update(mapper, connection, target):
+    state = inspect(target)
+    keys = ("store_id", "product_id", "quantity_in_stock")
+    histories = {key: state.attrs[key].history for key in keys}
+    if not any(history.has_changes() for history in histories.values()):
+        return
+    old = {
+        key: history.deleted[0] if history.deleted else getattr(target, key)
+        for key, history in histories.items()
+    }
+    if (old["store_id"], old["product_id"]) == (target.store_id, target.product_id):
+        delta = (target.quantity_in_stock or 0) - (old["quantity_in_stock"] or 0)
+        adjust_stock_level(connection, target.store_id, target.product_id, delta)
+        return
+    adjust_stock_level(connection, old["store_id"], old["product_id"], -(old["quantity_in_stock"] or 0))
+    adjust_stock_level(connection, target.store_id, target.product_id, target.quantity_in_stock or 0)
+
+
+@event.listens_for(Inventory, "after_delete")
+def _stock_level_after_delete(mapper, connection, target):
+    adjust_stock_level(connection, target.store_id, target.product_id, -(target.quantity_in_stock or 0))
@@ -3,7 +3,7 @@ Model for inventory timeline events.
 """
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
 
 from app.core.database import Base
 
@@ -14,11 +14,16 @@ def utc_now():
 
 class InventoryEvent(Base):
     __tablename__ = "inventory_events"
+    __table_args__ = (
+        Index("ix_inventory_events_store_created", "store_id", "created_at"),
+        # Product timeline, optionally narrowed to one store.
+        Index("ix_inventory_events_product_store_created", "product_id", "store_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     inventory_id = Column(Integer, index=True, nullable=True)
-    product_id = Column(Integer, index=True, nullable=False)
-    store_id = Column(Integer, index=True, nullable=False)
+    product_id = Column(Integer, nullable=False)
+    store_id = Column(Integer, nullable=False)
     actor_id = Column(Integer, index=True, nullable=False)
     event_type = Column(String(40), nullable=False)
 
@@ -1,11 +1,14 @@
 """
 Model for in-app notifications.
 """
+from collections import Counter
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text, event, inspect
+from sqlalchemy.orm import Session
 
 from app.core.database import Base
+from app.models.notification_counter import adjust_unread_counts
 
 
 def utc_now():
@@ -14,14 +17,40 @@ def utc_now():
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Inbox listing, unread filter and unread count for one user.
+        Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, index=True, nullable=False)
+    user_id = Column(Integer, nullable=False)
     store_id = Column(Integer, index=True, nullable=True)
     product_id = Column(Integer, index=True, nullable=True)
     category = Column(String(50), nullable=False)
     title = Column(String(200), nullable=False)
     message = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False, nullable=False)
+    # For coalesced alerts, the latest occurrence; occurrences counts how often it fired.
     created_at = Column(DateTime, default=utc_now, nullable=False)
+    occurrences = Column(Integer, default=1, server_default="1", nullable=False)
     read_at = Column(DateTime, nullable=True)
+
+
+# Keep notification_counters in step with unread rows, inside the flush that writes
+# them. One upsert per flush rather than per row: an alert fans out to many users.
+@event.listens_for(Session, "before_flush")
+def _unread_counts_before_flush(session, flush_context, instances):
+    deltas = Counter()
+    for target in session.new:
+        if isinstance(target, Notification) and not target.is_read:
+            deltas[target.user_id] += 1
+    for target in session.dirty:
+        if isinstance(target, Notification):
+            history = inspect(target).attrs.is_read.history
+            if history.has_changes() and bool(history.deleted and history.deleted[0]) != bool(target.is_read):
+                deltas[target.user_id] += -1 if target.is_read else 1
+    for target in session.deleted:
+        if isinstance(target, Notification) and not target.is_read:
+            deltas[target.user_id] -= 1
+    if any(deltas.values()):
+        adjust_unread_counts(session.connection(), deltas)
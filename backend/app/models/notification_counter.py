@@ -0,0 +1,65 @@
+"""
+Model for per-user unread notification counts.
+"""
+from collections.abc import Mapping
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Integer, update
+from sqlalchemy.engine import Connection
+
+from app.core.database import Base
+from app.models.stock_level import ROWS_PER_UPSERT, _dialect_insert
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class NotificationCounter(Base):
+    """
+    Unread notifications for one user: the number of their notifications with
+    is_read false. ORM inserts, read flags and deletes of notifications adjust
+    it in the same flush (see the listener in app.models.notification); bulk
+    Core statements against the notifications table must adjust it themselves.
+    """
+    __tablename__ = "notification_counters"
+
+    # No foreign key: like notifications.user_id, it outlives a deleted user.
+    user_id = Column(Integer, primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now, nullable=False)
+
+
+def adjust_unread_counts(connection: Connection, deltas: Mapping[int, int]) -> None:
+    """
+    Apply many user_id -> delta adjustments at once, creating rows on first use.
+
+    On SQLite and PostgreSQL this is one multi-row upsert per
+    ROWS_PER_UPSERT users; other dialects fall back to a row at a time.
+    """
+    rows = [{"user_id": user_id, "unread_count": delta} for user_id, delta in deltas.items() if delta]
+    if not rows:
+        return
+    table = NotificationCounter.__table__
+    now = utc_now()
+    insert = _dialect_insert(connection.dialect.name)
+    if insert is not None:
+        for start in range(0, len(rows), ROWS_PER_UPSERT):
+            chunk = rows[start : start + ROWS_PER_UPSERT]
+            statement = insert(table).values([{**row, "updated_at": now} for row in chunk])
+            connection.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[table.c.user_id],
+                    set_={"unread_count": table.c.unread_count + statement.excluded.unread_count, "updated_at": now},
+                )
+            )
+        return
+
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(table.c.user_id == row["user_id"])
+            .values(unread_count=table.c.unread_count + row["unread_count"], updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row, updated_at=now))
@@ -0,0 +1,34 @@
+"""
+Model for notifications waiting to be fanned out to their recipients.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Integer, String, Text
+
+from app.core.database import Base
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class NotificationOutbox(Base):
+    """
+    One pending notification job, written in the transaction of the change
+    that triggers it. The dispatcher (app.services.notification_dispatcher)
+    resolves recipients and thresholds, inserts the notifications and deletes
+    the row. A row that fails is retried after a growing delay
+    (next_attempt_at); one that fails NOTIFICATION_OUTBOX_MAX_ATTEMPTS times is
+    kept with dead_at set and is no longer retried or counted as pending.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    # JSON keyword arguments for the kind's delivery function.
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, nullable=True)
+    dead_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=utc_now, nullable=False)
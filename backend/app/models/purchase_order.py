@@ -17,6 +17,7 @@ def utc_now():
 class PurchaseOrderStatus(str, enum.Enum):
     DRAFT = "draft"
     SENT = "sent"
+    PARTIALLY_RECEIVED = "partially_received"
     RECEIVED = "received"
     CANCELLED = "cancelled"
 
@@ -57,6 +58,7 @@ class PurchaseOrderItem(Base):
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
 
     quantity = Column(Integer, nullable=False)
+    quantity_received = Column(Integer, nullable=False, default=0, server_default="0")
     unit_cost = Column(Float, nullable=False)
     unit_price = Column(Float, nullable=True)
     line_total = Column(Float, nullable=False, default=0.0)
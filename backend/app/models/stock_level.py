@@ -0,0 +1,90 @@
+"""
+Model for per-store stock-on-hand aggregates.
+"""
+from collections.abc import Mapping
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, update
+from sqlalchemy.engine import Connection
+
+from app.core.database import Base
+
+
+# Keys per multi-row upsert; four bound parameters each.
+ROWS_PER_UPSERT = 500
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+class StockLevel(Base):
+    """
+    Units in stock for one product in one store: the sum of quantity_in_stock
+    over its inventory rows. Inventory inserts, updates and deletes adjust it
+    in the same flush (see the listeners in app.models.inventory), so bulk
+    Core statements against the inventory table must adjust it themselves.
+    """
+    __tablename__ = "stock_levels"
+
+    store_id = Column(Integer, ForeignKey("stores.id"), primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True, index=True)
+    quantity_in_stock = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=utc_now, onupdate=utc_now, nullable=False)
+
+
+def _dialect_insert(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def adjust_stock_level(connection: Connection, store_id: int, product_id: int, delta: int) -> None:
+    """Add delta units to a store/product aggregate, creating the row on first use."""
+    adjust_stock_levels(connection, {(store_id, product_id): delta})
+
+
+def adjust_stock_levels(connection: Connection, deltas: Mapping[tuple[int, int], int]) -> None:
+    """
+    Apply many (store_id, product_id) -> delta adjustments at once.
+
+    On SQLite and PostgreSQL this is one multi-row upsert per
+    ROWS_PER_UPSERT keys; other dialects fall back to a row at a time.
+    """
+    rows = [
+        {"store_id": store_id, "product_id": product_id, "quantity_in_stock": delta}
+        for (store_id, product_id), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+    table = StockLevel.__table__
+    now = utc_now()
+    insert = _dialect_insert(connection.dialect.name)
+    if insert is not None:
+        for start in range(0, len(rows), ROWS_PER_UPSERT):
+            chunk = rows[start : start + ROWS_PER_UPSERT]
+            statement = insert(table).values([{**row, "updated_at": now} for row in chunk])
+            connection.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[table.c.store_id, table.c.product_id],
+                    set_={
+                        "quantity_in_stock": table.c.quantity_in_stock + statement.excluded.quantity_in_stock,
+                        "updated_at": now,
+                    },
+                )
+            )
+        return
+
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(table.c.store_id == row["store_id"], table.c.product_id == row["product_id"])
+            .values(quantity_in_stock=table.c.quantity_in_stock + row["quantity_in_stock"], updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row, updated_at=now))
@@ -15,6 +15,13 @@ class UserRole(str, enum.Enum):
     CLERK = "clerk"           # Data entry clerk
 
 
+class DepletionStrategyName(str, enum.Enum):
+    """Order in which stock is consumed from inventory batches"""
+    FIFO = "fifo"                  # Oldest batch first
+    LIFO = "lifo"                  # Newest batch first
+    HIGHEST_COST = "highest_cost"  # Most expensive batch first
+
+
 def utc_now():
     return datetime.now(timezone.utc)
 
@@ -45,6 +52,12 @@ class User(Base):
     
     # Store admin can be assigned to multiple stores
     store_id = Column(Integer, nullable=True)
+
+    # Merchant setting for their stores' sales and transfers; null uses the configured default
+    depletion_strategy = Column(String(20), nullable=True)
+    # Merchant's low-stock threshold version; bumped on every threshold change so each
+    # worker's threshold cache (app.services.threshold_cache) knows to reload
+    threshold_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relationships
     inventory = relationship("Inventory", back_populates="created_by_user")
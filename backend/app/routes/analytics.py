@@ -6,10 +6,10 @@ from io import StringIO
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Response
-from sqlalchemy import case, func
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.read_database import get_read_db
 from app.core.dependencies import check_permission
 from app.models.expense import Expense
 from app.models.inventory import Inventory
@@ -35,11 +35,11 @@ def _sum_or_zero(value) -> float:
 @router.get("/store-performance", response_model=List[StorePerformanceItem])
 async def store_performance(
     current_user=Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     limit: int = 10,
 ):
     query = (
-        db.query(
+        select(
             Store.id,
             Store.name,
             func.sum(Sale.total_price).label("total_sales"),
@@ -51,12 +51,11 @@ async def store_performance(
         .order_by(func.sum(Sale.total_price).desc())
     )
     if current_user.role == "admin" and current_user.store_id is not None:
-        query = query.filter(Store.id == current_user.store_id)
+        query = query.where(Store.id == current_user.store_id)
     if current_user.role == "superuser":
-        query = query.filter(Store.merchant_id == current_user.id)
+        query = query.where(Store.merchant_id == current_user.id)
 
-    query = query.limit(limit)
-    rows = query.all()
+    rows = (await db.execute(query.limit(limit))).all()
     return [
         StorePerformanceItem(
             store_id=row.id,
@@ -72,11 +71,11 @@ async def store_performance(
 @router.get("/top-products", response_model=List[ProductPerformanceItem])
 async def top_products(
     current_user=Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     limit: int = 10,
 ):
     query = (
-        db.query(
+        select(
             Product.id,
             Product.name,
             func.sum(Sale.quantity).label("quantity_sold"),
@@ -88,12 +87,11 @@ async def top_products(
         .order_by(func.sum(Sale.total_price).desc())
     )
     if current_user.role == "admin" and current_user.store_id is not None:
-        query = query.filter(Sale.store_id == current_user.store_id)
+        query = query.where(Sale.store_id == current_user.store_id)
     if current_user.role == "superuser":
-        query = query.join(Store, Store.id == Sale.store_id).filter(Store.merchant_id == current_user.id)
+        query = query.join(Store, Store.id == Sale.store_id).where(Store.merchant_id == current_user.id)
 
-    query = query.limit(limit)
-    rows = query.all()
+    rows = (await db.execute(query.limit(limit))).all()
     return [
         ProductPerformanceItem(
             product_id=row.id,
@@ -109,11 +107,11 @@ async def top_products(
 @router.get("/slow-movers", response_model=List[ProductPerformanceItem])
 async def slow_movers(
     current_user=Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     limit: int = 10,
 ):
     query = (
-        db.query(
+        select(
             Product.id,
             Product.name,
             func.sum(Sale.quantity).label("quantity_sold"),
@@ -125,12 +123,11 @@ async def slow_movers(
         .order_by(func.sum(Sale.quantity).asc())
     )
     if current_user.role == "admin" and current_user.store_id is not None:
-        query = query.filter(Sale.store_id == current_user.store_id)
+        query = query.where(Sale.store_id == current_user.store_id)
     if current_user.role == "superuser":
-        query = query.join(Store, Store.id == Sale.store_id).filter(Store.merchant_id == current_user.id)
+        query = query.join(Store, Store.id == Sale.store_id).where(Store.merchant_id == current_user.id)
 
-    query = query.limit(limit)
-    rows = query.all()
+    rows = (await db.execute(query.limit(limit))).all()
     return [
         ProductPerformanceItem(
             product_id=row.id,
@@ -146,11 +143,11 @@ async def slow_movers(
 @router.get("/payment-trend", response_model=List[PaymentTrendPoint])
 async def payment_trend(
     current_user=Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     days: int = Query(30, ge=1, le=365),
 ):
     date_col = func.date(Inventory.created_at)
-    query = db.query(
+    query = select(
         date_col.label("date"),
         func.sum(
             case(
@@ -166,11 +163,11 @@ async def payment_trend(
         ).label("unpaid_total"),
     )
     if current_user.role == "admin" and current_user.store_id is not None:
-        query = query.filter(Inventory.store_id == current_user.store_id)
+        query = query.where(Inventory.store_id == current_user.store_id)
     if current_user.role == "superuser":
-        query = query.join(Store, Store.id == Inventory.store_id).filter(Store.merchant_id == current_user.id)
+        query = query.join(Store, Store.id == Inventory.store_id).where(Store.merchant_id == current_user.id)
 
-    rows = query.group_by(date_col).order_by(date_col.desc()).limit(days).all()
+    rows = (await db.execute(query.group_by(date_col).order_by(date_col.desc()).limit(days))).all()
     return [
         PaymentTrendPoint(
             date=row.date,
@@ -184,23 +181,23 @@ async def payment_trend(
 @router.get("/financial-summary", response_model=FinancialSummaryResponse)
 async def financial_summary(
     current_user=Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    sales_query = db.query(func.sum(Sale.total_price), func.sum(Sale.total_cost))
-    expense_query = db.query(func.sum(Expense.amount))
+    sales_query = select(func.sum(Sale.total_price), func.sum(Sale.total_cost))
+    expense_query = select(func.sum(Expense.amount))
     if current_user.role == "admin" and current_user.store_id is not None:
-        sales_query = sales_query.filter(Sale.store_id == current_user.store_id)
-        expense_query = expense_query.filter(Expense.store_id == current_user.store_id)
+        sales_query = sales_query.where(Sale.store_id == current_user.store_id)
+        expense_query = expense_query.where(Expense.store_id == current_user.store_id)
     if current_user.role == "superuser":
-        sales_query = sales_query.join(Store, Store.id == Sale.store_id).filter(
+        sales_query = sales_query.join(Store, Store.id == Sale.store_id).where(
             Store.merchant_id == current_user.id
         )
-        expense_query = expense_query.join(Store, Store.id == Expense.store_id).filter(
+        expense_query = expense_query.join(Store, Store.id == Expense.store_id).where(
             Store.merchant_id == current_user.id
         )
 
-    total_sales, total_cost = sales_query.first()
-    total_expenses = expense_query.scalar()
+    total_sales, total_cost = (await db.execute(sales_query)).one()
+    total_expenses = await db.scalar(expense_query)
     total_sales = _sum_or_zero(total_sales)
     total_cost = _sum_or_zero(total_cost)
     total_expenses = _sum_or_zero(total_expenses)
@@ -220,35 +217,35 @@ async def financial_summary(
 @router.get("/expenses-by-category", response_model=List[ExpenseCategoryItem])
 async def expenses_by_category(
     current_user=Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(Expense.category, func.sum(Expense.amount).label("total_amount")).group_by(Expense.category)
+    query = select(Expense.category, func.sum(Expense.amount).label("total_amount")).group_by(Expense.category)
     if current_user.role == "admin" and current_user.store_id is not None:
-        query = query.filter(Expense.store_id == current_user.store_id)
+        query = query.where(Expense.store_id == current_user.store_id)
     if current_user.role == "superuser":
-        query = query.join(Store, Store.id == Expense.store_id).filter(Store.merchant_id == current_user.id)
+        query = query.join(Store, Store.id == Expense.store_id).where(Store.merchant_id == current_user.id)
 
-    rows = query.order_by(func.sum(Expense.amount).desc()).all()
+    rows = (await db.execute(query.order_by(func.sum(Expense.amount).desc()))).all()
     return [ExpenseCategoryItem(category=row.category, total_amount=_sum_or_zero(row.total_amount)) for row in rows]
 
 
 @router.get("/sales-trend", response_model=List[SalesTrendPoint])
 async def sales_trend(
     current_user=Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     days: int = Query(30, ge=1, le=365),
 ):
     date_col = func.date(Sale.created_at)
-    query = db.query(
+    query = select(
         date_col.label("date"),
         func.sum(Sale.total_price).label("total_sales"),
         func.sum(Sale.total_price - Sale.total_cost).label("total_profit"),
     )
     if current_user.role == "admin" and current_user.store_id is not None:
-        query = query.filter(Sale.store_id == current_user.store_id)
+        query = query.where(Sale.store_id == current_user.store_id)
     if current_user.role == "superuser":
-        query = query.join(Store, Store.id == Sale.store_id).filter(Store.merchant_id == current_user.id)
-    rows = query.group_by(date_col).order_by(date_col.desc()).limit(days).all()
+        query = query.join(Store, Store.id == Sale.store_id).where(Store.merchant_id == current_user.id)
+    rows = (await db.execute(query.group_by(date_col).order_by(date_col.desc()).limit(days))).all()
     return [
         SalesTrendPoint(
             date=row.date,
@@ -274,7 +271,7 @@ def _csv_response(filename: str, headers: list[str], rows: list[list]) -> Respon
 @router.get("/store-performance/export")
 async def export_store_performance(
     current_user=Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     limit: int = 100,
 ):
     items = await store_performance(current_user=current_user, db=db, limit=limit)
@@ -285,7 +282,7 @@ async def export_store_performance(
 @router.get("/top-products/export")
 async def export_top_products(
     current_user=Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     limit: int = 100,
 ):
     items = await top_products(current_user=current_user, db=db, limit=limit)
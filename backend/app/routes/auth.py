@@ -5,11 +5,14 @@ import logging
 import time
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.config import settings
 from app.core.dependencies import get_current_user
+from app.core.principal_cache import principal_cache
 from app.core.security import (
     create_access_token,
     create_refresh_token,
@@ -32,6 +35,7 @@ from app.schemas.user import (
     UserResponse,
 )
 from app.services.email_service import build_password_reset_link, send_password_reset_email
+from app.services.recipient_cache import recipient_cache
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 logger = logging.getLogger(__name__)
@@ -43,14 +47,14 @@ FAILED_LOGIN_ATTEMPTS = defaultdict(list)
 LOCKED_UNTIL = {}
 
 
-def _cleanup_expired_refresh_tokens(db: Session) -> None:
+async def _cleanup_expired_refresh_tokens(db: AsyncSession) -> None:
     now_utc_naive = datetime.now(timezone.utc).replace(tzinfo=None)
-    db.query(RefreshToken).filter(RefreshToken.expires_at < now_utc_naive).delete()
-    db.commit()
+    await db.execute(delete(RefreshToken).where(RefreshToken.expires_at < now_utc_naive))
+    await db.commit()
 
 
-def _store_refresh_token(db: Session, refresh_token: str, user_id: int) -> None:
-    _cleanup_expired_refresh_tokens(db)
+async def _store_refresh_token(db: AsyncSession, refresh_token: str, user_id: int) -> None:
+    await _cleanup_expired_refresh_tokens(db)
     payload = verify_token(refresh_token, expected_type="refresh")
     exp = payload.get("exp")
     jti = payload.get("jti")
@@ -66,13 +70,13 @@ def _store_refresh_token(db: Session, refresh_token: str, user_id: int) -> None:
             revoked=False,
         )
     )
-    db.commit()
+    await db.commit()
 
 
-def _issue_token_response(db: Session, user: User) -> TokenResponse:
+async def _issue_token_response(db: AsyncSession, user: User) -> TokenResponse:
     access_token = create_access_token(data={"sub": user.id})
     refresh_token = create_refresh_token(data={"sub": user.id})
-    _store_refresh_token(db, refresh_token, user.id)
+    await _store_refresh_token(db, refresh_token, user.id)
     return TokenResponse(
         access_token=access_token,
         refresh_token=refresh_token,
@@ -81,9 +85,9 @@ def _issue_token_response(db: Session, user: User) -> TokenResponse:
 
 
 @router.post("/register", response_model=TokenResponse)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Self registration endpoint (creates merchant account)."""
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
@@ -91,20 +95,20 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         email=user_data.email,
         first_name=user_data.first_name,
         last_name=user_data.last_name,
-        hashed_password=hash_password(user_data.password),
+        hashed_password=await run_in_threadpool(hash_password, user_data.password),
         phone=user_data.phone,
         role="superuser",
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return _issue_token_response(db, new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    return await _issue_token_response(db, new_user)
 
 
 @router.post("/admin-invite/register", response_model=TokenResponse)
 async def register_admin_from_invite(
     payload: AdminInviteRegisterRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Complete admin account registration from invite token."""
     decoded = verify_token(payload.invite_token, expected_type="invite")
@@ -114,12 +118,12 @@ async def register_admin_from_invite(
     if invited_role != "admin" or not invited_email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid invite token")
 
-    existing_user = db.query(User).filter(User.email == invited_email).first()
+    existing_user = await db.scalar(select(User).where(User.email == invited_email))
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
     if decoded.get("store_id"):
-        store = db.query(Store).filter(Store.id == decoded.get("store_id")).first()
+        store = await db.get(Store, decoded.get("store_id"))
         if not store or store.merchant_id != decoded.get("sub"):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid invite store")
 
@@ -127,22 +131,23 @@ async def register_admin_from_invite(
         email=invited_email,
         first_name=payload.first_name,
         last_name=payload.last_name,
-        hashed_password=hash_password(payload.password),
+        hashed_password=await run_in_threadpool(hash_password, payload.password),
         phone=payload.phone,
         role="admin",
         store_id=decoded.get("store_id"),
         is_active=True,
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    recipient_cache.invalidate_user(new_user.role, new_user.store_id)
+    await db.refresh(new_user)
 
     logger.info("Admin registered from invite user_id=%s email=%s", new_user.id, new_user.email)
-    return _issue_token_response(db, new_user)
+    return await _issue_token_response(db, new_user)
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(credentials: LoginRequest, db: Session = Depends(get_db)):
+async def login(credentials: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """Login with email and password."""
     now = time.time()
     locked_until = LOCKED_UNTIL.get(credentials.email, 0)
@@ -157,8 +162,9 @@ async def login(credentials: LoginRequest, db: Session = Depends(get_db)):
         ts for ts in FAILED_LOGIN_ATTEMPTS[credentials.email] if now - ts <= LOGIN_WINDOW_SECONDS
     ]
 
-    user = db.query(User).filter(User.email == credentials.email).first()
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == credentials.email))
+    # bcrypt is CPU-bound; keep it off the event loop.
+    if not user or not await run_in_threadpool(verify_password, credentials.password, user.hashed_password):
         FAILED_LOGIN_ATTEMPTS[credentials.email].append(now)
         if len(FAILED_LOGIN_ATTEMPTS[credentials.email]) >= MAX_LOGIN_ATTEMPTS:
             LOCKED_UNTIL[credentials.email] = now + LOGIN_LOCK_SECONDS
@@ -171,13 +177,13 @@ async def login(credentials: LoginRequest, db: Session = Depends(get_db)):
     FAILED_LOGIN_ATTEMPTS.pop(credentials.email, None)
     LOCKED_UNTIL.pop(credentials.email, None)
     logger.info("Successful login user_id=%s role=%s", user.id, user.role)
-    return _issue_token_response(db, user)
+    return await _issue_token_response(db, user)
 
 
 @router.post("/forgot-password")
-async def forgot_password(payload: ForgotPasswordRequest, db: Session = Depends(get_db)):
+async def forgot_password(payload: ForgotPasswordRequest, db: AsyncSession = Depends(get_async_db)):
     """Request a password reset link."""
-    user = db.query(User).filter(User.email == payload.email).first()
+    user = await db.scalar(select(User).where(User.email == payload.email))
     if user and user.is_active:
         token = create_password_reset_token({"sub": user.id, "email": user.email})
         reset_link = build_password_reset_link(token, settings.reset_token_expire_hours)
@@ -186,18 +192,19 @@ async def forgot_password(payload: ForgotPasswordRequest, db: Session = Depends(
 
 
 @router.post("/reset-password")
-async def reset_password(payload: ResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password(payload: ResetPasswordRequest, db: AsyncSession = Depends(get_async_db)):
     """Reset password using a valid reset token."""
     decoded = verify_token(payload.token, expected_type="password_reset")
     user_id = decoded.get("sub")
     email = decoded.get("email")
-    user = db.query(User).filter(User.id == user_id, User.email == email).first()
+    user = await db.scalar(select(User).where(User.id == user_id, User.email == email))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User account is deactivated")
-    user.hashed_password = hash_password(payload.new_password)
-    db.commit()
+    user.hashed_password = await run_in_threadpool(hash_password, payload.new_password)
+    await db.commit()
+    principal_cache.invalidate(user.id)
     return {"message": "Password reset successfully"}
 
 
@@ -207,19 +214,17 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_access_token(payload: RefreshTokenRequest, db: Session = Depends(get_db)):
+async def refresh_access_token(payload: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)):
     decoded = verify_token(payload.refresh_token, expected_type="refresh")
     token_jti = decoded.get("jti")
     user_id = decoded.get("sub")
 
-    stored_token = (
-        db.query(RefreshToken)
-        .filter(
+    stored_token = await db.scalar(
+        select(RefreshToken).where(
             RefreshToken.token_jti == token_jti,
             RefreshToken.user_id == user_id,
             RefreshToken.revoked.is_(False),
         )
-        .first()
     )
 
     now_utc_naive = datetime.now(timezone.utc).replace(tzinfo=None)
@@ -227,28 +232,26 @@ async def refresh_access_token(payload: RefreshTokenRequest, db: Session = Depen
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token is invalid or revoked")
 
     stored_token.revoked = True
-    user = db.query(User).filter(User.id == user_id, User.is_active.is_(True)).first()
+    user = await db.scalar(select(User).where(User.id == user_id, User.is_active.is_(True)))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
 
-    db.commit()
+    await db.commit()
     logger.info("Refresh token rotated user_id=%s", user_id)
-    return _issue_token_response(db, user)
+    return await _issue_token_response(db, user)
 
 
 @router.post("/logout")
-async def logout(payload: RefreshTokenRequest, db: Session = Depends(get_db)):
+async def logout(payload: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)):
     decoded = verify_token(payload.refresh_token, expected_type="refresh")
     token_jti = decoded.get("jti")
 
-    stored_token = (
-        db.query(RefreshToken)
-        .filter(RefreshToken.token_jti == token_jti, RefreshToken.revoked.is_(False))
-        .first()
+    stored_token = await db.scalar(
+        select(RefreshToken).where(RefreshToken.token_jti == token_jti, RefreshToken.revoked.is_(False))
     )
     if stored_token:
         stored_token.revoked = True
-        db.commit()
+        await db.commit()
         logger.info("Refresh token revoked token_jti=%s", token_jti)
 
     return {"message": "Logged out successfully"}
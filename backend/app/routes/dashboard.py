@@ -1,9 +1,10 @@
 """Dashboard reporting endpoints for admin, clerk, and merchant views."""
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import case, distinct, func
-from sqlalchemy.orm import Session
+from sqlalchemy import case, distinct, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
 
-from app.core.database import get_db
+from app.core.read_database import get_read_db
 from app.core.dependencies import check_permission, get_current_user
 from app.models.inventory import Inventory
 from app.models.product import Product
@@ -39,14 +40,20 @@ def _sum_or_zero(value) -> float:
     return 0.0 if value is None else float(value)
 
 
-def _get_clerk_inventory(current_user: User, db: Session):
+async def _count(db: AsyncSession, model, *filters) -> int:
+    return await db.scalar(select(func.count(model.id)).where(*filters)) or 0
+
+
+async def _get_clerk_inventory(current_user: User, db: AsyncSession):
     records = (
-        db.query(Inventory)
-        .join(Product, Product.id == Inventory.product_id)
-        .filter(Inventory.created_by == current_user.id)
-        .order_by(Inventory.created_at.desc())
-        .all()
-    )
+        await db.scalars(
+            select(Inventory)
+            .join(Product, Product.id == Inventory.product_id)
+            .options(contains_eager(Inventory.product))
+            .where(Inventory.created_by == current_user.id)
+            .order_by(Inventory.created_at.desc())
+        )
+    ).all()
 
     total_products = len({record.product_id for record in records})
     total_stock = sum(record.quantity_in_stock for record in records)
@@ -77,44 +84,52 @@ def _get_clerk_inventory(current_user: User, db: Session):
 @router.get("/admin/dashboard", response_model=AdminDashboardResponse)
 async def admin_dashboard(
     current_user: User = Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    inventory_query = db.query(Inventory)
-    request_query = db.query(SupplyRequest)
-    clerk_query = db.query(User).filter(User.role == "clerk")
+    inventory_filters = []
+    request_filters = []
+    clerk_filters = [User.role == "clerk"]
 
     if current_user.store_id:
-        inventory_query = inventory_query.filter(Inventory.store_id == current_user.store_id)
-        request_query = request_query.filter(SupplyRequest.store_id == current_user.store_id)
-        clerk_query = clerk_query.filter(User.store_id == current_user.store_id)
+        inventory_filters.append(Inventory.store_id == current_user.store_id)
+        request_filters.append(SupplyRequest.store_id == current_user.store_id)
+        clerk_filters.append(User.store_id == current_user.store_id)
     elif current_user.role == "superuser":
-        store_ids = [
-            row.id
-            for row in db.query(Store.id).filter(Store.merchant_id == current_user.id).all()
-        ]
+        store_ids = (
+            await db.scalars(select(Store.id).where(Store.merchant_id == current_user.id))
+        ).all()
         if store_ids:
-            inventory_query = inventory_query.filter(Inventory.store_id.in_(store_ids))
-            request_query = request_query.filter(SupplyRequest.store_id.in_(store_ids))
-            clerk_query = clerk_query.filter(User.store_id.in_(store_ids))
-
-    active_clerks = clerk_query.filter(User.is_active.is_(True)).count()
-    pending_requests = request_query.filter(SupplyRequest.status == "pending").count()
-    unpaid_products = (
-        inventory_query.filter(Inventory.payment_status == "unpaid")
-        .with_entities(distinct(Inventory.product_id))
-        .count()
+            inventory_filters.append(Inventory.store_id.in_(store_ids))
+            request_filters.append(SupplyRequest.store_id.in_(store_ids))
+            clerk_filters.append(User.store_id.in_(store_ids))
+
+    active_clerks = await _count(db, User, *clerk_filters, User.is_active.is_(True))
+    pending_requests = await _count(db, SupplyRequest, *request_filters, SupplyRequest.status == "pending")
+    unpaid_products = await db.scalar(
+        select(func.count(distinct(Inventory.product_id))).where(
+            *inventory_filters, Inventory.payment_status == "unpaid"
+        )
     )
     store_value = _sum_or_zero(
-        inventory_query.with_entities(func.sum(Inventory.quantity_in_stock * Inventory.selling_price)).scalar()
+        await db.scalar(
+            select(func.sum(Inventory.quantity_in_stock * Inventory.selling_price)).where(*inventory_filters)
+        )
     )
 
     raw_requests = (
-        request_query.join(Product, Product.id == SupplyRequest.product_id)
-        .join(User, User.id == SupplyRequest.requested_by)
-        .order_by(SupplyRequest.created_at.desc())
-        .limit(40)
-        .all()
-    )
+        await db.scalars(
+            select(SupplyRequest)
+            .join(Product, Product.id == SupplyRequest.product_id)
+            .join(User, User.id == SupplyRequest.requested_by)
+            .options(
+                contains_eager(SupplyRequest.product),
+                contains_eager(SupplyRequest.requested_by_user),
+            )
+            .where(*request_filters)
+            .order_by(SupplyRequest.created_at.desc())
+            .limit(40)
+        )
+    ).all()
     supply_requests = [
         AdminSupplyRequestItem(
             id=item.id,
@@ -129,11 +144,15 @@ async def admin_dashboard(
     ]
 
     raw_inventory = (
-        inventory_query.join(Product, Product.id == Inventory.product_id)
-        .order_by(Inventory.updated_at.desc())
-        .limit(80)
-        .all()
-    )
+        await db.scalars(
+            select(Inventory)
+            .join(Product, Product.id == Inventory.product_id)
+            .options(contains_eager(Inventory.product))
+            .where(*inventory_filters)
+            .order_by(Inventory.updated_at.desc())
+            .limit(80)
+        )
+    ).all()
     payment_status = [
         AdminPaymentStatusItem(
             inventory_id=item.id,
@@ -145,7 +164,9 @@ async def admin_dashboard(
         for item in raw_inventory
     ]
 
-    clerks_raw = clerk_query.order_by(User.created_at.desc()).limit(80).all()
+    clerks_raw = (
+        await db.scalars(select(User).where(*clerk_filters).order_by(User.created_at.desc()).limit(80))
+    ).all()
     clerks = [
         ClerkListItem(
             id=clerk.id,
@@ -158,15 +179,17 @@ async def admin_dashboard(
     ]
 
     performance_rows = (
-        inventory_query.with_entities(
-            Inventory.created_by,
-            func.count(Inventory.id),
-            func.sum(Inventory.quantity_in_stock),
-            func.sum(Inventory.quantity_spoilt),
+        await db.execute(
+            select(
+                Inventory.created_by,
+                func.count(Inventory.id),
+                func.sum(Inventory.quantity_in_stock),
+                func.sum(Inventory.quantity_spoilt),
+            )
+            .where(*inventory_filters)
+            .group_by(Inventory.created_by)
         )
-        .group_by(Inventory.created_by)
-        .all()
-    )
+    ).all()
     metrics_by_clerk = {
         row[0]: {
             "recorded_items": int(row[1] or 0),
@@ -205,11 +228,11 @@ async def admin_dashboard(
 @router.get("/clerk/dashboard", response_model=ClerkDashboardResponse)
 async def clerk_dashboard(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     if current_user.role != "clerk":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only clerks can access clerk dashboard")
-    stats, products = _get_clerk_inventory(current_user, db)
+    stats, products = await _get_clerk_inventory(current_user, db)
     return ClerkDashboardResponse(stats=stats, products=products)
 
 
@@ -217,12 +240,12 @@ async def clerk_dashboard(
 async def clerk_overview(
     lite: bool = False,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     if current_user.role != "clerk":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only clerks can access clerk dashboard")
 
-    stats, inventory = _get_clerk_inventory(current_user, db)
+    stats, inventory = await _get_clerk_inventory(current_user, db)
 
     if lite:
         return ClerkOverviewResponse(
@@ -233,32 +256,28 @@ async def clerk_overview(
             supply_requests=[],
         )
 
-    store = db.query(Store).filter(Store.id == current_user.store_id).first()
+    store = await db.get(Store, current_user.store_id) if current_user.store_id is not None else None
     if store:
         products = (
-            db.query(Product)
-            .filter(Product.is_active.is_(True), Product.merchant_id == store.merchant_id)
-            .order_by(Product.name.asc())
-            .limit(200)
-            .all()
-        )
-        stores = (
-            db.query(Store)
-            .filter(Store.is_active.is_(True), Store.id == store.id)
-            .order_by(Store.created_at.desc())
-            .limit(1)
-            .all()
-        )
+            await db.scalars(
+                select(Product)
+                .where(Product.is_active.is_(True), Product.merchant_id == store.merchant_id)
+                .order_by(Product.name.asc())
+                .limit(200)
+            )
+        ).all()
+        stores = [store] if store.is_active else []
     else:
         products = []
         stores = []
     requests = (
-        db.query(SupplyRequest)
-        .filter(SupplyRequest.requested_by == current_user.id)
-        .order_by(SupplyRequest.created_at.desc())
-        .limit(100)
-        .all()
-    )
+        await db.scalars(
+            select(SupplyRequest)
+            .where(SupplyRequest.requested_by == current_user.id)
+            .order_by(SupplyRequest.created_at.desc())
+            .limit(100)
+        )
+    ).all()
 
     return ClerkOverviewResponse(
         stats=stats,
@@ -272,76 +291,75 @@ async def clerk_overview(
 @router.get("/merchant/dashboard", response_model=MerchantDashboardResponse)
 async def merchant_dashboard(
     current_user: User = Depends(check_permission("superuser")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    store_ids = [
-        row.id
-        for row in db.query(Store.id).filter(Store.merchant_id == current_user.id).all()
-    ]
-    active_stores = db.query(Store).filter(
-        Store.is_active.is_(True), Store.merchant_id == current_user.id
-    ).count()
+    store_ids = (
+        await db.scalars(select(Store.id).where(Store.merchant_id == current_user.id))
+    ).all()
+    active_stores = await _count(db, Store, Store.is_active.is_(True), Store.merchant_id == current_user.id)
     active_admins = (
-        db.query(User)
-        .filter(User.role == "admin", User.is_active.is_(True), User.store_id.in_(store_ids))
-        .count()
+        await _count(db, User, User.role == "admin", User.is_active.is_(True), User.store_id.in_(store_ids))
         if store_ids
         else 0
     )
-    total_products = db.query(Product).filter(
-        Product.is_active.is_(True), Product.merchant_id == current_user.id
-    ).count()
+    total_products = await _count(
+        db, Product, Product.is_active.is_(True), Product.merchant_id == current_user.id
+    )
     estimated_revenue = _sum_or_zero(
-        db.query(func.sum(Inventory.quantity_in_stock * Inventory.selling_price))
-        .join(Store, Store.id == Inventory.store_id)
-        .filter(Store.merchant_id == current_user.id)
-        .scalar()
+        await db.scalar(
+            select(func.sum(Inventory.quantity_in_stock * Inventory.selling_price))
+            .join(Store, Store.id == Inventory.store_id)
+            .where(Store.merchant_id == current_user.id)
+        )
     )
 
     performance_rows = (
-        db.query(
-            Product.name.label("product"),
-            func.sum(Inventory.quantity_in_stock * Inventory.selling_price).label("sales"),
-            func.sum((Inventory.selling_price - Inventory.buying_price) * Inventory.quantity_in_stock).label("profit"),
+        await db.execute(
+            select(
+                Product.name.label("product"),
+                func.sum(Inventory.quantity_in_stock * Inventory.selling_price).label("sales"),
+                func.sum((Inventory.selling_price - Inventory.buying_price) * Inventory.quantity_in_stock).label("profit"),
+            )
+            .join(Inventory, Inventory.product_id == Product.id)
+            .join(Store, Store.id == Inventory.store_id)
+            .where(Store.merchant_id == current_user.id)
+            .group_by(Product.id)
+            .order_by(func.sum(Inventory.quantity_in_stock * Inventory.selling_price).desc())
+            .limit(12)
         )
-        .join(Inventory, Inventory.product_id == Product.id)
-        .join(Store, Store.id == Inventory.store_id)
-        .filter(Store.merchant_id == current_user.id)
-        .group_by(Product.id)
-        .order_by(func.sum(Inventory.quantity_in_stock * Inventory.selling_price).desc())
-        .limit(12)
-        .all()
-    )
+    ).all()
     performance = [
         MerchantPerformanceItem(product=row.product, sales=_sum_or_zero(row.sales), profit=_sum_or_zero(row.profit))
         for row in performance_rows
     ]
 
     paid_amount = _sum_or_zero(
-        db.query(
-            func.sum(
-                case(
-                    (Inventory.payment_status == "paid", Inventory.buying_price * Inventory.quantity_in_stock),
-                    else_=0,
+        await db.scalar(
+            select(
+                func.sum(
+                    case(
+                        (Inventory.payment_status == "paid", Inventory.buying_price * Inventory.quantity_in_stock),
+                        else_=0,
+                    )
                 )
             )
+            .join(Store, Store.id == Inventory.store_id)
+            .where(Store.merchant_id == current_user.id)
         )
-        .join(Store, Store.id == Inventory.store_id)
-        .filter(Store.merchant_id == current_user.id)
-        .scalar()
     )
     unpaid_amount = _sum_or_zero(
-        db.query(
-            func.sum(
-                case(
-                    (Inventory.payment_status == "unpaid", Inventory.buying_price * Inventory.quantity_in_stock),
-                    else_=0,
+        await db.scalar(
+            select(
+                func.sum(
+                    case(
+                        (Inventory.payment_status == "unpaid", Inventory.buying_price * Inventory.quantity_in_stock),
+                        else_=0,
+                    )
                 )
             )
+            .join(Store, Store.id == Inventory.store_id)
+            .where(Store.merchant_id == current_user.id)
         )
-        .join(Store, Store.id == Inventory.store_id)
-        .filter(Store.merchant_id == current_user.id)
-        .scalar()
     )
 
     total_payment = paid_amount + unpaid_amount
@@ -349,37 +367,41 @@ async def merchant_dashboard(
     unpaid_percentage = (unpaid_amount / total_payment * 100.0) if total_payment else 0.0
 
     store_rows = (
-        db.query(
-            Store.id,
-            Store.name,
-            Store.location,
-            Store.is_active,
-            func.sum(Inventory.quantity_in_stock * Inventory.selling_price).label("sales_total"),
-            func.sum(
-                case(
-                    (Inventory.payment_status == "paid", Inventory.buying_price * Inventory.quantity_in_stock),
-                    else_=0,
-                )
-            ).label("paid_total"),
-            func.sum(
-                case(
-                    (Inventory.payment_status == "unpaid", Inventory.buying_price * Inventory.quantity_in_stock),
-                    else_=0,
-                )
-            ).label("unpaid_total"),
+        await db.execute(
+            select(
+                Store.id,
+                Store.name,
+                Store.location,
+                Store.is_active,
+                func.sum(Inventory.quantity_in_stock * Inventory.selling_price).label("sales_total"),
+                func.sum(
+                    case(
+                        (Inventory.payment_status == "paid", Inventory.buying_price * Inventory.quantity_in_stock),
+                        else_=0,
+                    )
+                ).label("paid_total"),
+                func.sum(
+                    case(
+                        (Inventory.payment_status == "unpaid", Inventory.buying_price * Inventory.quantity_in_stock),
+                        else_=0,
+                    )
+                ).label("unpaid_total"),
+            )
+            .outerjoin(Inventory, Inventory.store_id == Store.id)
+            .where(Store.merchant_id == current_user.id)
+            .group_by(Store.id)
+            .order_by(Store.created_at.desc())
         )
-        .outerjoin(Inventory, Inventory.store_id == Store.id)
-        .filter(Store.merchant_id == current_user.id)
-        .group_by(Store.id)
-        .order_by(Store.created_at.desc())
-        .all()
-    )
+    ).all()
 
     admins = (
-        db.query(User)
-        .filter(User.role == "admin", User.store_id.in_(store_ids))
-        .order_by(User.created_at.desc())
-        .all()
+        (
+            await db.scalars(
+                select(User)
+                .where(User.role == "admin", User.store_id.in_(store_ids))
+                .order_by(User.created_at.desc())
+            )
+        ).all()
         if store_ids
         else []
     )
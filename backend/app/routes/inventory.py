@@ -1,39 +1,58 @@
 """Inventory management routes for recording stock."""
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db
 from app.core.dependencies import check_permission, enforce_store_scope, get_current_user
 from app.models.inventory import Inventory, PaymentStatus
 from app.models.inventory_event import InventoryEvent
 from app.models.product import Product
+from app.models.stock_level import StockLevel
 from app.models.store import Store
 from app.models.user import User
 from app.schemas.notifications import InventoryEventResponse
-from app.schemas.reports import InventoryCreate, InventoryResponse, InventoryUpdate
+from app.schemas.reports import (
+    InventoryCreate,
+    InventoryImportReport,
+    InventoryResponse,
+    InventoryUpdate,
+    StockLevelResponse,
+)
+from app.services.inventory_import_service import ImportState, import_inventory_chunk, iter_import_records
 from app.services.notification_service import (
     create_inventory_event,
     notify_low_stock_if_needed,
     notify_unpaid_inventory,
+    release_inventory_import_alerts,
 )
 
 router = APIRouter(prefix="/api/inventory", tags=["inventory"])
 
 
+async def _ensure_record_in_account(db: AsyncSession, current_user: User, record: Inventory) -> None:
+    if current_user.role != "superuser":
+        return
+    store = await db.get(Store, record.store_id)
+    if not store or store.merchant_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Record not in your account")
+
+
 @router.post("/", response_model=InventoryResponse, status_code=status.HTTP_201_CREATED)
 async def record_inventory(
     inventory_data: InventoryCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Record a new inventory entry."""
-    product = db.query(Product).filter(Product.id == inventory_data.product_id).first()
+    product = await db.get(Product, inventory_data.product_id)
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
-    store = db.query(Store).filter(Store.id == inventory_data.store_id).first()
+    store = await db.get(Store, inventory_data.store_id)
     if not store:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Store not found")
     if current_user.role == "superuser" and store.merchant_id != current_user.id:
@@ -58,9 +77,9 @@ async def record_inventory(
     )
 
     db.add(new_inventory)
-    db.flush()
-    create_inventory_event(
-        db,
+    await db.flush()
+    await db.run_sync(
+        create_inventory_event,
         inventory_id=new_inventory.id,
         product_id=new_inventory.product_id,
         store_id=new_inventory.store_id,
@@ -73,59 +92,145 @@ async def record_inventory(
         details=new_inventory.remarks,
     )
     if new_inventory.payment_status == PaymentStatus.UNPAID.value:
-        notify_unpaid_inventory(
-            db,
+        await db.run_sync(
+            notify_unpaid_inventory,
             store_id=new_inventory.store_id,
             product_id=new_inventory.product_id,
             quantity_in_stock=new_inventory.quantity_in_stock,
         )
-    notify_low_stock_if_needed(db, inventory=new_inventory)
-    db.commit()
-    db.refresh(new_inventory)
+    await db.run_sync(notify_low_stock_if_needed, inventory=new_inventory)
+    await db.commit()
+    await db.refresh(new_inventory)
     return InventoryResponse.model_validate(new_inventory)
 
 
+@router.post("/import", response_model=InventoryImportReport)
+async def import_inventory(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Bulk-record inventory from a CSV (text/csv, header row) or JSON-lines
+    (application/x-ndjson) body with the same fields as POST /.
+
+    The body is streamed and imported in chunks, each committed on its own;
+    rows that fail validation or scope checks are listed in the report and the
+    rest of the file is still imported. Unpaid and low-stock alerts are queued
+    with each chunk on one held outbox row and sent once per store when the
+    import ends, or after the hold lapses if the upload stops part-way.
+    """
+    state = ImportState()
+    rows_received = 0
+    chunk = []
+    records = iter_import_records(request.stream(), request.headers.get("content-type", ""))
+    async for record in records:
+        rows_received += 1
+        chunk.append(record)
+        if len(chunk) >= settings.inventory_import_chunk_size:
+            await db.run_sync(import_inventory_chunk, actor=current_user, records=chunk, state=state)
+            await db.commit()
+            chunk = []
+    if chunk:
+        await db.run_sync(import_inventory_chunk, actor=current_user, records=chunk, state=state)
+        await db.commit()
+
+    if state.outbox_id is not None:
+        await db.run_sync(release_inventory_import_alerts, outbox_id=state.outbox_id)
+        await db.commit()
+    return InventoryImportReport(
+        rows_received=rows_received,
+        rows_imported=state.imported,
+        rows_failed=len(state.errors),
+        errors=sorted(state.errors, key=lambda error: error["row"]),
+    )
+
+
 @router.get("/", response_model=List[InventoryResponse])
 async def list_inventory(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 20,
     store_id: int | None = None,
     payment_status: str | None = None,
 ):
     """List inventory records by role scope and optional filters."""
-    query = db.query(Inventory)
+    query = select(Inventory)
 
     if current_user.role == "clerk":
-        query = query.filter(Inventory.created_by == current_user.id)
+        query = query.where(Inventory.created_by == current_user.id)
     elif current_user.role == "admin" and current_user.store_id is not None:
-        query = query.filter(Inventory.store_id == current_user.store_id)
+        query = query.where(Inventory.store_id == current_user.store_id)
     elif current_user.role == "superuser":
-        query = query.join(Store, Store.id == Inventory.store_id).filter(Store.merchant_id == current_user.id)
+        query = query.join(Store, Store.id == Inventory.store_id).where(Store.merchant_id == current_user.id)
 
     if store_id is not None:
         enforce_store_scope(current_user, store_id)
         if current_user.role == "superuser":
-            store = db.query(Store).filter(Store.id == store_id).first()
+            store = await db.get(Store, store_id)
             if not store or store.merchant_id != current_user.id:
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Store not in your account")
-        query = query.filter(Inventory.store_id == store_id)
+        query = query.where(Inventory.store_id == store_id)
 
     if payment_status is not None:
-        query = query.filter(Inventory.payment_status == payment_status)
+        query = query.where(Inventory.payment_status == payment_status)
 
-    records = query.order_by(Inventory.created_at.desc()).offset(skip).limit(limit).all()
+    records = (
+        await db.scalars(query.order_by(Inventory.created_at.desc()).offset(skip).limit(limit))
+    ).all()
     return [InventoryResponse.model_validate(record) for record in records]
 
 
+@router.get("/stock-levels", response_model=List[StockLevelResponse])
+async def list_stock_levels(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    store_id: int | None = None,
+    product_id: int | None = None,
+    below: int | None = None,
+    skip: int = 0,
+    limit: int = 100,
+):
+    """Units on hand per store and product; `below` keeps only levels under that quantity."""
+    query = select(StockLevel)
+    if current_user.role != "superuser":
+        if current_user.store_id is None:
+            return []
+        if store_id is not None and store_id != current_user.store_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Cannot access resources outside your assigned store",
+            )
+        query = query.where(StockLevel.store_id == current_user.store_id)
+    elif store_id is not None:
+        store = await db.get(Store, store_id)
+        if not store or store.merchant_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Store not in your account")
+        query = query.where(StockLevel.store_id == store_id)
+    else:
+        query = query.join(Store, Store.id == StockLevel.store_id).where(Store.merchant_id == current_user.id)
+
+    if product_id is not None:
+        query = query.where(StockLevel.product_id == product_id)
+    if below is not None:
+        query = query.where(StockLevel.quantity_in_stock < below)
+
+    levels = (
+        await db.scalars(
+            query.order_by(StockLevel.store_id, StockLevel.product_id).offset(skip).limit(limit)
+        )
+    ).all()
+    return [StockLevelResponse.model_validate(level) for level in levels]
+
+
 @router.get("/{inventory_id}", response_model=InventoryResponse)
 async def get_inventory(
     inventory_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    record = db.query(Inventory).filter(Inventory.id == inventory_id).first()
+    record = await db.get(Inventory, inventory_id)
     if not record:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory record not found")
 
@@ -133,8 +238,7 @@ async def get_inventory(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot view other clerks' records")
 
     enforce_store_scope(current_user, record.store_id)
-    if current_user.role == "superuser" and record.store.merchant_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Record not in your account")
+    await _ensure_record_in_account(db, current_user, record)
     return InventoryResponse.model_validate(record)
 
 
@@ -143,9 +247,9 @@ async def update_inventory(
     inventory_id: int,
     inventory_data: InventoryUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    record = db.query(Inventory).filter(Inventory.id == inventory_id).first()
+    record = await db.get(Inventory, inventory_id)
     if not record:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory record not found")
 
@@ -153,8 +257,7 @@ async def update_inventory(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot update other clerks' records")
 
     enforce_store_scope(current_user, record.store_id)
-    if current_user.role == "superuser" and record.store.merchant_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Record not in your account")
+    await _ensure_record_in_account(db, current_user, record)
     old_stock = record.quantity_in_stock
     old_payment_status = record.payment_status
 
@@ -183,8 +286,8 @@ async def update_inventory(
     if inventory_data.remarks is not None:
         record.remarks = inventory_data.remarks
 
-    create_inventory_event(
-        db,
+    await db.run_sync(
+        create_inventory_event,
         inventory_id=record.id,
         product_id=record.product_id,
         store_id=record.store_id,
@@ -197,15 +300,15 @@ async def update_inventory(
         details=record.remarks,
     )
     if record.payment_status == PaymentStatus.UNPAID.value and old_payment_status != PaymentStatus.UNPAID.value:
-        notify_unpaid_inventory(
-            db,
+        await db.run_sync(
+            notify_unpaid_inventory,
             store_id=record.store_id,
             product_id=record.product_id,
             quantity_in_stock=record.quantity_in_stock,
         )
-    notify_low_stock_if_needed(db, inventory=record)
-    db.commit()
-    db.refresh(record)
+    await db.run_sync(notify_low_stock_if_needed, inventory=record)
+    await db.commit()
+    await db.refresh(record)
     return InventoryResponse.model_validate(record)
 
 
@@ -214,24 +317,23 @@ async def update_payment_status(
     inventory_id: int,
     payload: dict,
     current_user: User = Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Update payment status for an inventory entry."""
     payment_status = payload.get("payment_status")
     if payment_status not in {PaymentStatus.PAID.value, PaymentStatus.UNPAID.value}:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid payment status")
 
-    record = db.query(Inventory).filter(Inventory.id == inventory_id).first()
+    record = await db.get(Inventory, inventory_id)
     if not record:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory record not found")
 
     enforce_store_scope(current_user, record.store_id)
-    if current_user.role == "superuser" and record.store.merchant_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Record not in your account")
+    await _ensure_record_in_account(db, current_user, record)
     old_payment_status = record.payment_status
     record.payment_status = payment_status
-    create_inventory_event(
-        db,
+    await db.run_sync(
+        create_inventory_event,
         inventory_id=record.id,
         product_id=record.product_id,
         store_id=record.store_id,
@@ -244,14 +346,14 @@ async def update_payment_status(
         details=record.remarks,
     )
     if payment_status == PaymentStatus.UNPAID.value and old_payment_status != PaymentStatus.UNPAID.value:
-        notify_unpaid_inventory(
-            db,
+        await db.run_sync(
+            notify_unpaid_inventory,
             store_id=record.store_id,
             product_id=record.product_id,
             quantity_in_stock=record.quantity_in_stock,
         )
-    db.commit()
-    db.refresh(record)
+    await db.commit()
+    await db.refresh(record)
     return InventoryResponse.model_validate(record)
 
 
@@ -259,10 +361,10 @@ async def update_payment_status(
 async def delete_inventory(
     inventory_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Delete an inventory record if user has access to it."""
-    record = db.query(Inventory).filter(Inventory.id == inventory_id).first()
+    record = await db.get(Inventory, inventory_id)
     if not record:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory record not found")
 
@@ -270,10 +372,9 @@ async def delete_inventory(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot delete other clerks' records")
 
     enforce_store_scope(current_user, record.store_id)
-    if current_user.role == "superuser" and record.store.merchant_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Record not in your account")
-    create_inventory_event(
-        db,
+    await _ensure_record_in_account(db, current_user, record)
+    await db.run_sync(
+        create_inventory_event,
         inventory_id=record.id,
         product_id=record.product_id,
         store_id=record.store_id,
@@ -285,8 +386,8 @@ async def delete_inventory(
         new_payment_status=None,
         details=record.remarks,
     )
-    db.delete(record)
-    db.commit()
+    await db.delete(record)
+    await db.commit()
     return {"message": "Inventory record deleted successfully"}
 
 
@@ -296,23 +397,23 @@ async def inventory_history_by_product(
     store_id: int | None = None,
     limit: int = 100,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """List timeline events for stock/payment changes by product."""
-    query = db.query(InventoryEvent).filter(InventoryEvent.product_id == product_id)
+    query = select(InventoryEvent).where(InventoryEvent.product_id == product_id)
     if store_id is not None:
         enforce_store_scope(current_user, store_id)
         if current_user.role == "superuser":
-            store = db.query(Store).filter(Store.id == store_id).first()
+            store = await db.get(Store, store_id)
             if not store or store.merchant_id != current_user.id:
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Store not in your account")
-        query = query.filter(InventoryEvent.store_id == store_id)
+        query = query.where(InventoryEvent.store_id == store_id)
     elif current_user.role == "admin" and current_user.store_id is not None:
-        query = query.filter(InventoryEvent.store_id == current_user.store_id)
+        query = query.where(InventoryEvent.store_id == current_user.store_id)
     elif current_user.role == "clerk":
-        query = query.filter(InventoryEvent.actor_id == current_user.id)
+        query = query.where(InventoryEvent.actor_id == current_user.id)
 
-    rows = query.order_by(InventoryEvent.created_at.desc()).limit(limit).all()
+    rows = (await db.scalars(query.order_by(InventoryEvent.created_at.desc()).limit(limit))).all()
     return [InventoryEventResponse.model_validate(row) for row in rows]
 
 
@@ -320,18 +421,20 @@ async def inventory_history_by_product(
 async def get_paid_inventory(
     store_id: int,
     current_user: User = Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     enforce_store_scope(current_user, store_id)
     if current_user.role == "superuser":
-        store = db.query(Store).filter(Store.id == store_id).first()
+        store = await db.get(Store, store_id)
         if not store or store.merchant_id != current_user.id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Store not in your account")
     records = (
-        db.query(Inventory)
-        .filter(Inventory.store_id == store_id, Inventory.payment_status == PaymentStatus.PAID)
-        .all()
-    )
+        await db.scalars(
+            select(Inventory).where(
+                Inventory.store_id == store_id, Inventory.payment_status == PaymentStatus.PAID
+            )
+        )
+    ).all()
     return [InventoryResponse.model_validate(record) for record in records]
 
 
@@ -339,16 +442,18 @@ async def get_paid_inventory(
 async def get_unpaid_inventory(
     store_id: int,
     current_user: User = Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     enforce_store_scope(current_user, store_id)
     if current_user.role == "superuser":
-        store = db.query(Store).filter(Store.id == store_id).first()
+        store = await db.get(Store, store_id)
         if not store or store.merchant_id != current_user.id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Store not in your account")
     records = (
-        db.query(Inventory)
-        .filter(Inventory.store_id == store_id, Inventory.payment_status == PaymentStatus.UNPAID)
-        .all()
-    )
+        await db.scalars(
+            select(Inventory).where(
+                Inventory.store_id == store_id, Inventory.payment_status == PaymentStatus.UNPAID
+            )
+        )
+    ).all()
     return [InventoryResponse.model_validate(record) for record in records]
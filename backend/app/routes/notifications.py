@@ -1,20 +1,32 @@
 """
 Notification center routes.
 """
+import asyncio
+import json
+import time
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db
 from app.core.dependencies import get_current_user
 from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter, adjust_unread_counts
 from app.models.user import User
 from app.schemas.notifications import NotificationResponse, NotificationUnreadCount
+from app.services.notification_broker import OVERFLOW, notification_broker, publish_after_commit
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
 
+# Unread notifications replayed to a stream reconnecting with Last-Event-ID.
+STREAM_REPLAY_LIMIT = 50
+STREAM_RETRY_MS = 3000
+
 
 @router.get("/", response_model=List[NotificationResponse])
 async def list_notifications(
@@ -22,63 +34,167 @@ async def list_notifications(
     skip: int = 0,
     limit: int = 20,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    query = db.query(Notification).filter(Notification.user_id == current_user.id)
+    query = select(Notification).where(Notification.user_id == current_user.id)
     if unread_only:
-        query = query.filter(Notification.is_read.is_(False))
-    rows = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+        query = query.where(Notification.is_read.is_(False))
+    rows = (
+        await db.scalars(query.order_by(Notification.created_at.desc()).offset(skip).limit(limit))
+    ).all()
     return [NotificationResponse.model_validate(row) for row in rows]
 
 
 @router.get("/unread-count", response_model=NotificationUnreadCount)
 async def unread_count(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return NotificationUnreadCount(unread_count=await _unread_count(db, current_user.id))
+
+
+async def _unread_count(db: AsyncSession, user_id: int) -> int:
+    """The user's unread count, a primary-key read of their notification_counters row."""
+    count = await db.scalar(select(NotificationCounter.unread_count).where(NotificationCounter.user_id == user_id))
+    return max(count or 0, 0)
+
+
+def _sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_events(request: Request, subscription, unread: int, missed: list[dict]):
+    deadline = time.monotonic() + settings.notification_stream_max_seconds
+    try:
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+        for notification in missed:
+            yield _sse("notification", notification, notification["id"])
+        yield _sse("unread_count", {"unread_count": unread})
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=min(settings.notification_stream_heartbeat_seconds, remaining)
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": heartbeat\n\n"
+                continue
+            if message is OVERFLOW:
+                yield _sse("resync", {})
+                return
+            if message["event"] == "notification":
+                notification = message["notification"]
+                yield _sse("notification", notification, notification["id"])
+            else:
+                yield _sse("read", {"ids": message["ids"]})
+            if message["unread_delta"]:
+                unread = max(0, unread + message["unread_delta"])
+                yield _sse("unread_count", {"unread_count": unread})
+    finally:
+        notification_broker.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def notification_stream(
+    request: Request,
+    last_event_id: Optional[str] = Header(default=None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    count = (
-        db.query(Notification)
-        .filter(Notification.user_id == current_user.id, Notification.is_read.is_(False))
-        .count()
+    """
+    Server-sent events for the caller's notifications.
+
+    Events: notification (new or refreshed row, with its id as the event id),
+    read ({"ids": [...]} or {"ids": null} for read-all), unread_count
+    (sent on connect and whenever it changes) and resync (the stream fell
+    behind; reload and reconnect). Reconnecting with Last-Event-ID replays
+    unread notifications newer than that id. Idle streams get a heartbeat
+    comment; every stream ends after NOTIFICATION_STREAM_MAX_SECONDS.
+    """
+    # Subscribe before reading the count so nothing committed in between is missed.
+    subscription = await notification_broker.subscribe(current_user.id)
+    try:
+        unread = await _unread_count(db, current_user.id)
+        missed = []
+        if last_event_id and last_event_id.isdigit():
+            rows = await db.scalars(
+                select(Notification)
+                .where(
+                    Notification.user_id == current_user.id,
+                    Notification.is_read.is_(False),
+                    Notification.id > int(last_event_id),
+                )
+                .order_by(Notification.id)
+                .limit(STREAM_REPLAY_LIMIT)
+            )
+            missed = [NotificationResponse.model_validate(row).model_dump(mode="json") for row in rows]
+        # Return the connection to the pool; the stream may stay open for minutes.
+        await db.close()
+    except BaseException:
+        notification_broker.unsubscribe(subscription)
+        raise
+    return StreamingResponse(
+        _stream_events(request, subscription, unread, missed),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return NotificationUnreadCount(unread_count=count)
 
 
 @router.patch("/{notification_id}/read", response_model=NotificationResponse)
 async def mark_notification_read(
     notification_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    notification = (
-        db.query(Notification)
-        .filter(Notification.id == notification_id, Notification.user_id == current_user.id)
-        .first()
+    notification = await db.scalar(
+        select(Notification).where(
+            Notification.id == notification_id, Notification.user_id == current_user.id
+        )
     )
     if not notification:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
 
     if not notification.is_read:
-        notification.is_read = True
-        notification.read_at = datetime.now(timezone.utc)
-        db.commit()
-        db.refresh(notification)
+        # Conditional UPDATE: of two concurrent requests for this row only one matches, so one decrement.
+        result = await db.execute(
+            update(Notification)
+            .where(Notification.id == notification.id, Notification.is_read.is_(False))
+            .values(is_read=True, read_at=datetime.now(timezone.utc))
+        )
+        if result.rowcount:
+            await db.run_sync(
+                lambda session: adjust_unread_counts(session.connection(), {current_user.id: -result.rowcount})
+            )
+            publish_after_commit(
+                db, {"user_id": current_user.id, "event": "read", "ids": [notification.id], "unread_delta": -1}
+            )
+        await db.commit()
+        await db.refresh(notification)
     return NotificationResponse.model_validate(notification)
 
 
 @router.patch("/read-all")
 async def mark_all_read(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    unread = (
-        db.query(Notification)
-        .filter(Notification.user_id == current_user.id, Notification.is_read.is_(False))
-        .all()
+    result = await db.execute(
+        update(Notification)
+        .where(Notification.user_id == current_user.id, Notification.is_read.is_(False))
+        .values(is_read=True, read_at=datetime.now(timezone.utc))
     )
-    now = datetime.now(timezone.utc)
-    for row in unread:
-        row.is_read = True
-        row.read_at = now
-    db.commit()
-    return {"message": f"Marked {len(unread)} notifications as read"}
+    if result.rowcount:
+        # A bulk UPDATE skips the flush listener that maintains the counter.
+        await db.run_sync(
+            lambda session: adjust_unread_counts(session.connection(), {current_user.id: -result.rowcount})
+        )
+        publish_after_commit(
+            db, {"user_id": current_user.id, "event": "read", "ids": None, "unread_delta": -result.rowcount}
+        )
+    await db.commit()
+    return {"message": f"Marked {result.rowcount} notifications as read"}
@@ -2,6 +2,7 @@
 Product management routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.dependencies import enforce_store_scope, get_current_user
@@ -10,6 +11,7 @@ from app.models.store import Store
 from app.models.product import Product
 from app.models.stock_threshold import StockThreshold
 from app.schemas.notifications import StockThresholdResponse, StockThresholdUpsert
+from app.services.threshold_cache import threshold_cache
 from app.schemas.product import (
     ProductCreate, ProductUpdate, ProductResponse, ProductListResponse
 )
@@ -318,7 +320,18 @@ async def upsert_product_threshold(
         db.add(threshold)
     else:
         threshold.min_quantity = payload.min_quantity
+    # Other workers reload this merchant's cached thresholds once they see the new version.
+    # A shared product's thresholds are cached under every merchant that owns a store.
+    if product.merchant_id is not None:
+        owners = User.id == product.merchant_id
+    else:
+        owners = User.id.in_(select(Store.merchant_id).where(Store.merchant_id.is_not(None)))
+    db.execute(update(User).where(owners).values(threshold_version=User.threshold_version + 1))
 
     db.commit()
+    if product.merchant_id is not None:
+        threshold_cache.invalidate(product.merchant_id)
+    else:
+        threshold_cache.clear()
     db.refresh(threshold)
     return StockThresholdResponse.model_validate(threshold)
@@ -5,10 +5,11 @@ from datetime import datetime, timezone
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, contains_eager
 
 from app.core.database import get_db
-from app.core.dependencies import check_permission, enforce_store_scope, get_current_user
+from app.core.dependencies import check_permission, enforce_store_scope, get_current_user, get_idempotency_key
 from app.models.product import Product
 from app.models.purchase_order import PurchaseOrder, PurchaseOrderItem
 from app.models.supplier import Supplier
@@ -16,10 +17,12 @@ from app.models.store import Store
 from app.schemas.purchase_order import (
     PurchaseOrderCreate,
     PurchaseOrderListItem,
+    PurchaseOrderReceive,
     PurchaseOrderResponse,
     PurchaseOrderStatusUpdate,
 )
-from app.services.stock_service import increase_stock
+from app.services.idempotency import commit_or_replay, remember_response, replay_response
+from app.services.stock_service import receive_stock
 
 router = APIRouter(prefix="/api/purchase-orders", tags=["purchase-orders"])
 
@@ -28,6 +31,80 @@ def utc_now():
     return datetime.now(timezone.utc)
 
 
+def _get_managed_order(db: Session, purchase_order_id: int, current_user) -> PurchaseOrder:
+    order = db.query(PurchaseOrder).filter(PurchaseOrder.id == purchase_order_id).first()
+    if not order:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Purchase order not found")
+    if current_user.role == "admin":
+        enforce_store_scope(current_user, order.store_id)
+    if current_user.role == "superuser":
+        store = db.query(Store).filter(Store.id == order.store_id).first()
+        if not store or store.merchant_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Order not in your account")
+    return order
+
+
+def _outstanding_quantities(order: PurchaseOrder) -> dict[int, int]:
+    return {
+        item.id: item.quantity - item.quantity_received
+        for item in order.items
+        if item.quantity > item.quantity_received
+    }
+
+
+def _receive_items(db: Session, order: PurchaseOrder, quantities: dict[int, int], actor_id: int) -> None:
+    """
+    Receive `quantities` (item id -> units) of the order's lines into stock.
+
+    All lines land in one bulk insert via receive_stock(); the order becomes
+    "received" once every line is complete, else "partially_received".
+    """
+    if order.status == "received":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Order already received")
+    if order.status == "cancelled":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot receive a cancelled order")
+
+    items = {item.id: item for item in order.items}
+    unknown = quantities.keys() - items.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Purchase order item #{min(unknown)} not found on this order",
+        )
+    lines = []
+    for item_id, quantity in quantities.items():
+        item = items[item_id]
+        if quantity > item.quantity - item.quantity_received:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Item #{item_id} has only {item.quantity - item.quantity_received} units outstanding",
+            )
+        item.quantity_received += quantity
+        lines.append(
+            {
+                "product_id": item.product_id,
+                "quantity": quantity,
+                "buying_price": item.unit_cost,
+                "selling_price": item.unit_price or item.unit_cost,
+            }
+        )
+
+    receive_stock(
+        db,
+        store_id=order.store_id,
+        lines=lines,
+        actor_id=actor_id,
+        event_type="purchase_order_received",
+        details=f"PO #{order.id} received",
+        payment_status="unpaid",
+    )
+    if all(item.quantity_received >= item.quantity for item in order.items):
+        order.status = "received"
+        order.received_at = order.received_at or utc_now()
+    else:
+        order.status = "partially_received"
+
+
 @router.post("/", response_model=PurchaseOrderResponse)
 async def create_purchase_order(
     payload: PurchaseOrderCreate,
@@ -39,10 +116,9 @@ async def create_purchase_order(
 
     if current_user.role == "admin":
         enforce_store_scope(current_user, payload.store_id)
-    if current_user.role == "superuser":
-        store = db.query(Store).filter(Store.id == payload.store_id).first()
-        if not store or store.merchant_id != current_user.id:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Store not in your account")
+    store = db.query(Store).filter(Store.id == payload.store_id).first()
+    if current_user.role == "superuser" and (not store or store.merchant_id != current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Store not in your account")
 
     supplier = db.query(Supplier).filter(Supplier.id == payload.supplier_id).first()
     if not supplier:
@@ -53,38 +129,61 @@ async def create_purchase_order(
             detail="Supplier is not linked to the selected store",
         )
 
-    store = db.query(Store).filter(Store.id == payload.store_id).first()
     if not store:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Store not found")
 
-    purchase_order = PurchaseOrder(
-        supplier_id=payload.supplier_id,
-        store_id=payload.store_id,
-        created_by=current_user.id,
-        status="draft",
-        notes=payload.notes,
-    )
+    # One IN query for every referenced product instead of one lookup per line.
+    product_ids = {item.product_id for item in payload.items}
+    products = {product.id: product for product in db.query(Product).filter(Product.id.in_(product_ids))}
+    missing = product_ids - products.keys()
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product not found: {', '.join(str(product_id) for product_id in sorted(missing))}",
+        )
+    if store.merchant_id is not None:
+        foreign = sorted(
+            product.id
+            for product in products.values()
+            if product.merchant_id is not None and product.merchant_id != store.merchant_id
+        )
+        if foreign:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Products not in store account: {', '.join(str(product_id) for product_id in foreign)}",
+            )
 
+    item_rows = []
     total_cost = 0.0
     for item in payload.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if not product:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-        unit_price = item.unit_price if item.unit_price is not None else product.selling_price
+        unit_price = item.unit_price if item.unit_price is not None else products[item.product_id].selling_price
         line_total = float(item.quantity) * float(item.unit_cost)
         total_cost += line_total
-        purchase_order.items.append(
-            PurchaseOrderItem(
-                product_id=item.product_id,
-                quantity=item.quantity,
-                unit_cost=item.unit_cost,
-                unit_price=unit_price,
-                line_total=line_total,
-            )
+        item_rows.append(
+            {
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "unit_cost": item.unit_cost,
+                "unit_price": unit_price,
+                "line_total": line_total,
+            }
         )
 
-    purchase_order.total_cost = total_cost
+    purchase_order = PurchaseOrder(
+        supplier_id=payload.supplier_id,
+        store_id=payload.store_id,
+        created_by=current_user.id,
+        status="draft",
+        notes=payload.notes,
+        total_cost=total_cost,
+    )
     db.add(purchase_order)
+    db.flush()
+    # executemany without RETURNING: the lines are read back with the order below.
+    db.execute(
+        insert(PurchaseOrderItem),
+        [{**row, "purchase_order_id": purchase_order.id} for row in item_rows],
+    )
     db.commit()
     db.refresh(purchase_order)
     return PurchaseOrderResponse.model_validate(purchase_order)
@@ -113,7 +212,11 @@ async def list_purchase_orders(
     if status_filter:
         query = query.filter(PurchaseOrder.status == status_filter.lower())
 
-    orders = query.order_by(PurchaseOrder.created_at.desc()).all()
+    orders = (
+        query.options(contains_eager(PurchaseOrder.supplier), contains_eager(PurchaseOrder.store))
+        .order_by(PurchaseOrder.created_at.desc())
+        .all()
+    )
     results = []
     for order in orders:
         results.append(
@@ -139,15 +242,7 @@ async def get_purchase_order(
     current_user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    order = db.query(PurchaseOrder).filter(PurchaseOrder.id == purchase_order_id).first()
-    if not order:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Purchase order not found")
-    if current_user.role == "admin":
-        enforce_store_scope(current_user, order.store_id)
-    if current_user.role == "superuser":
-        store = db.query(Store).filter(Store.id == order.store_id).first()
-        if not store or store.merchant_id != current_user.id:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Order not in your account")
+    order = _get_managed_order(db, purchase_order_id, current_user)
     return PurchaseOrderResponse.model_validate(order)
 
 
@@ -157,16 +252,12 @@ async def update_purchase_order_status(
     payload: PurchaseOrderStatusUpdate,
     current_user=Depends(check_permission("admin")),
     db: Session = Depends(get_db),
+    idempotency=Depends(get_idempotency_key),
 ):
-    order = db.query(PurchaseOrder).filter(PurchaseOrder.id == purchase_order_id).first()
-    if not order:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Purchase order not found")
-    if current_user.role == "admin":
-        enforce_store_scope(current_user, order.store_id)
-    if current_user.role == "superuser":
-        store = db.query(Store).filter(Store.id == order.store_id).first()
-        if not store or store.merchant_id != current_user.id:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Order not in your account")
+    replay = replay_response(db, idempotency)
+    if replay is not None:
+        return replay
+    order = _get_managed_order(db, purchase_order_id, current_user)
 
     new_status = payload.status.lower()
     if new_status not in {"draft", "sent", "received", "cancelled"}:
@@ -176,23 +267,7 @@ async def update_purchase_order_status(
         order.status = "sent"
         order.sent_at = order.sent_at or utc_now()
     elif new_status == "received":
-        if order.status == "received":
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Order already received")
-        for item in order.items:
-            increase_stock(
-                db=db,
-                store_id=order.store_id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                buying_price=item.unit_cost,
-                selling_price=item.unit_price or item.unit_cost,
-                actor_id=current_user.id,
-                event_type="purchase_order_received",
-                details=f"PO #{order.id} received",
-                payment_status="unpaid",
-            )
-        order.status = "received"
-        order.received_at = order.received_at or utc_now()
+        _receive_items(db, order, _outstanding_quantities(order), current_user.id)
     elif new_status == "cancelled":
         order.status = "cancelled"
     else:
@@ -201,6 +276,37 @@ async def update_purchase_order_status(
     if payload.notes is not None:
         order.notes = payload.notes
 
-    db.commit()
+    db.flush()
     db.refresh(order)
-    return PurchaseOrderResponse.model_validate(order)
+    response = PurchaseOrderResponse.model_validate(order)
+    remember_response(db, idempotency, response)
+    return commit_or_replay(db, idempotency) or response
+
+
+@router.post("/{purchase_order_id}/receive", response_model=PurchaseOrderResponse)
+async def receive_purchase_order(
+    purchase_order_id: int,
+    payload: PurchaseOrderReceive,
+    current_user=Depends(check_permission("admin")),
+    db: Session = Depends(get_db),
+    idempotency=Depends(get_idempotency_key),
+):
+    replay = replay_response(db, idempotency)
+    if replay is not None:
+        return replay
+    order = _get_managed_order(db, purchase_order_id, current_user)
+    if payload.lines is None:
+        quantities = _outstanding_quantities(order)
+    else:
+        quantities: dict[int, int] = {}
+        for line in payload.lines:
+            quantities[line.item_id] = quantities.get(line.item_id, 0) + line.quantity
+    _receive_items(db, order, quantities, current_user.id)
+    if payload.notes is not None:
+        order.notes = payload.notes
+
+    db.flush()
+    db.refresh(order)
+    response = PurchaseOrderResponse.model_validate(order)
+    remember_response(db, idempotency, response)
+    return commit_or_replay(db, idempotency) or response
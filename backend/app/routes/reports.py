@@ -9,6 +9,7 @@ from app.core.dependencies import check_permission, enforce_store_scope, get_cur
 from app.models.store import Store
 from app.models.user import User
 from app.schemas.inventory import StoreCreate, StoreListResponse, StoreResponse, StoreUpdate
+from app.services.recipient_cache import recipient_cache
 
 router = APIRouter(prefix="/api/stores", tags=["stores"])
 
@@ -100,6 +101,7 @@ async def update_store(
         store.is_active = store_data.is_active
 
     db.commit()
+    recipient_cache.invalidate(store.id)
     db.refresh(store)
     return StoreResponse.model_validate(store)
 
@@ -120,4 +122,5 @@ async def delete_store(
 
     db.delete(store)
     db.commit()
+    recipient_cache.invalidate(store_id)
     return {"message": "Store deleted successfully"}
@@ -4,15 +4,19 @@ Sales routes.
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.dependencies import check_permission, enforce_store_scope, get_current_user
+from app.core.database import get_async_db
+from app.core.dependencies import check_permission, enforce_store_scope, get_current_user, get_idempotency_key
 from app.models.product import Product
 from app.models.sale import Sale
 from app.models.store import Store
-from app.schemas.sales import SaleCreate, SaleResponse
-from app.services.stock_service import decrease_stock
+from app.schemas.sales import BasketCreate, BasketReceiptResponse, SaleCreate, SaleResponse
+from app.services.depletion import strategy_for_store
+from app.services.event_writer import record_inventory_event
+from app.services.idempotency import commit_or_replay, remember_response, replay_response
+from app.services.stock_service import decrease_stock, deplete_stock
 
 router = APIRouter(prefix="/api/sales", tags=["sales"])
 
@@ -21,20 +25,24 @@ router = APIRouter(prefix="/api/sales", tags=["sales"])
 async def create_sale(
     payload: SaleCreate,
     current_user=Depends(check_permission("admin")),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    idempotency=Depends(get_idempotency_key),
 ):
+    replay = await db.run_sync(replay_response, idempotency)
+    if replay is not None:
+        return replay
     if current_user.role == "admin":
         enforce_store_scope(current_user, payload.store_id)
     if current_user.role == "superuser":
-        store = db.query(Store).filter(Store.id == payload.store_id).first()
+        store = await db.get(Store, payload.store_id)
         if not store or store.merchant_id != current_user.id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Store not in your account")
 
-    store = db.query(Store).filter(Store.id == payload.store_id).first()
+    store = await db.get(Store, payload.store_id)
     if not store:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Store not found")
 
-    product = db.query(Product).filter(Product.id == payload.product_id).first()
+    product = await db.get(Product, payload.product_id)
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
@@ -43,8 +51,8 @@ async def create_sale(
     total_price = float(unit_price) * float(payload.quantity)
     total_cost = float(unit_cost) * float(payload.quantity)
 
-    decrease_stock(
-        db=db,
+    await db.run_sync(
+        decrease_stock,
         store_id=payload.store_id,
         product_id=payload.product_id,
         quantity=payload.quantity,
@@ -65,27 +73,118 @@ async def create_sale(
         notes=payload.notes,
     )
     db.add(sale)
-    db.commit()
-    db.refresh(sale)
-    return SaleResponse.model_validate(sale)
+    await db.flush()
+    response = SaleResponse.model_validate(sale)
+    await db.run_sync(remember_response, idempotency, response)
+    replay = await db.run_sync(commit_or_replay, idempotency)
+    return replay or response
+
+
+@router.post("/basket", response_model=BasketReceiptResponse)
+async def create_basket_sale(
+    payload: BasketCreate,
+    current_user=Depends(check_permission("admin")),
+    db: AsyncSession = Depends(get_async_db),
+    idempotency=Depends(get_idempotency_key),
+):
+    """Record every line of a till checkout in one transaction; any short line fails the whole basket."""
+    replay = await db.run_sync(replay_response, idempotency)
+    if replay is not None:
+        return replay
+    if current_user.role == "admin":
+        enforce_store_scope(current_user, payload.store_id)
+    store = await db.get(Store, payload.store_id)
+    if not store:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Store not found")
+    if current_user.role == "superuser" and store.merchant_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Store not in your account")
+
+    product_ids = {line.product_id for line in payload.lines}
+    products = {
+        product.id: product
+        for product in (await db.scalars(select(Product).where(Product.id.in_(product_ids)))).all()
+    }
+    missing = sorted(product_ids - products.keys())
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Products not found: {missing}")
+    if store.merchant_id is not None and any(
+        product.merchant_id is not None and product.merchant_id != store.merchant_id
+        for product in products.values()
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product not in store account")
+
+    strategy = await db.run_sync(strategy_for_store, payload.store_id)
+    sale_rows = []
+    event_rows = []
+    for line in payload.lines:
+        product = products[line.product_id]
+        try:
+            event_rows += await db.run_sync(
+                deplete_stock,
+                store_id=payload.store_id,
+                product_id=line.product_id,
+                quantity=line.quantity,
+                actor_id=current_user.id,
+                event_type="sale_recorded",
+                details="Basket sale recorded",
+                strategy=strategy,
+            )
+        except HTTPException as exc:
+            if exc.status_code != status.HTTP_400_BAD_REQUEST:
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient stock for product #{line.product_id}",
+            ) from exc
+        unit_price = line.unit_price if line.unit_price is not None else product.selling_price
+        sale_rows.append(
+            {
+                "store_id": payload.store_id,
+                "product_id": line.product_id,
+                "created_by": current_user.id,
+                "quantity": line.quantity,
+                "unit_price": unit_price,
+                "unit_cost": product.buying_price,
+                "total_price": float(unit_price) * float(line.quantity),
+                "total_cost": float(product.buying_price) * float(line.quantity),
+                "notes": payload.notes,
+            }
+        )
+
+    for row in event_rows:
+        record_inventory_event(db.sync_session, **row)
+    sales = (await db.scalars(insert(Sale).returning(Sale, sort_by_parameter_order=True), sale_rows)).all()
+
+    lines = [SaleResponse.model_validate(sale) for sale in sales]
+    response = BasketReceiptResponse(
+        store_id=payload.store_id,
+        created_by=current_user.id,
+        lines=lines,
+        total_quantity=sum(line.quantity for line in lines),
+        total_price=sum(line.total_price for line in lines),
+        total_cost=sum(line.total_cost for line in lines),
+    )
+    await db.run_sync(remember_response, idempotency, response)
+    replay = await db.run_sync(commit_or_replay, idempotency)
+    return replay or response
 
 
 @router.get("/", response_model=List[SaleResponse])
 async def list_sales(
     current_user=Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     store_id: Optional[int] = None,
 ):
-    query = db.query(Sale)
+    query = select(Sale)
     if current_user.role == "admin":
         store_id = current_user.store_id
     if store_id is not None:
         if current_user.role == "superuser":
-            store = db.query(Store).filter(Store.id == store_id).first()
+            store = await db.get(Store, store_id)
             if not store or store.merchant_id != current_user.id:
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Store not in your account")
-        query = query.filter(Sale.store_id == store_id)
+        query = query.where(Sale.store_id == store_id)
     elif current_user.role == "superuser":
-        query = query.join(Store, Store.id == Sale.store_id).filter(Store.merchant_id == current_user.id)
-    sales = query.order_by(Sale.created_at.desc()).all()
+        query = query.join(Store, Store.id == Sale.store_id).where(Store.merchant_id == current_user.id)
+    sales = (await db.scalars(query.order_by(Sale.created_at.desc()))).all()
     return [SaleResponse.model_validate(item) for item in sales]
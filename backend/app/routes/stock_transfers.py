@@ -8,11 +8,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.core.dependencies import check_permission, enforce_store_scope, get_current_user
+from app.core.dependencies import check_permission, enforce_store_scope, get_current_user, get_idempotency_key
 from app.models.product import Product
 from app.models.stock_transfer import StockTransfer
 from app.models.store import Store
 from app.schemas.stock_transfer import StockTransferCreate, StockTransferResponse, StockTransferStatusUpdate
+from app.services.idempotency import commit_or_replay, remember_response, replay_response
 from app.services.stock_service import decrease_stock, increase_stock
 
 router = APIRouter(prefix="/api/stock-transfers", tags=["stock-transfers"])
@@ -99,7 +100,11 @@ async def update_transfer_status(
     payload: StockTransferStatusUpdate,
     current_user=Depends(check_permission("admin")),
     db: Session = Depends(get_db),
+    idempotency=Depends(get_idempotency_key),
 ):
+    replay = replay_response(db, idempotency)
+    if replay is not None:
+        return replay
     transfer = db.query(StockTransfer).filter(StockTransfer.id == transfer_id).first()
     if not transfer:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transfer not found")
@@ -155,6 +160,8 @@ async def update_transfer_status(
 
     if payload.notes is not None:
         transfer.notes = payload.notes
-    db.commit()
+    db.flush()
     db.refresh(transfer)
-    return StockTransferResponse.model_validate(transfer)
+    response = StockTransferResponse.model_validate(transfer)
+    remember_response(db, idempotency, response)
+    return commit_or_replay(db, idempotency) or response
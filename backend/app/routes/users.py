@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.database import get_db
 from app.core.dependencies import check_permission, enforce_store_scope, get_current_user
+from app.core.principal_cache import principal_cache
 from app.core.security import create_invite_token, hash_password, verify_password
 from app.models.store import Store
 from app.models.user import User, UserRole
@@ -22,6 +23,7 @@ from app.schemas.user import (
     UserUpdate,
 )
 from app.services.email_service import build_admin_invite_link, send_admin_invite_email
+from app.services.recipient_cache import recipient_cache
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 logger = logging.getLogger(__name__)
@@ -64,6 +66,7 @@ async def create_user_by_admin(
     )
     db.add(new_user)
     db.commit()
+    recipient_cache.invalidate_user(new_user.role, new_user.store_id)
     db.refresh(new_user)
 
     logger.info("User created actor_id=%s created_user_id=%s role=%s", current_user.id, new_user.id, new_user.role)
@@ -172,8 +175,16 @@ async def update_user(
         user.last_name = user_data.last_name
     if user_data.phone is not None:
         user.phone = user_data.phone
+    if user_data.depletion_strategy is not None:
+        if current_user.id != user.id or user.role != UserRole.SUPERUSER.value:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only merchants can set their depletion strategy",
+            )
+        user.depletion_strategy = user_data.depletion_strategy.value
 
     db.commit()
+    principal_cache.invalidate(user.id)
     db.refresh(user)
     logger.info("User updated actor_id=%s target_user_id=%s", current_user.id, user.id)
     return UserResponse.model_validate(user)
@@ -198,6 +209,7 @@ async def change_password(
 
     user.hashed_password = hash_password(password_data.new_password)
     db.commit()
+    principal_cache.invalidate(user.id)
     return {"message": "Password changed successfully"}
 
 
@@ -215,6 +227,8 @@ async def deactivate_user(
     enforce_store_scope(current_user, user.store_id)
     user.is_active = deactivate_data.is_active
     db.commit()
+    principal_cache.invalidate(user.id)
+    recipient_cache.invalidate_user(user.role, user.store_id)
     db.refresh(user)
 
     logger.info("User status changed actor_id=%s target_user_id=%s active=%s", current_user.id, user.id, user.is_active)
@@ -233,8 +247,11 @@ async def delete_user(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
     enforce_store_scope(current_user, user.store_id)
+    role, store_id = user.role, user.store_id
     db.delete(user)
     db.commit()
+    principal_cache.invalidate(user_id)
+    recipient_cache.invalidate_user(role, store_id)
 
     logger.info("User deleted actor_id=%s target_user_id=%s", current_user.id, user_id)
     return {"message": "User deleted successfully"}
@@ -18,6 +18,7 @@ class NotificationResponse(BaseModel):
     is_read: bool
     created_at: datetime
     read_at: Optional[datetime]
+    occurrences: int = 1
 
     model_config = ConfigDict(from_attributes=True)
 
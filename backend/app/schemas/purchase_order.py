@@ -18,7 +18,7 @@ class PurchaseOrderCreate(BaseModel):
     supplier_id: int
     store_id: int
     notes: Optional[str] = None
-    items: List[PurchaseOrderItemCreate]
+    items: List[PurchaseOrderItemCreate] = Field(..., max_length=5000)
 
 
 class PurchaseOrderStatusUpdate(BaseModel):
@@ -26,10 +26,22 @@ class PurchaseOrderStatusUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class PurchaseOrderReceiptLine(BaseModel):
+    item_id: int
+    quantity: int = Field(..., gt=0)
+
+
+class PurchaseOrderReceive(BaseModel):
+    # Omit lines to receive everything still outstanding on the order.
+    lines: Optional[List[PurchaseOrderReceiptLine]] = Field(default=None, min_length=1)
+    notes: Optional[str] = None
+
+
 class PurchaseOrderItemResponse(BaseModel):
     id: int
     product_id: int
     quantity: int
+    quantity_received: int
     unit_cost: float
     unit_price: Optional[float]
     line_total: float
@@ -64,6 +64,27 @@ class InventoryResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class InventoryImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class InventoryImportReport(BaseModel):
+    rows_received: int
+    rows_imported: int
+    rows_failed: int
+    errors: List[InventoryImportRowError]
+
+
+class StockLevelResponse(BaseModel):
+    store_id: int
+    product_id: int
+    quantity_in_stock: int
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class SupplyRequestCreate(BaseModel):
     product_id: int
     store_id: int
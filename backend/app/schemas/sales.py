@@ -2,7 +2,7 @@
 Pydantic schemas for sales.
 """
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -15,6 +15,18 @@ class SaleCreate(BaseModel):
     notes: Optional[str] = None
 
 
+class BasketLine(BaseModel):
+    product_id: int
+    quantity: int = Field(..., gt=0)
+    unit_price: Optional[float] = None
+
+
+class BasketCreate(BaseModel):
+    store_id: int
+    lines: List[BasketLine] = Field(..., min_length=1, max_length=200)
+    notes: Optional[str] = None
+
+
 class SaleResponse(BaseModel):
     id: int
     store_id: int
@@ -29,3 +41,12 @@ class SaleResponse(BaseModel):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class BasketReceiptResponse(BaseModel):
+    store_id: int
+    created_by: int
+    lines: List[SaleResponse]
+    total_quantity: int
+    total_price: float
+    total_cost: float
@@ -16,6 +16,14 @@ class UserRole(str, Enum):
     CLERK = "clerk"
 
 
+class DepletionStrategy(str, Enum):
+    """Order in which a merchant's stores consume inventory batches"""
+
+    FIFO = "fifo"
+    LIFO = "lifo"
+    HIGHEST_COST = "highest_cost"
+
+
 class UserCreate(BaseModel):
     """Schema for user registration"""
 
@@ -44,6 +52,8 @@ class UserUpdate(BaseModel):
     first_name: Optional[str] = None
     last_name: Optional[str] = None
     phone: Optional[str] = None
+    # Merchants only
+    depletion_strategy: Optional[DepletionStrategy] = None
 
 
 class UserChangePassword(BaseModel):
@@ -70,6 +80,7 @@ class UserResponse(BaseModel):
     role: str
     is_active: bool
     store_id: Optional[int]
+    depletion_strategy: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
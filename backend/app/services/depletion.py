@@ -0,0 +1,81 @@
+"""
+Stock depletion strategies.
+
+A strategy is the order in which sales, transfers and returns consume a
+product's inventory batches in a store. Each merchant picks one
+(users.depletion_strategy); stores without a merchant, and merchants who
+have not chosen, use DEFAULT_DEPLETION_STRATEGY.
+"""
+from dataclasses import dataclass
+
+from sqlalchemy import Select, func, literal_column, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.inventory import Inventory
+from app.models.store import Store
+from app.models.user import DepletionStrategyName, User
+
+
+@dataclass(frozen=True)
+class DepletionStrategy:
+    name: str
+    # Consumption order; must be total (end with the primary key) so the running sum is well defined.
+    order_by: tuple
+
+    def batches_needed(self, store_id: int, product_id: int, quantity: int) -> Select:
+        """
+        Select (id, quantity_in_stock, payment_status) of only the in-stock
+        batches needed to cover `quantity`, in consumption order.
+
+        A running-sum window over the store's in-stock batches keeps each
+        batch whose preceding batches hold fewer than `quantity` units, so a
+        product with hundreds of receipt rows returns just the few consumed.
+        """
+        layers = (
+            select(
+                Inventory.id,
+                Inventory.quantity_in_stock,
+                Inventory.payment_status,
+                (
+                    func.sum(Inventory.quantity_in_stock).over(order_by=self.order_by, rows=(None, 0))
+                    - Inventory.quantity_in_stock
+                ).label("units_before"),
+            )
+            .where(
+                Inventory.store_id == store_id,
+                Inventory.product_id == product_id,
+                # Inline literal so the partial index ix_inventory_in_stock_lookup
+                # also matches under server-side prepared statements (asyncpg).
+                Inventory.quantity_in_stock > literal_column("0"),
+            )
+            .subquery()
+        )
+        return (
+            select(layers.c.id, layers.c.quantity_in_stock, layers.c.payment_status)
+            .where(layers.c.units_before < quantity)
+            .order_by(layers.c.units_before)
+        )
+
+
+STRATEGIES = {
+    DepletionStrategyName.FIFO.value: DepletionStrategy(
+        DepletionStrategyName.FIFO.value, (Inventory.created_at.asc(), Inventory.id.asc())
+    ),
+    DepletionStrategyName.LIFO.value: DepletionStrategy(
+        DepletionStrategyName.LIFO.value, (Inventory.created_at.desc(), Inventory.id.desc())
+    ),
+    DepletionStrategyName.HIGHEST_COST.value: DepletionStrategy(
+        DepletionStrategyName.HIGHEST_COST.value,
+        (Inventory.buying_price.desc(), Inventory.created_at.asc(), Inventory.id.asc()),
+    ),
+}
+DEFAULT_DEPLETION_STRATEGY = STRATEGIES[settings.default_depletion_strategy]
+
+
+def strategy_for_store(db: Session, store_id: int) -> DepletionStrategy:
+    """The depletion strategy chosen by the merchant who owns the store."""
+    name = db.scalar(
+        select(User.depletion_strategy).join(Store, Store.merchant_id == User.id).where(Store.id == store_id)
+    )
+    return STRATEGIES.get(name, DEFAULT_DEPLETION_STRATEGY)
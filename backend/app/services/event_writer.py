@@ -0,0 +1,67 @@
+"""
+Batched writer for inventory timeline events.
+
+Stock helpers record events into a per-session buffer instead of adding ORM
+objects one by one. The buffer is written as multi-row INSERT statements
+when the transaction commits, so an operation touching many batches (a PO
+receipt, a transfer, a basket) costs one statement rather than one per
+event; intermediate flushes only assign inventory ids. Code that must read
+its own events before committing calls write_pending_inventory_events().
+A rollback discards the buffer.
+"""
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.models.inventory_event import InventoryEvent, utc_now
+
+PENDING_KEY = "pending_inventory_events"
+# Rows per INSERT ... VALUES statement; keeps bound parameters well under SQLite's limit.
+ROWS_PER_STATEMENT = 500
+EVENT_COLUMNS = tuple(column.name for column in InventoryEvent.__table__.columns if column.name != "id")
+
+
+def record_inventory_event(db: Session, *, inventory=None, **values) -> None:
+    """
+    Buffer one inventory_events row (same columns as InventoryEvent) for the current transaction.
+
+    Pass `inventory` instead of `inventory_id` for a row that has not been
+    flushed yet; its id is read when the buffer is written, after the flush
+    that inserts it.
+    """
+    values.setdefault("created_at", utc_now())
+    row = {column: values.get(column) for column in EVENT_COLUMNS}
+    db.info.setdefault(PENDING_KEY, []).append((row, inventory))
+
+
+def write_pending_inventory_events(db: Session) -> int:
+    """Insert every buffered event whose inventory row exists; returns how many were written."""
+    pending = db.info.get(PENDING_KEY)
+    if not pending:
+        return 0
+    rows, waiting = [], []
+    for row, inventory in pending:
+        if inventory is not None:
+            if inventory.id is None:
+                waiting.append((row, inventory))
+                continue
+            row["inventory_id"] = inventory.id
+        rows.append(row)
+    db.info[PENDING_KEY] = waiting
+    if not rows:
+        return 0
+    connection = db.connection()
+    for start in range(0, len(rows), ROWS_PER_STATEMENT):
+        connection.execute(insert(InventoryEvent.__table__).values(rows[start : start + ROWS_PER_STATEMENT]))
+    return len(rows)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_before_commit(session):
+    # Flush first so buffered rows for new inventory get their ids.
+    session.flush()
+    write_pending_inventory_events(session)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,121 @@
+"""
+Idempotency-Key support for stock-mutating endpoints.
+
+A client that retries a write sends the same Idempotency-Key header. The
+first successful response is stored with the write, in the same transaction
+(remember_response before commit), and later requests with that key get it
+back from replay_response without running the write again. Error responses
+are not stored, so a retry after a 4xx re-runs the request. Keys live for
+IDEMPOTENCY_KEY_TTL_HOURS and are evicted lazily by the writes that store
+new ones.
+"""
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+# At most one expired-key sweep per process in this many seconds.
+EVICTION_INTERVAL_SECONDS = 300
+
+_last_eviction = 0.0
+
+
+@dataclass(frozen=True)
+class IdempotentRequest:
+    user_id: int
+    key: str
+    fingerprint: str
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def build_idempotent_request(user_id: int, key: str, method: str, path: str, body: bytes) -> IdempotentRequest:
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters",
+        )
+    digest = hashlib.sha256(f"{method} {path}\n".encode() + body).hexdigest()
+    return IdempotentRequest(user_id=user_id, key=key, fingerprint=digest)
+
+
+def replay_response(db: Session, request: IdempotentRequest | None) -> JSONResponse | None:
+    """The stored response for this key, or None if the request has not succeeded before."""
+    if request is None:
+        return None
+    stored = db.get(IdempotencyKey, (request.user_id, request.key))
+    if stored is None or stored.expires_at < _now():
+        return None
+    if stored.request_fingerprint != request.fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{IDEMPOTENCY_HEADER} was already used for a different request",
+        )
+    return JSONResponse(
+        status_code=stored.status_code,
+        content=json.loads(stored.response_body),
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+def remember_response(db: Session, request: IdempotentRequest | None, response: BaseModel) -> None:
+    """Stage the response for storage; call after the write is flushed and before commit."""
+    global _last_eviction
+    if request is None:
+        return
+    now = _now()
+    if time.monotonic() - _last_eviction >= EVICTION_INTERVAL_SECONDS:
+        _last_eviction = time.monotonic()
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+    else:
+        # An expired key that the sweep has not reached yet would collide with the new row.
+        db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == request.user_id,
+                IdempotencyKey.key == request.key,
+                IdempotencyKey.expires_at < now,
+            )
+        )
+    db.add(
+        IdempotencyKey(
+            user_id=request.user_id,
+            key=request.key,
+            request_fingerprint=request.fingerprint,
+            status_code=status.HTTP_200_OK,
+            response_body=response.model_dump_json(),
+            created_at=now,
+            expires_at=now + timedelta(hours=settings.idempotency_key_ttl_hours),
+        )
+    )
+
+
+def commit_or_replay(db: Session, request: IdempotentRequest | None) -> JSONResponse | None:
+    """
+    Commit the write. If a concurrent request with the same key committed
+    first, roll this one back and return that request's response instead.
+    """
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        replay = replay_response(db, request)
+        if replay is None:
+            raise
+        return replay
+    return None
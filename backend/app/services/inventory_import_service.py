@@ -0,0 +1,284 @@
+"""
+Streaming bulk inventory import.
+
+The request body is read incrementally as CSV (header row, one record per
+line) or JSON lines, validated in chunks and written with bulk inserts
+(events through the batched event writer). Bad rows are reported back with
+their row number instead of failing the file. Each chunk folds its alerts into
+one held outbox row for the whole import, in the chunk's transaction.
+"""
+import codecs
+import csv
+import json
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.core.dependencies import enforce_store_scope
+from app.models.inventory import Inventory, PaymentStatus
+from app.models.product import Product
+from app.models.stock_level import adjust_stock_levels, utc_now
+from app.models.store import Store
+from app.models.user import User
+from app.schemas.reports import InventoryCreate
+from app.services.event_writer import record_inventory_event
+from app.services.notification_service import hold_inventory_import_alerts
+
+CSV_TYPES = {"text/csv", "application/csv"}
+JSON_LINES_TYPES = {"application/x-ndjson", "application/jsonl", "application/json-lines"}
+REQUIRED_COLUMNS = {
+    "product_id",
+    "store_id",
+    "quantity_received",
+    "quantity_in_stock",
+    "quantity_spoilt",
+    "buying_price",
+    "selling_price",
+}
+
+
+@dataclass
+class ImportState:
+    """What an import has seen so far; the alert totals are those on its held outbox row."""
+    stores: dict[int, Store | None] = field(default_factory=dict)
+    unpaid: Counter = field(default_factory=Counter)
+    unpaid_units: Counter = field(default_factory=Counter)
+    products_by_store: dict[int, set[int]] = field(default_factory=lambda: defaultdict(set))
+    outbox_id: int | None = None
+    imported: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+class _BufferedLines:
+    """The lines csv.reader reads from; it is only advanced once a whole record is buffered."""
+
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def _iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[list[str]]:
+    """
+    Parse lines with one csv.reader so a quoted field may span lines. A record
+    is complete once its quotes balance; blank lines between records are skipped.
+    """
+    buffered = _BufferedLines()
+    reader = csv.reader(buffered)
+    in_quotes = False
+    async for line in lines:
+        if not in_quotes and not line.strip():
+            continue
+        buffered.lines.append(line + "\n")
+        in_quotes ^= line.count('"') % 2 == 1
+        if not in_quotes:
+            yield next(reader)
+    if buffered.lines:
+        # An unterminated quote: the reader returns what it has and the row fails validation.
+        yield next(reader)
+
+
+async def iter_import_records(chunks: AsyncIterator[bytes], content_type: str) -> AsyncIterator[tuple[int, dict | str]]:
+    """
+    Yield (row number, record) for each data row of the upload.
+
+    A record is a dict of column -> value, or an error message for a row that
+    could not be parsed. Blank lines are skipped.
+    """
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type not in CSV_TYPES | JSON_LINES_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload inventory as text/csv or application/x-ndjson",
+        )
+
+    row = 0
+    if media_type in JSON_LINES_TYPES:
+        async for line in _iter_lines(chunks):
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield row, f"Invalid JSON: {exc}"
+                continue
+            yield row, record if isinstance(record, dict) else "Each line must be a JSON object"
+        return
+
+    header: list[str] | None = None
+    async for values in _iter_csv_rows(_iter_lines(chunks)):
+        if header is None:
+            header = [name.strip() for name in values]
+            missing = REQUIRED_COLUMNS - set(header)
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"CSV header is missing columns: {', '.join(sorted(missing))}",
+                )
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, f"Expected {len(header)} columns, found {len(values)}"
+            continue
+        # Empty cells fall back to the schema defaults (remarks, payment_status).
+        yield row, {name: value for name, value in zip(header, values) if value != ""}
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def import_inventory_chunk(
+    db: Session,
+    *,
+    actor: User,
+    records: list[tuple[int, dict | str]],
+    state: ImportState,
+) -> None:
+    """Validate one chunk of rows, bulk-insert the good ones with their events, and record errors."""
+    parsed: list[tuple[int, InventoryCreate]] = []
+    for row, record in records:
+        if isinstance(record, str):
+            state.errors.append({"row": row, "error": record})
+            continue
+        try:
+            parsed.append((row, InventoryCreate.model_validate(record)))
+        except ValidationError as exc:
+            state.errors.append({"row": row, "error": _validation_message(exc)})
+    if not parsed:
+        return
+
+    product_ids = {item.product_id for _, item in parsed}
+    products = {
+        product.id: product for product in db.scalars(select(Product).where(Product.id.in_(product_ids)))
+    }
+    unknown_stores = {item.store_id for _, item in parsed} - state.stores.keys()
+    if unknown_stores:
+        found = {store.id: store for store in db.scalars(select(Store).where(Store.id.in_(unknown_stores)))}
+        state.stores.update({store_id: found.get(store_id) for store_id in unknown_stores})
+
+    accepted: list[InventoryCreate] = []
+    for row, item in parsed:
+        product = products.get(item.product_id)
+        store = state.stores[item.store_id]
+        error = None
+        if product is None:
+            error = "Product not found"
+        elif store is None:
+            error = "Store not found"
+        elif actor.role == "superuser" and store.merchant_id != actor.id:
+            error = "Store not in your account"
+        elif (
+            store.merchant_id is not None
+            and product.merchant_id is not None
+            and store.merchant_id != product.merchant_id
+        ):
+            error = "Product not in store account"
+        else:
+            try:
+                enforce_store_scope(actor, store.id)
+            except HTTPException as exc:
+                error = exc.detail
+        if error:
+            state.errors.append({"row": row, "error": error})
+        else:
+            accepted.append(item)
+    if not accepted:
+        return
+
+    now = utc_now()
+    inventory_rows = [
+        {
+            **item.model_dump(),
+            "payment_status": item.payment_status.value,
+            "created_by": actor.id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for item in accepted
+    ]
+    inventory_ids = db.scalars(
+        insert(Inventory).returning(Inventory.id, sort_by_parameter_order=True), inventory_rows
+    ).all()
+    for inventory_id, item in zip(inventory_ids, accepted):
+        record_inventory_event(
+            db,
+            inventory_id=inventory_id,
+            product_id=item.product_id,
+            store_id=item.store_id,
+            actor_id=actor.id,
+            event_type="created",
+            old_quantity_in_stock=None,
+            new_quantity_in_stock=item.quantity_in_stock,
+            old_payment_status=None,
+            new_payment_status=item.payment_status.value,
+            details=item.remarks,
+            created_at=now,
+        )
+
+    # Bulk inserts skip the per-row stock_levels listeners; apply the chunk's totals instead.
+    stock_deltas: Counter = Counter()
+    unpaid: Counter = Counter()
+    unpaid_units: Counter = Counter()
+    products_by_store: dict[int, set[int]] = defaultdict(set)
+    for item in accepted:
+        stock_deltas[(item.store_id, item.product_id)] += item.quantity_in_stock
+        products_by_store[item.store_id].add(item.product_id)
+        if item.payment_status.value == PaymentStatus.UNPAID.value:
+            unpaid[item.store_id] += 1
+            unpaid_units[item.store_id] += item.quantity_in_stock
+    adjust_stock_levels(db.connection(), stock_deltas)
+    state.imported += len(accepted)
+    _hold_import_alerts(db, state, unpaid, unpaid_units, products_by_store)
+
+
+def _hold_import_alerts(
+    db: Session, state: ImportState, unpaid: Counter, unpaid_units: Counter, products_by_store: dict[int, set[int]]
+) -> None:
+    """Fold a chunk's alerts into the import's held outbox row, so they commit with the chunk's rows."""
+    if state.outbox_id is not None:
+        state.unpaid.update(unpaid)
+        state.unpaid_units.update(unpaid_units)
+        for store_id, product_ids in products_by_store.items():
+            state.products_by_store[store_id] |= product_ids
+        held = hold_inventory_import_alerts(
+            db,
+            state.outbox_id,
+            unpaid_records=state.unpaid,
+            unpaid_units=state.unpaid_units,
+            products_by_store=state.products_by_store,
+        )
+        if held is not None:
+            return
+        # The hold lapsed and the earlier alerts went out; this chunk starts a new row.
+    state.unpaid, state.unpaid_units, state.products_by_store = unpaid, unpaid_units, products_by_store
+    state.outbox_id = hold_inventory_import_alerts(
+        db, None, unpaid_records=unpaid, unpaid_units=unpaid_units, products_by_store=products_by_store
+    )
@@ -0,0 +1,249 @@
+"""
+Pub/sub that pushes notification changes to open SSE streams.
+
+create_notification() and the read routes stage messages on the session;
+they are handed to the broker only after that session commits, so a
+rolled-back alert is never pushed. The broker forwards them through a
+backend and delivers what comes back to each subscribed stream's bounded
+queue on the event loop:
+
+- LocalBrokerBackend delivers within this process. It is the default, the
+  stand-in used by tests and enough for a single worker.
+- PostgresBrokerBackend sends messages with NOTIFY, packed into one JSON
+  array per payload and sent one at a time, and receives every worker's
+  messages with LISTEN, so a stream sees alerts written anywhere.
+
+A stream that falls queue_size messages behind is not waited for: its queue
+is replaced by an overflow marker and the stream tells the client to resync.
+
+Messages are dicts with user_id, event ("notification" or "read") and
+unread_delta, the change to the user's unread count.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import timezone
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.notification import Notification
+from app.schemas.notifications import NotificationResponse
+
+logger = logging.getLogger(__name__)
+
+STAGED_KEY = "notification_broker_staged"
+PENDING_KEY = "notification_broker_pending"
+OVERFLOW = None
+
+
+class LocalBrokerBackend:
+    """Delivers messages to this process's subscribers only."""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[list[dict]], None]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self, deliver: Callable[[list[dict]], None]) -> None:
+        self._deliver = deliver
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+    def publish(self, messages: list[dict]) -> None:
+        """Thread-safe: delivery always runs on the loop that started the backend."""
+        if self._deliver is not None and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, messages)
+
+
+class PostgresBrokerBackend:
+    """Fans messages out to every worker with Postgres LISTEN/NOTIFY on one asyncpg connection."""
+
+    channel = "myduka_notifications"
+    # NOTIFY payloads must be shorter than 8000 bytes; messages are packed into JSON arrays up to this size.
+    max_payload_bytes = 7900
+
+    def __init__(self, database_url: str):
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._connection = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._outgoing: deque[str] = deque()
+        self._sender: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Callable[[list[dict]], None]) -> None:
+        import asyncpg
+
+        self._loop = asyncio.get_running_loop()
+        self._connection = await asyncpg.connect(self.dsn)
+        await self._connection.add_listener(
+            self.channel, lambda connection, pid, channel, payload: deliver(json.loads(payload))
+        )
+
+    async def stop(self) -> None:
+        if self._sender is not None and not self._sender.done():
+            await self._sender
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    def publish(self, messages: list[dict]) -> None:
+        if self._connection is None or self._loop is None or self._loop.is_closed():
+            return
+        payloads = [json.dumps(message) for message in messages]
+        self._loop.call_soon_threadsafe(self._enqueue, payloads)
+
+    def _enqueue(self, payloads: list[str]) -> None:
+        self._outgoing.extend(payloads)
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.ensure_future(self._send())
+
+    async def _send(self) -> None:
+        # The only caller of execute() on the connection, so NOTIFYs never overlap
+        # (asyncpg allows one operation at a time per connection).
+        while self._outgoing and self._connection is not None:
+            batch = [self._outgoing.popleft()]
+            size = len(batch[0]) + 2
+            while self._outgoing and size + len(self._outgoing[0]) + 1 <= self.max_payload_bytes:
+                batch.append(self._outgoing.popleft())
+                size += len(batch[-1]) + 1
+            try:
+                await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, f"[{','.join(batch)}]")
+            except Exception:  # noqa: BLE001 - a lost push is recovered by the client's next resync
+                logger.exception("Could not publish %s notification message(s) (%s bytes)", len(batch), size)
+
+
+class Subscription:
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+
+class NotificationBroker:
+    def __init__(self, queue_size: int, backend=None):
+        self.queue_size = queue_size
+        self.backend = backend or LocalBrokerBackend()
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"published": 0, "delivered": 0, "overflows": 0}
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # First start, or a new event loop (tests): streams of an old loop are gone.
+        self._subscribers.clear()
+        try:
+            await self.backend.start(self._deliver)
+        except Exception:  # noqa: BLE001 - streams still work within this worker
+            logger.exception("%s failed to start; using LocalBrokerBackend", type(self.backend).__name__)
+            self.backend = LocalBrokerBackend()
+            await self.backend.start(self._deliver)
+        self._loop = loop
+
+    async def stop(self) -> None:
+        if self._loop is not None:
+            await self.backend.stop()
+            self._loop = None
+
+    async def subscribe(self, user_id: int) -> Subscription:
+        await self.start()
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscribers.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.user_id]
+
+    def publish(self, messages: list[dict]) -> None:
+        """Thread-safe; usually called by the after_commit listener below."""
+        if messages and self._loop is not None:
+            self.stats["published"] += len(messages)
+            self.backend.publish(messages)
+
+    def _deliver(self, messages: list[dict]) -> None:
+        for message in messages:
+            for subscription in tuple(self._subscribers.get(message["user_id"], ())):
+                try:
+                    subscription.queue.put_nowait(message)
+                    self.stats["delivered"] += 1
+                except asyncio.QueueFull:
+                    # Drop what is queued; the stream sends a resync and the client reloads.
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    subscription.queue.put_nowait(OVERFLOW)
+                    self.stats["overflows"] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "streams": sum(len(subscriptions) for subscriptions in self._subscribers.values()),
+            **self.stats,
+        }
+
+
+def _build_backend():
+    if settings.notification_broker_backend == "postgres":
+        return PostgresBrokerBackend(settings.database_url)
+    return LocalBrokerBackend()
+
+
+notification_broker = NotificationBroker(
+    queue_size=settings.notification_stream_queue_size,
+    backend=_build_backend(),
+)
+
+
+def stage_notification(db: Session, notification: Notification) -> None:
+    """Push a new (pending) or refreshed (persistent) notification once db commits."""
+    if notification.id is None:
+        db.info.setdefault(STAGED_KEY, []).append(notification)
+    else:
+        publish_after_commit(db, _notification_message(notification, unread_delta=0))
+
+
+def _notification_message(notification: Notification, unread_delta: int) -> dict:
+    data = NotificationResponse.model_validate(notification).model_dump()
+    for field in ("created_at", "read_at"):
+        # Same shape as GET /api/notifications/: naive UTC, as the column stores it.
+        if data[field] is not None and data[field].tzinfo is not None:
+            data[field] = data[field].astimezone(timezone.utc).replace(tzinfo=None)
+    return {
+        "user_id": notification.user_id,
+        "event": "notification",
+        "notification": json.loads(NotificationResponse(**data).model_dump_json()),
+        "unread_delta": unread_delta,
+    }
+
+
+def publish_after_commit(db, message: dict) -> None:
+    """Queue a broker message on a Session or AsyncSession; it is published if the session commits."""
+    db.info.setdefault(PENDING_KEY, []).append(message)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _serialize_staged(session, flush_context):
+    # Ids exist after the flush and rows cannot be read once committed, so serialize now.
+    for notification in session.info.pop(STAGED_KEY, ()):
+        if notification.id is not None:
+            publish_after_commit(session, _notification_message(notification, unread_delta=1))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    session.info.pop(STAGED_KEY, None)
+    notification_broker.publish(session.info.pop(PENDING_KEY, []))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_pending(session, previous_transaction):
+    session.info.pop(STAGED_KEY, None)
+    session.info.pop(PENDING_KEY, None)
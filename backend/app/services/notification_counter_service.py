@@ -0,0 +1,92 @@
+"""
+Consistency checks and repair for notification_counters.
+
+    python -m app.services.notification_counter_service           # report drift
+    python -m app.services.notification_counter_service --repair  # recount drifted users
+"""
+import argparse
+import sys
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.notification import Notification
+from app.models.notification_counter import NotificationCounter
+
+
+def find_unread_counter_drift(db: Session) -> list[dict]:
+    """Compare every counter with a fresh count of unread notifications and return the mismatches."""
+    actual = dict(
+        db.execute(
+            select(Notification.user_id, func.count(Notification.id))
+            .where(Notification.is_read.is_(False))
+            .group_by(Notification.user_id)
+        ).all()
+    )
+    recorded = dict(db.execute(select(NotificationCounter.user_id, NotificationCounter.unread_count)).all())
+    drift = []
+    for user_id in sorted(actual.keys() | recorded.keys()):
+        expected = actual.get(user_id, 0)
+        found = recorded.get(user_id)
+        if found is None and expected == 0:
+            continue
+        if found != expected:
+            drift.append({"user_id": user_id, "expected": expected, "recorded": found})
+    return drift
+
+
+def repair_unread_counters(db: Session | Connection, user_ids: list[int] | None = None) -> int:
+    """
+    Recount unread notifications for `user_ids` (every user when None) and
+    rewrite their counters; returns the number of counters written.
+    """
+    counters = delete(NotificationCounter)
+    unread = (
+        select(Notification.user_id, func.count(Notification.id), func.max(Notification.created_at))
+        .where(Notification.is_read.is_(False))
+        .group_by(Notification.user_id)
+    )
+    if user_ids is not None:
+        counters = counters.where(NotificationCounter.user_id.in_(user_ids))
+        unread = unread.where(Notification.user_id.in_(user_ids))
+    db.execute(counters)
+    result = db.execute(
+        insert(NotificationCounter).from_select(["user_id", "unread_count", "updated_at"], unread)
+    )
+    return result.rowcount
+
+
+def reconcile_unread_counters(db: Session) -> list[dict]:
+    """Find drifted counters and recount just those users in the caller's transaction."""
+    drift = find_unread_counter_drift(db)
+    if drift:
+        repair_unread_counters(db, [row["user_id"] for row in drift])
+    return drift
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repair", action="store_true", help="recount the users whose counters drifted")
+    args = parser.parse_args()
+
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        drift = find_unread_counter_drift(db)
+        for row in drift:
+            print(f"user {row['user_id']}: expected {row['expected']}, recorded {row['recorded']}")
+        print(f"{len(drift)} unread counter(s) out of step with notifications")
+        if drift and args.repair:
+            written = repair_unread_counters(db, [row["user_id"] for row in drift])
+            db.commit()
+            print(f"recounted {written} user(s)")
+            return
+    finally:
+        db.close()
+    sys.exit(1 if drift else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Background worker that drains the notification outbox.
+
+Started from the app lifespan. It wakes when a commit wrote outbox rows (or
+every NOTIFICATION_DISPATCH_INTERVAL_SECONDS), runs
+dispatch_notification_outbox() on a worker thread with its own session
+until the outbox is empty, and records lag and throughput for /metrics.
+Every NOTIFICATION_COUNTER_RECONCILE_MINUTES it also repairs unread
+notification counters that drifted from the notifications table.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.notification_outbox import NotificationOutbox
+from app.services import notification_counter_service, notification_service
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    def __init__(self, interval_seconds: float, reconcile_seconds: float = 0):
+        self.interval_seconds = interval_seconds
+        self.reconcile_seconds = reconcile_seconds
+        self.stats = {"batches": 0, "delivered": 0, "failed": 0, "errors": 0, "counters_repaired": 0}
+        self._last_reconcile = time.monotonic()
+        self.pending = 0
+        # Rows that used up their attempts; kept for inspection, not in pending or lag.
+        self.dead = 0
+        self.oldest_pending_age_seconds: Optional[float] = None
+        self.last_batch_ms: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        notification_service.outbox_listeners.append(self.wake)
+        self._task = asyncio.create_task(self._run(), name="notification-dispatcher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        if self.wake in notification_service.outbox_listeners:
+            notification_service.outbox_listeners.remove(self.wake)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def wake(self) -> None:
+        """Thread-safe: called after commits that wrote outbox rows."""
+        if self._loop is not None and self._wakeup is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def drain(self) -> int:
+        """Dispatch batches until the outbox has nothing deliverable; returns rows delivered."""
+        delivered = 0
+        failed_ids: set[int] = set()
+        db = SessionLocal()
+        try:
+            while True:
+                started = time.perf_counter()
+                # A row that failed in this pass waits for its backoff, not the next batch.
+                result = notification_service.dispatch_notification_outbox(db, skip_ids=failed_ids)
+                failed_ids.update(result["failed_ids"])
+                if not result["delivered"] and not result["failed"]:
+                    break
+                self.last_batch_ms = round((time.perf_counter() - started) * 1000, 2)
+                self.stats["batches"] += 1
+                self.stats["delivered"] += result["delivered"]
+                self.stats["failed"] += result["failed"]
+                delivered += result["delivered"]
+                if not result["delivered"]:
+                    break  # only failing rows left; retry them on the next pass
+            self._measure_backlog(db)
+        finally:
+            db.close()
+        return delivered
+
+    def _measure_backlog(self, db) -> None:
+        live = NotificationOutbox.dead_at.is_(None)
+        count, oldest, dead = db.execute(
+            select(
+                func.count(NotificationOutbox.id).filter(live),
+                func.min(NotificationOutbox.created_at).filter(live),
+                func.count(NotificationOutbox.id).filter(~live),
+            )
+        ).one()
+        self.pending = count
+        self.dead = dead
+        if oldest is None:
+            self.oldest_pending_age_seconds = None
+            return
+        if oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        self.oldest_pending_age_seconds = round((datetime.now(timezone.utc) - oldest).total_seconds(), 3)
+
+    def reconcile_counters(self) -> int:
+        """Recount the users whose unread counter drifted from their notifications; returns how many."""
+        db = SessionLocal()
+        try:
+            drift = notification_counter_service.reconcile_unread_counters(db)
+            db.commit()
+        finally:
+            db.close()
+        self._last_reconcile = time.monotonic()
+        if drift:
+            logger.warning("Repaired %s drifted unread notification counter(s)", len(drift))
+            self.stats["counters_repaired"] += len(drift)
+        return len(drift)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.drain)
+                if self.reconcile_seconds and time.monotonic() - self._last_reconcile >= self.reconcile_seconds:
+                    await asyncio.to_thread(self.reconcile_counters)
+            except Exception:  # noqa: BLE001 - keep the worker alive; the outbox keeps the rows
+                self.stats["errors"] += 1
+                logger.exception("Notification dispatch pass failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            "running": self.running,
+            "pending": self.pending,
+            "dead": self.dead,
+            "lag_seconds": self.oldest_pending_age_seconds,
+            "last_batch_ms": self.last_batch_ms,
+            **self.stats,
+        }
+
+
+notification_dispatcher = NotificationDispatcher(
+    interval_seconds=settings.notification_dispatch_interval_seconds,
+    reconcile_seconds=settings.notification_counter_reconcile_minutes * 60,
+)
@@ -1,17 +1,44 @@
 """
 Notification and inventory timeline helper functions.
+
+Alerts that go to a store's admins and merchant (supply requests pending,
+unpaid inventory, low stock, bulk imports) are not fanned out in the
+request: the notify_* helpers write one notification_outbox row in the
+caller's transaction, and dispatch_notification_outbox() - run by the
+background dispatcher - resolves recipients and thresholds and inserts the
+notifications later.
 """
+import json
+import logging
+from datetime import datetime, timedelta, timezone
 from typing import Iterable, Optional
 
+from sqlalchemy import delete, event, or_, select, update
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.models.inventory import Inventory
-from app.models.inventory_event import InventoryEvent
 from app.models.notification import Notification
+from app.models.notification_outbox import NotificationOutbox
 from app.models.store import Store
-from app.models.stock_threshold import StockThreshold
+from app.models.stock_level import StockLevel
 from app.models.user import User
+from app.services.event_writer import record_inventory_event
+from app.services.notification_broker import stage_notification
+from app.services.recipient_cache import recipient_cache
+from app.services.stock_level_service import get_stock_on_hand
+from app.services.threshold_cache import threshold_cache
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_WRITTEN_KEY = "notification_outbox_written"
+# Called after a commit that wrote outbox rows; the dispatcher sets it to wake itself.
+outbox_listeners: list = []
+# Alerts that repeat while their condition lasts; see _refresh_unread_alerts.
+COALESCED_CATEGORIES = {"low_stock", "unpaid_inventory"}
+# A streaming import's combined alert row is held this long after each chunk; if
+# the import stops part-way, the alerts for the rows it committed go out then.
+IMPORT_ALERT_HOLD_SECONDS = 60
 
 
 def create_inventory_event(
@@ -27,8 +54,9 @@ def create_inventory_event(
     old_payment_status: Optional[str] = None,
     new_payment_status: Optional[str] = None,
     details: Optional[str] = None,
-) -> InventoryEvent:
-    event = InventoryEvent(
+) -> None:
+    record_inventory_event(
+        db,
         inventory_id=inventory_id,
         product_id=product_id,
         store_id=store_id,
@@ -40,8 +68,6 @@ def create_inventory_event(
         new_payment_status=new_payment_status,
         details=details,
     )
-    db.add(event)
-    return event
 
 
 def create_notification(
@@ -63,37 +89,57 @@ def create_notification(
         message=message,
     )
     db.add(notification)
+    stage_notification(db, notification)
     return notification
 
 
-def _get_store_admins_and_superusers(db: Session, store_id: int) -> list[User]:
-    store = db.query(Store).filter(Store.id == store_id).first()
-    merchant_id = store.merchant_id if store else None
-    return (
-        db.query(User)
-        .filter(
-            User.is_active.is_(True),
-            ((User.role == "admin") & (User.store_id == store_id))
-            | ((User.role == "superuser") & (User.id == merchant_id)),
+def _store_recipient_ids(db: Session, store_id: int) -> tuple[int, ...]:
+    """Ids of the store's active admins and its merchant, from the recipient cache when possible."""
+    user_ids, version = recipient_cache.get(store_id)
+    if user_ids is not None:
+        return user_ids
+    merchant_id = select(Store.merchant_id).where(Store.id == store_id).scalar_subquery()
+    user_ids = tuple(
+        db.scalars(
+            select(User.id)
+            .where(
+                User.is_active.is_(True),
+                ((User.role == "admin") & (User.store_id == store_id))
+                | ((User.role == "superuser") & (User.id == merchant_id)),
+            )
+            .order_by(User.id)
         )
-        .all()
     )
+    recipient_cache.put(store_id, user_ids, version)
+    return user_ids
 
 
 def notify_users(
     db: Session,
     *,
-    users: Iterable[User],
+    user_ids: Iterable[int],
     category: str,
     title: str,
     message: str,
     store_id: Optional[int] = None,
     product_id: Optional[int] = None,
 ) -> None:
-    for user in users:
+    user_ids = list(user_ids)
+    if category in COALESCED_CATEGORIES and settings.notification_coalesce_window_minutes > 0:
+        refreshed = _refresh_unread_alerts(
+            db,
+            user_ids,
+            category=category,
+            title=title,
+            message=message,
+            store_id=store_id,
+            product_id=product_id,
+        )
+        user_ids = [user_id for user_id in user_ids if user_id not in refreshed]
+    for user_id in user_ids:
         create_notification(
             db,
-            user_id=user.id,
+            user_id=user_id,
             category=category,
             title=title,
             message=message,
@@ -102,6 +148,64 @@ def notify_users(
         )
 
 
+def _refresh_unread_alerts(
+    db: Session,
+    user_ids: list[int],
+    *,
+    category: str,
+    title: str,
+    message: str,
+    store_id: Optional[int],
+    product_id: Optional[int],
+) -> set[int]:
+    """
+    Fold a repeat alert into each user's unread alert with the same
+    (store, product, category) from the coalescing window, with one UPDATE.
+
+    The row takes the new title, message and time and counts the occurrence;
+    returns the users that had such a row, the rest need a new notification.
+    """
+    if not user_ids:
+        return set()
+    now = datetime.now(timezone.utc)
+    db.flush()  # alerts added earlier in this dispatch batch can be coalesced too
+    refreshed = db.scalars(
+        update(Notification)
+        .where(
+            Notification.user_id.in_(user_ids),
+            Notification.category == category,
+            Notification.store_id.is_(None) if store_id is None else Notification.store_id == store_id,
+            Notification.product_id.is_(None) if product_id is None else Notification.product_id == product_id,
+            Notification.is_read.is_(False),
+            Notification.created_at >= now - timedelta(minutes=settings.notification_coalesce_window_minutes),
+        )
+        .values(title=title, message=message, created_at=now, occurrences=Notification.occurrences + 1)
+        .returning(Notification)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    ).all()
+    for notification in refreshed:
+        stage_notification(db, notification)
+    return {notification.user_id for notification in refreshed}
+
+
+def enqueue_notification(db: Session, kind: str, **payload) -> None:
+    """Write one outbox row for the dispatcher; it commits with the caller's transaction."""
+    db.add(NotificationOutbox(kind=kind, payload=json.dumps(payload)))
+    db.info[OUTBOX_WRITTEN_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session):
+    if session.info.pop(OUTBOX_WRITTEN_KEY, False):
+        for listener in outbox_listeners:
+            listener()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_outbox_write(session, previous_transaction):
+    session.info.pop(OUTBOX_WRITTEN_KEY, None)
+
+
 def notify_supply_request_pending(
     db: Session,
     *,
@@ -110,10 +214,28 @@ def notify_supply_request_pending(
     quantity_requested: int,
     requested_by_name: str,
 ) -> None:
-    users = _get_store_admins_and_superusers(db, store_id)
+    enqueue_notification(
+        db,
+        "supply_request_pending",
+        store_id=store_id,
+        product_id=product_id,
+        quantity_requested=quantity_requested,
+        requested_by_name=requested_by_name,
+    )
+
+
+def _deliver_supply_request_pending(
+    db: Session,
+    *,
+    store_id: int,
+    product_id: int,
+    quantity_requested: int,
+    requested_by_name: str,
+) -> None:
+    user_ids = _store_recipient_ids(db, store_id)
     notify_users(
         db,
-        users=users,
+        user_ids=user_ids,
         category="pending_supply_request",
         title="Supply request pending approval",
         message=f"{requested_by_name} requested {quantity_requested} units.",
@@ -152,10 +274,22 @@ def notify_unpaid_inventory(
     product_id: int,
     quantity_in_stock: int,
 ) -> None:
-    users = _get_store_admins_and_superusers(db, store_id)
+    enqueue_notification(
+        db, "unpaid_inventory", store_id=store_id, product_id=product_id, quantity_in_stock=quantity_in_stock
+    )
+
+
+def _deliver_unpaid_inventory(
+    db: Session,
+    *,
+    store_id: int,
+    product_id: int,
+    quantity_in_stock: int,
+) -> None:
+    user_ids = _store_recipient_ids(db, store_id)
     notify_users(
         db,
-        users=users,
+        user_ids=user_ids,
         category="unpaid_inventory",
         title="Inventory marked unpaid",
         message=f"An inventory record with {quantity_in_stock} units is unpaid.",
@@ -164,42 +298,216 @@ def notify_unpaid_inventory(
     )
 
 
-def _get_threshold(db: Session, product_id: int, store_id: int) -> int:
-    store_specific = (
-        db.query(StockThreshold)
-        .filter(StockThreshold.product_id == product_id, StockThreshold.store_id == store_id)
-        .first()
-    )
-    if store_specific:
-        return store_specific.min_quantity
-
-    product_default = (
-        db.query(StockThreshold)
-        .filter(StockThreshold.product_id == product_id, StockThreshold.store_id.is_(None))
-        .first()
-    )
-    if product_default:
-        return product_default.min_quantity
-
-    return settings.low_stock_default_threshold
-
-
 def notify_low_stock_if_needed(
     db: Session,
     *,
     inventory: Inventory,
 ) -> None:
-    threshold = _get_threshold(db, inventory.product_id, inventory.store_id)
-    if inventory.quantity_in_stock > threshold:
+    """Queue a low-stock check for the batch's store and product; the dispatcher compares it to the threshold."""
+    enqueue_notification(db, "low_stock_check", store_id=inventory.store_id, product_id=inventory.product_id)
+
+
+def _deliver_low_stock_check(db: Session, *, store_id: int, product_id: int) -> None:
+    threshold = threshold_cache.resolve(db, store_id, product_id)
+    on_hand = get_stock_on_hand(db, store_id, product_id)
+    if on_hand > threshold:
         return
 
-    users = _get_store_admins_and_superusers(db, inventory.store_id)
+    user_ids = _store_recipient_ids(db, store_id)
     notify_users(
         db,
-        users=users,
+        user_ids=user_ids,
         category="low_stock",
         title="Low stock alert",
-        message=f"Product #{inventory.product_id} is at {inventory.quantity_in_stock} units (threshold {threshold}).",
-        store_id=inventory.store_id,
-        product_id=inventory.product_id,
+        message=f"Product #{product_id} is at {on_hand} units (threshold {threshold}).",
+        store_id=store_id,
+        product_id=product_id,
     )
+
+
+def _low_stock_products(db: Session, store_id: int, product_ids: set[int]) -> list[tuple[int, int, int]]:
+    """(product_id, on_hand, threshold) for each product at or below its threshold; thresholds come from the cache."""
+    on_hand = dict(
+        db.execute(
+            select(StockLevel.product_id, StockLevel.quantity_in_stock).where(
+                StockLevel.store_id == store_id, StockLevel.product_id.in_(product_ids)
+            )
+        ).all()
+    )
+    thresholds = threshold_cache.resolve_many(db, ((store_id, product_id) for product_id in product_ids))
+    low = []
+    for product_id in sorted(product_ids):
+        threshold = thresholds[(store_id, product_id)]
+        quantity = on_hand.get(product_id, 0)
+        if quantity <= threshold:
+            low.append((product_id, quantity, threshold))
+    return low
+
+
+def hold_inventory_import_alerts(
+    db: Session,
+    outbox_id: Optional[int],
+    *,
+    unpaid_records: dict[int, int],
+    unpaid_units: dict[int, int],
+    products_by_store: dict[int, set[int]],
+) -> Optional[int]:
+    """
+    Queue (outbox_id None) or rewrite an import's combined alert row in the
+    caller's transaction - one unpaid and one low-stock notification per store,
+    not one per row - due IMPORT_ALERT_HOLD_SECONDS from now. Returns the row
+    id, or None if the row was already picked up by the dispatcher.
+    """
+    payload = json.dumps(
+        {
+            "unpaid_records": [[store_id, count] for store_id, count in unpaid_records.items()],
+            "unpaid_units": [[store_id, units] for store_id, units in unpaid_units.items()],
+            "products_by_store": [
+                [store_id, sorted(product_ids)] for store_id, product_ids in products_by_store.items()
+            ],
+        }
+    )
+    due = datetime.now(timezone.utc) + timedelta(seconds=IMPORT_ALERT_HOLD_SECONDS)
+    if outbox_id is None:
+        row = NotificationOutbox(kind="inventory_import", payload=payload, next_attempt_at=due)
+        db.add(row)
+        db.flush()
+        return row.id
+    updated = db.execute(
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id == outbox_id, NotificationOutbox.attempts == 0)
+        .values(payload=payload, next_attempt_at=due)
+    ).rowcount
+    return outbox_id if updated else None
+
+
+def release_inventory_import_alerts(db: Session, outbox_id: int) -> None:
+    """The import finished: make its held alert row due now."""
+    db.execute(
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id == outbox_id, NotificationOutbox.attempts == 0)
+        .values(next_attempt_at=None)
+    )
+    db.info[OUTBOX_WRITTEN_KEY] = True
+
+
+def _deliver_inventory_import(
+    db: Session,
+    *,
+    unpaid_records: list[list[int]],
+    unpaid_units: list[list[int]],
+    products_by_store: list[list],
+) -> None:
+    # JSON object keys are strings; the payload keeps store ids as [id, value] pairs.
+    unpaid_records = dict(unpaid_records)
+    unpaid_units = dict(unpaid_units)
+    products_by_store = {store_id: set(product_ids) for store_id, product_ids in products_by_store}
+    for store_id in sorted(unpaid_records.keys() | products_by_store.keys()):
+        user_ids = _store_recipient_ids(db, store_id)
+        if unpaid_records.get(store_id):
+            notify_users(
+                db,
+                user_ids=user_ids,
+                category="unpaid_inventory",
+                title="Imported inventory unpaid",
+                message=(
+                    f"{unpaid_records[store_id]} imported inventory records "
+                    f"({unpaid_units.get(store_id, 0)} units) are unpaid."
+                ),
+                store_id=store_id,
+            )
+        low = _low_stock_products(db, store_id, products_by_store.get(store_id, set()))
+        if low:
+            listed = ", ".join(
+                f"#{product_id} ({quantity}/{threshold})" for product_id, quantity, threshold in low[:10]
+            )
+            more = f" and {len(low) - 10} more" if len(low) > 10 else ""
+            notify_users(
+                db,
+                user_ids=user_ids,
+                category="low_stock",
+                title="Low stock after import",
+                message=f"{len(low)} products are at or below their low-stock threshold: {listed}{more}.",
+                store_id=store_id,
+                product_id=low[0][0] if len(low) == 1 else None,
+            )
+
+
+DELIVERIES = {
+    "supply_request_pending": _deliver_supply_request_pending,
+    "unpaid_inventory": _deliver_unpaid_inventory,
+    "low_stock_check": _deliver_low_stock_check,
+    "inventory_import": _deliver_inventory_import,
+}
+
+
+def _deliver_outbox_rows(db: Session, rows) -> int:
+    delivered = 0
+    for row in rows:
+        # Claim by deleting: a row another dispatcher already took is skipped.
+        if db.execute(delete(NotificationOutbox).where(NotificationOutbox.id == row.id)).rowcount:
+            DELIVERIES[row.kind](db, **json.loads(row.payload))
+            delivered += 1
+    db.flush()
+    return delivered
+
+
+def dispatch_notification_outbox(db: Session, limit: Optional[int] = None, skip_ids: Iterable[int] = ()) -> dict:
+    """
+    Deliver up to `limit` due outbox rows, oldest first, leaving out `skip_ids`.
+
+    The batch is delivered and committed as one transaction. If any row
+    fails, the batch is retried one row per transaction so the others still
+    go out. The failing row keeps its attempt count and error and waits
+    NOTIFICATION_OUTBOX_RETRY_SECONDS, doubled per earlier failure, before its
+    next attempt. Its last allowed attempt (NOTIFICATION_OUTBOX_MAX_ATTEMPTS)
+    sets dead_at instead, which takes it out of the queue. The ids of rows
+    that failed are returned in failed_ids.
+    """
+    now = datetime.now(timezone.utc)
+    query = (
+        select(
+            NotificationOutbox.id, NotificationOutbox.kind, NotificationOutbox.payload, NotificationOutbox.attempts
+        )
+        .where(
+            NotificationOutbox.dead_at.is_(None),
+            or_(NotificationOutbox.next_attempt_at.is_(None), NotificationOutbox.next_attempt_at <= now),
+        )
+        .order_by(NotificationOutbox.id)
+        .limit(limit or settings.notification_dispatch_batch_size)
+    )
+    skip_ids = list(skip_ids)
+    if skip_ids:
+        query = query.where(NotificationOutbox.id.not_in(skip_ids))
+    rows = db.execute(query).all()
+    if not rows:
+        return {"delivered": 0, "failed": 0, "failed_ids": []}
+    try:
+        delivered = _deliver_outbox_rows(db, rows)
+        db.commit()
+        return {"delivered": delivered, "failed": 0, "failed_ids": []}
+    except Exception:  # noqa: BLE001 - isolate the failing row below
+        db.rollback()
+
+    delivered = 0
+    failed_ids = []
+    for row in rows:
+        try:
+            delivered += _deliver_outbox_rows(db, [row])
+            db.commit()
+        except Exception as exc:  # noqa: BLE001 - one bad row must not stop the others
+            db.rollback()
+            logger.exception("Notification outbox row %s (%s) failed", row.id, row.kind)
+            if row.attempts + 1 >= settings.notification_outbox_max_attempts:
+                retry = {"dead_at": now}
+            else:
+                delay = settings.notification_outbox_retry_seconds * 2**row.attempts
+                retry = {"next_attempt_at": now + timedelta(seconds=delay)}
+            db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id == row.id)
+                .values(attempts=NotificationOutbox.attempts + 1, last_error=str(exc)[:1000], **retry)
+            )
+            db.commit()
+            failed_ids.append(row.id)
+    return {"delivered": delivered, "failed": len(failed_ids), "failed_ids": failed_ids}
@@ -0,0 +1,102 @@
+"""
+In-process TTL/LRU cache of store alert recipients, keyed by store id.
+
+An entry is the ids of the store's active admins plus its merchant - the users
+that unpaid, low-stock and supply-request alerts fan out to. User and store
+routes invalidate the affected stores after committing; other workers see the
+change within the TTL. As in the principal cache, invalidation bumps a
+per-store version so a lookup that missed before the write cannot store ids it
+read before the write committed.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+
+
+class RecipientCache:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._versions: dict[int, int] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, store_id: int):
+        """Return (user_ids, version); user_ids is None on a miss and version is passed back to put()."""
+        with self._lock:
+            version = (self._generation, self._versions.get(store_id, 0))
+            entry = self._entries.get(store_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(store_id)
+                self.hits += 1
+                return entry[0], version
+            if entry is not None:
+                del self._entries[store_id]
+            self.misses += 1
+            return None, version
+
+    def put(self, store_id: int, user_ids: tuple[int, ...], version) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if (self._generation, self._versions.get(store_id, 0)) != version:
+                return
+            self._entries[store_id] = (user_ids, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(store_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, store_id: Optional[int]) -> None:
+        """Drop a store's recipients after a change; call once the change is committed."""
+        if store_id is None:
+            return
+        with self._lock:
+            self._versions[store_id] = self._versions.get(store_id, 0) + 1
+            self._entries.pop(store_id, None)
+            self.invalidations += 1
+
+    def invalidate_user(self, role: Optional[str], store_id: Optional[int]) -> None:
+        """Drop the stores a user receives alerts for; a merchant's span all their stores, so clear."""
+        if role == "superuser":
+            self.clear()
+            with self._lock:
+                self.invalidations += 1
+        elif role == "admin":
+            self.invalidate(store_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+recipient_cache = RecipientCache(
+    ttl_seconds=settings.recipient_cache_ttl_seconds,
+    max_entries=settings.recipient_cache_max_entries,
+)
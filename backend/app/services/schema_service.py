@@ -0,0 +1,95 @@
+"""Startup schema preparation keyed off the Alembic head revision."""
+import logging
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+
+from app.core.config import settings
+from app.core.database import Base, SessionLocal, engine
+from app.services.notification_counter_service import repair_unread_counters
+from app.services.seed_service import seed_demo_users
+from app.services.stock_level_service import rebuild_stock_levels
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+# The schema that the models' create_all produced before migrations ran at startup.
+PRE_SERIES_REVISION = "20260208_01"
+
+
+def _alembic_config() -> Config:
+    """Build an Alembic config without alembic.ini so app logging is left alone."""
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    config.set_main_option("sqlalchemy.url", settings.database_url)
+    return config
+
+
+def get_head_revision(config: Config | None = None) -> str | None:
+    """Return the newest migration revision shipped with the code."""
+    return ScriptDirectory.from_config(config or _alembic_config()).get_current_head()
+
+
+def get_database_revision() -> str | None:
+    """Return the revision stamped in the database, or None if never stamped."""
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def _patch_legacy_sqlite_columns() -> None:
+    """Add columns that pre-migration SQLite databases created by create_all lack."""
+    with engine.begin() as conn:
+        for table in ("stores", "products"):
+            columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})")).fetchall()}
+            if "merchant_id" not in columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN merchant_id INTEGER"))
+
+
+def prepare_database() -> str:
+    """
+    Bring the schema to the Alembic head and seed demo data when it was not already there.
+
+    Returns "current" when the database was already at head (no DDL, no seeding),
+    "upgraded" when pending migrations were applied - including to an unstamped
+    database whose tables create_all built before migrations ran at startup - or
+    "created" when an empty database was built from the models and stamped at head.
+    """
+    config = _alembic_config()
+    head = get_head_revision(config)
+    current = get_database_revision()
+    if current == head:
+        return "current"
+
+    if current is None and inspect(engine).has_table("users"):
+        # create_all never adds columns to existing tables, so replay the migrations from the pre-series schema.
+        logger.info("Stamping unstamped database at %s before upgrading", PRE_SERIES_REVISION)
+        if settings.database_driver == "sqlite":
+            _patch_legacy_sqlite_columns()
+        command.stamp(config, PRE_SERIES_REVISION)
+        current = PRE_SERIES_REVISION
+
+    if current is not None:
+        logger.info("Upgrading database schema from %s to %s", current, head)
+        command.upgrade(config, "head")
+        outcome = "upgraded"
+    else:
+        logger.info("Creating database schema and stamping %s", head)
+        Base.metadata.create_all(bind=engine)
+        # Derived tables must agree with whatever rows the database already holds.
+        with engine.begin() as conn:
+            rebuild_stock_levels(conn)
+            repair_unread_counters(conn)
+        command.stamp(config, "head")
+        outcome = "created"
+
+    if settings.seed_demo_users:
+        db = SessionLocal()
+        try:
+            seed_demo_users(db)
+        finally:
+            db.close()
+    return outcome
@@ -0,0 +1,139 @@
+"""
+Stock-on-hand lookups, backfill and consistency checks for stock_levels.
+
+    python -m app.services.stock_level_service           # report drift
+    python -m app.services.stock_level_service --repair  # rebuild from inventory
+"""
+import argparse
+import sys
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.inventory import Inventory
+from app.models.stock_level import StockLevel, utc_now
+
+
+def get_stock_on_hand(db: Session, store_id: int, product_id: int) -> int:
+    """Units of a product in a store, from its aggregate row; pending changes are flushed first."""
+    db.flush()
+    quantity = db.scalar(
+        select(StockLevel.quantity_in_stock).where(
+            StockLevel.store_id == store_id, StockLevel.product_id == product_id
+        )
+    )
+    return quantity or 0
+
+
+def reserve_stock(db: Session, store_id: int, product_id: int, quantity: int) -> bool:
+    """
+    Take `quantity` units off the aggregate if that many are on hand; False otherwise.
+
+    The check and the write are one conditional UPDATE, so two concurrent
+    callers can never both succeed against the same units. The updated row stays
+    locked until the transaction ends, which serializes stock decrements for one
+    product in one store (and nothing wider).
+    """
+    result = db.execute(
+        update(StockLevel)
+        .where(
+            StockLevel.store_id == store_id,
+            StockLevel.product_id == product_id,
+            StockLevel.quantity_in_stock >= quantity,
+        )
+        .values(quantity_in_stock=StockLevel.quantity_in_stock - quantity, updated_at=utc_now())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def find_stock_level_drift(db: Session) -> list[dict]:
+    """Compare every aggregate with a fresh sum over inventory and return the mismatches."""
+    actual = {
+        (row.store_id, row.product_id): int(row.total)
+        for row in db.execute(
+            select(Inventory.store_id, Inventory.product_id, func.sum(Inventory.quantity_in_stock).label("total"))
+            .group_by(Inventory.store_id, Inventory.product_id)
+        )
+    }
+    recorded = {
+        (row.store_id, row.product_id): row.quantity_in_stock
+        for row in db.execute(select(StockLevel.store_id, StockLevel.product_id, StockLevel.quantity_in_stock))
+    }
+    drift = []
+    for store_id, product_id in sorted(actual.keys() | recorded.keys()):
+        expected = actual.get((store_id, product_id), 0)
+        found = recorded.get((store_id, product_id))
+        if found is None and expected == 0:
+            continue
+        if found != expected:
+            drift.append(
+                {"store_id": store_id, "product_id": product_id, "expected": expected, "recorded": found}
+            )
+    return drift
+
+
+def rebuild_stock_levels(db: Session | Connection) -> int:
+    """Recompute every aggregate from the inventory table; returns the number of rows written."""
+    db.execute(delete(StockLevel))
+    result = db.execute(
+        insert(StockLevel).from_select(
+            ["store_id", "product_id", "quantity_in_stock", "updated_at"],
+            select(
+                Inventory.store_id,
+                Inventory.product_id,
+                func.sum(Inventory.quantity_in_stock),
+                func.coalesce(func.max(Inventory.updated_at), utc_now()),
+            ).group_by(Inventory.store_id, Inventory.product_id),
+        )
+    )
+    return result.rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repair", action="store_true", help="rebuild stock_levels when drift is found")
+    args = parser.parse_args()
+
+    from app.core.database import SessionLocal
+    from app.models import (  # noqa: F401  register every mapper the relationships refer to
+        expense,
+        inventory_event,
+        notification,
+        notification_counter,
+        notification_outbox,
+        product,
+        purchase_order,
+        refresh_token,
+        return_request,
+        sale,
+        stock_threshold,
+        stock_transfer,
+        store,
+        supplier,
+        supply_request,
+        user,
+    )
+
+    db = SessionLocal()
+    try:
+        drift = find_stock_level_drift(db)
+        for row in drift:
+            print(
+                f"store {row['store_id']} product {row['product_id']}: "
+                f"expected {row['expected']}, recorded {row['recorded']}"
+            )
+        print(f"{len(drift)} stock level(s) out of step with inventory")
+        if drift and args.repair:
+            written = rebuild_stock_levels(db)
+            db.commit()
+            print(f"rebuilt {written} stock level(s)")
+            return
+    finally:
+        db.close()
+    sys.exit(1 if drift else 0)
+
+
+if __name__ == "__main__":
+    main()
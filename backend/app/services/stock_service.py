@@ -1,13 +1,19 @@
 """
 Helpers for adjusting inventory with timeline events.
 """
+from collections import Counter
 from datetime import datetime, timezone
 
 from fastapi import HTTPException, status
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models.inventory import Inventory
-from app.models.inventory_event import InventoryEvent
+from app.models.stock_level import adjust_stock_levels
+from app.services.depletion import DepletionStrategy, strategy_for_store
+from app.services.event_writer import record_inventory_event
+from app.services.stock_level_service import reserve_stock
 
 
 def utc_now():
@@ -39,26 +45,85 @@ def increase_stock(
         remarks=details,
     )
     db.add(inventory)
-    db.flush()
+    record_inventory_event(
+        db,
+        inventory=inventory,
+        product_id=product_id,
+        store_id=store_id,
+        actor_id=actor_id,
+        event_type=event_type,
+        old_quantity_in_stock=0,
+        new_quantity_in_stock=quantity,
+        old_payment_status=None,
+        new_payment_status=payment_status,
+        details=details,
+    )
+    return inventory
+
+
+def receive_stock(
+    db: Session,
+    store_id: int,
+    lines: list[dict],
+    actor_id: int,
+    event_type: str,
+    details: str | None = None,
+    payment_status: str = "unpaid",
+) -> list[int]:
+    """
+    Add one inventory batch per line in a single multi-row INSERT and return their ids.
 
-    db.add(
-        InventoryEvent(
-            inventory_id=inventory.id,
-            product_id=product_id,
+    Each line holds product_id, quantity, buying_price and selling_price. This
+    is increase_stock() for many lines at once: the events go through the
+    batched writer and stock_levels is adjusted in one upsert, since bulk
+    inserts skip the per-row listeners.
+    """
+    if not lines:
+        return []
+    now = utc_now()
+    inventory_ids = db.scalars(
+        insert(Inventory).returning(Inventory.id, sort_by_parameter_order=True),
+        [
+            {
+                "product_id": line["product_id"],
+                "store_id": store_id,
+                "created_by": actor_id,
+                "quantity_received": line["quantity"],
+                "quantity_in_stock": line["quantity"],
+                "quantity_spoilt": 0,
+                "payment_status": payment_status,
+                "buying_price": line["buying_price"],
+                "selling_price": line["selling_price"],
+                "remarks": details,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for line in lines
+        ],
+    ).all()
+
+    stock_deltas: Counter = Counter()
+    for inventory_id, line in zip(inventory_ids, lines):
+        stock_deltas[(store_id, line["product_id"])] += line["quantity"]
+        record_inventory_event(
+            db,
+            inventory_id=inventory_id,
+            product_id=line["product_id"],
             store_id=store_id,
             actor_id=actor_id,
             event_type=event_type,
             old_quantity_in_stock=0,
-            new_quantity_in_stock=quantity,
+            new_quantity_in_stock=line["quantity"],
             old_payment_status=None,
             new_payment_status=payment_status,
             details=details,
+            created_at=now,
         )
-    )
-    return inventory
+    adjust_stock_levels(db.connection(), stock_deltas)
+    return inventory_ids
 
 
-def decrease_stock(
+def deplete_stock(
     db: Session,
     store_id: int,
     product_id: int,
@@ -66,44 +131,85 @@ def decrease_stock(
     actor_id: int,
     event_type: str,
     details: str | None = None,
-):
-    records = (
-        db.query(Inventory)
-        .filter(
-            Inventory.store_id == store_id,
-            Inventory.product_id == product_id,
-            Inventory.quantity_in_stock > 0,
-        )
-        .order_by(Inventory.updated_at.desc())
-        .all()
-    )
-    total_available = sum(record.quantity_in_stock for record in records)
-    if total_available < quantity:
+    strategy: DepletionStrategy | None = None,
+) -> list[dict]:
+    """
+    Deplete `quantity` units from a store's batches of a product and return
+    the InventoryEvent rows describing it for the caller to write.
+
+    Batches are consumed in the order of `strategy`, by default the one the
+    store's merchant chose (see app.services.depletion); only the batches
+    needed to cover the quantity are read.
+
+    Units are claimed on the stock_levels aggregate first (reserve_stock), so
+    concurrent sales and transfers cannot oversell. Each batch is then
+    decremented with a conditional UPDATE; if a concurrent inventory edit
+    changed a batch after it was read, the batches are re-read, up to
+    STOCK_DECREMENT_MAX_RETRIES times.
+    """
+    db.flush()
+    if not reserve_stock(db, store_id, product_id, quantity):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Insufficient stock for this operation",
         )
 
+    strategy = strategy or strategy_for_store(db, store_id)
+    events: list[dict] = []
     remaining = quantity
-    for record in records:
-        if remaining <= 0:
-            break
-        take = min(record.quantity_in_stock, remaining)
-        old_qty = record.quantity_in_stock
-        record.quantity_in_stock = old_qty - take
-        record.updated_at = utc_now()
-        db.add(
-            InventoryEvent(
-                inventory_id=record.id,
-                product_id=record.product_id,
-                store_id=record.store_id,
-                actor_id=actor_id,
-                event_type=event_type,
-                old_quantity_in_stock=old_qty,
-                new_quantity_in_stock=record.quantity_in_stock,
-                old_payment_status=record.payment_status,
-                new_payment_status=record.payment_status,
-                details=details,
+    for _ in range(settings.stock_decrement_max_retries + 1):
+        batches = db.execute(strategy.batches_needed(store_id, product_id, remaining)).all()
+        if sum(batch.quantity_in_stock for batch in batches) < remaining:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient stock for this operation",
             )
-        )
-        remaining -= take
+
+        for batch in batches:
+            take = min(batch.quantity_in_stock, remaining)
+            # Bulk UPDATE: the aggregate was already adjusted by reserve_stock, so the
+            # per-row stock_levels listeners must not run again here.
+            new_qty = db.scalar(
+                update(Inventory)
+                .where(Inventory.id == batch.id, Inventory.quantity_in_stock >= take)
+                .values(quantity_in_stock=Inventory.quantity_in_stock - take, updated_at=utc_now())
+                .returning(Inventory.quantity_in_stock)
+            )
+            if new_qty is None:
+                break  # changed since it was read; re-read the batches
+            events.append(
+                {
+                    "inventory_id": batch.id,
+                    "product_id": product_id,
+                    "store_id": store_id,
+                    "actor_id": actor_id,
+                    "event_type": event_type,
+                    "old_quantity_in_stock": new_qty + take,
+                    "new_quantity_in_stock": new_qty,
+                    "old_payment_status": batch.payment_status,
+                    "new_payment_status": batch.payment_status,
+                    "details": details,
+                }
+            )
+            remaining -= take
+            if remaining == 0:
+                return events
+
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Stock changed while recording this operation, please retry",
+    )
+
+
+def decrease_stock(
+    db: Session,
+    store_id: int,
+    product_id: int,
+    quantity: int,
+    actor_id: int,
+    event_type: str,
+    details: str | None = None,
+):
+    """Deplete stock as deplete_stock() does and buffer its timeline events for the transaction."""
+    for event in deplete_stock(db, store_id, product_id, quantity, actor_id, event_type, details):
+        record_inventory_event(db, **event)
@@ -0,0 +1,150 @@
+"""
+In-process cache of low-stock thresholds, one map per merchant.
+
+A merchant's map holds every StockThreshold row for their products and for
+shared products (merchant_id NULL, which any store may stock), keyed by
+(product_id, store_id or None), so resolving a (store, product) threshold -
+store-specific, then the product default, then settings - needs no query.
+
+Cross-worker invalidation uses users.threshold_version: upsert_product_threshold
+bumps it in the threshold's transaction (every store merchant's, for a shared
+product). A worker re-reads a store's merchant
+and version (one primary-key join) once its copy is older than
+threshold_cache_check_seconds and reloads the map if the version moved. The
+worker that made the change also drops its copy straight away.
+"""
+import threading
+import time
+from typing import Iterable, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.product import Product
+from app.models.stock_threshold import StockThreshold
+from app.models.store import Store
+from app.models.user import User
+
+
+class _MerchantThresholds:
+    __slots__ = ("version", "thresholds")
+
+    def __init__(self, version: Optional[int], thresholds: dict):
+        self.version = version
+        self.thresholds = thresholds
+
+
+class ThresholdCache:
+    def __init__(self, check_seconds: float, default_threshold: int):
+        self.check_seconds = check_seconds
+        self.default_threshold = default_threshold
+        # store_id -> (merchant_id, monotonic time the merchant's version was last checked)
+        self._stores: dict[int, tuple[Optional[int], float]] = {}
+        self._merchants: dict[Optional[int], _MerchantThresholds] = {}
+        # Bumped by invalidate() so a load that began before it is not stored.
+        self._generations: dict[Optional[int], int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.checks = 0
+        self.loads = 0
+        self.invalidations = 0
+
+    def resolve(self, db: Session, store_id: int, product_id: int) -> int:
+        """The low-stock threshold for a product in a store."""
+        return self.resolve_many(db, [(store_id, product_id)])[(store_id, product_id)]
+
+    def resolve_many(self, db: Session, pairs: Iterable[tuple[int, int]]) -> dict[tuple[int, int], int]:
+        """Thresholds for many (store_id, product_id) pairs; at most two queries per stale store."""
+        by_store: dict[int, list[int]] = {}
+        for store_id, product_id in pairs:
+            by_store.setdefault(store_id, []).append(product_id)
+
+        resolved = {}
+        for store_id, product_ids in by_store.items():
+            thresholds = self._thresholds_for_store(db, store_id)
+            for product_id in product_ids:
+                resolved[(store_id, product_id)] = thresholds.get(
+                    (product_id, store_id), thresholds.get((product_id, None), self.default_threshold)
+                )
+        return resolved
+
+    def _thresholds_for_store(self, db: Session, store_id: int) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            store = self._stores.get(store_id)
+            if store is not None and now - store[1] < self.check_seconds:
+                entry = self._merchants.get(store[0])
+                if entry is not None:
+                    self.hits += 1
+                    return entry.thresholds
+            self.checks += 1
+
+        row = db.execute(
+            select(Store.merchant_id, User.threshold_version)
+            .outerjoin(User, User.id == Store.merchant_id)
+            .where(Store.id == store_id)
+        ).first()
+        merchant_id, version = row if row is not None else (None, None)
+
+        with self._lock:
+            entry = self._merchants.get(merchant_id)
+            # No version stamp (store without a merchant) means there is nothing to compare: reload.
+            if entry is not None and version is not None and entry.version == version:
+                self._stores[store_id] = (merchant_id, now)
+                return entry.thresholds
+            generation = self._generations.get(merchant_id, 0)
+
+        thresholds = self._load(db, merchant_id)
+        with self._lock:
+            self.loads += 1
+            if self._generations.get(merchant_id, 0) == generation:
+                self._merchants[merchant_id] = _MerchantThresholds(version, thresholds)
+                self._stores[store_id] = (merchant_id, now)
+        return thresholds
+
+    @staticmethod
+    def _load(db: Session, merchant_id: Optional[int]) -> dict:
+        owner = Product.merchant_id.is_(None)
+        if merchant_id is not None:
+            owner = or_(Product.merchant_id == merchant_id, owner)
+        thresholds: dict = {}
+        for product_id, store_id, min_quantity in db.execute(
+            select(StockThreshold.product_id, StockThreshold.store_id, StockThreshold.min_quantity)
+            .join(Product, Product.id == StockThreshold.product_id)
+            .where(owner)
+            .order_by(StockThreshold.id)
+        ):
+            thresholds.setdefault((product_id, store_id), min_quantity)
+        return thresholds
+
+    def invalidate(self, merchant_id: Optional[int]) -> None:
+        """Drop a merchant's thresholds after a change; call once the change is committed."""
+        with self._lock:
+            self._generations[merchant_id] = self._generations.get(merchant_id, 0) + 1
+            self._merchants.pop(merchant_id, None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for merchant_id in self._merchants:
+                self._generations[merchant_id] = self._generations.get(merchant_id, 0) + 1
+            self._merchants.clear()
+            self._stores.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "merchants": len(self._merchants),
+                "stores": len(self._stores),
+                "hits": self.hits,
+                "version_checks": self.checks,
+                "loads": self.loads,
+                "invalidations": self.invalidations,
+            }
+
+
+threshold_cache = ThresholdCache(
+    check_seconds=settings.threshold_cache_check_seconds,
+    default_threshold=settings.low_stock_default_threshold,
+)
@@ -9,12 +9,16 @@ ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from app.core.database import Base, SessionLocal, engine
+from app.core.database import Base, SessionLocal, async_engine, engine
+from app.core.principal_cache import principal_cache
 from app.core.security import create_access_token, hash_password
+from app.services.recipient_cache import recipient_cache
+from app.services.threshold_cache import threshold_cache
 from app.models.user import User
 from main import app
 
 engine.echo = False
+async_engine.echo = False
 
 
 @pytest.fixture
@@ -27,6 +31,9 @@ def reset_db():
     """Give each test a clean sqlite database."""
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    principal_cache.clear()
+    threshold_cache.clear()
+    recipient_cache.clear()
     yield
 
 
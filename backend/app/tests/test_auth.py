@@ -1,5 +1,22 @@
+import json
+import logging
+
 import pytest
+from alembic import command
+from sqlalchemy import inspect, text
+
+from app.core.access_log import AccessLog
+from app.core.config import settings
+from app.core.database import Base, engine
+from app.core.request_metrics import RequestMetrics, RequestStats, render_prometheus
 from app.models.store import Store
+from app.models.user import User
+from app.services.schema_service import (
+    PRE_SERIES_REVISION,
+    _alembic_config,
+    get_head_revision,
+    prepare_database,
+)
 
 pytestmark = pytest.mark.anyio
 
@@ -11,6 +28,156 @@ async def test_health_check_returns_healthy(client):
     assert response.json()["status"] == "healthy"
 
 
+async def test_startup_skips_schema_work_once_database_is_at_head(db, monkeypatch):
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    monkeypatch.setattr(settings, "seed_demo_users", True)
+
+    assert prepare_database() == "created"
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar() == get_head_revision()
+    seeded = db.query(User).count()
+    assert seeded > 0
+
+    db.query(User).delete()
+    db.commit()
+    assert prepare_database() == "current"
+    assert db.query(User).count() == 0
+
+
+async def test_startup_upgrades_unstamped_database_built_before_migrations(db, monkeypatch):
+    # Shape the database like one the models' import-time create_all built before this series, without a stamp.
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    command.upgrade(_alembic_config(), PRE_SERIES_REVISION)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE alembic_version"))
+    assert "depletion_strategy" not in {column["name"] for column in inspect(engine).get_columns("users")}
+    monkeypatch.setattr(settings, "seed_demo_users", True)
+
+    assert prepare_database() == "upgraded"
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar() == get_head_revision()
+    schema = inspect(engine)
+    assert {"depletion_strategy", "threshold_version"} <= {column["name"] for column in schema.get_columns("users")}
+    assert "quantity_received" in {column["name"] for column in schema.get_columns("purchase_order_items")}
+    assert "occurrences" in {column["name"] for column in schema.get_columns("notifications")}
+    assert db.query(User).count() > 0
+    assert prepare_database() == "current"
+
+
+async def test_metrics_expose_pool_telemetry(client, user_factory, auth_headers):
+    admin = user_factory(role="admin")
+    await client.get("/api/notifications/unread-count", headers=auth_headers(admin))
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    pools = response.json()["db_pool"]
+    assert set(pools) == {"primary", "async"}
+    assert pools["async"]["checkouts_total"] >= 1
+    for stats in pools.values():
+        assert {"checked_out", "overflow", "wait_ms_avg", "wait_ms_max", "checkout_timeouts"} <= set(stats)
+
+
+async def test_metrics_report_route_latency_and_sql_cost(client, user_factory, auth_headers):
+    admin = user_factory(role="admin")
+    for _ in range(3):
+        await client.get("/api/notifications/unread-count", headers=auth_headers(admin))
+
+    routes = (await client.get("/metrics")).json()["http"]["routes"]
+    unread = routes["GET /api/notifications/unread-count"]
+    assert unread["count"] >= 3
+    assert unread["sql_statements_avg"] >= 1
+    assert 0 < unread["p50_ms"] <= unread["p95_ms"] <= unread["p99_ms"]
+
+    response = await client.get("/metrics/prometheus")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'myduka_http_request_duration_seconds_count{method="GET",route="/api/notifications/unread-count"}' in response.text
+    assert "# TYPE myduka_db_time_seconds_total counter" in response.text
+
+
+def test_request_metrics_merge_state_from_other_workers(tmp_path):
+    other_worker = RequestMetrics(metrics_dir=None, flush_interval_seconds=1.0)
+    for duration_ms in (3, 40, 40, 700):
+        other_worker.start()
+        other_worker.finish("GET", "/api/sales/", 200, duration_ms, RequestStats(sql_statements=2, db_time_ms=1.5))
+    state = other_worker._local_state()
+    state["pid"] = 999_999_999
+    (tmp_path / "http-999999999.json").write_text(json.dumps(state))
+
+    this_worker = RequestMetrics(metrics_dir=str(tmp_path), flush_interval_seconds=1.0)
+    this_worker.start()
+    this_worker.finish("GET", "/api/sales/", 500, 8, RequestStats(sql_statements=1))
+
+    sales = this_worker.aggregate()["routes"]["GET /api/sales/"]
+    assert sales["count"] == 5
+    assert sales["errors"] == 1
+    assert sales["sql_statements"] == 9
+    assert sum(sales["buckets"]) == 5
+    assert 'le="+Inf"} 5' in render_prometheus(this_worker.aggregate())
+
+
+class _CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(json.loads(self.format(record)))
+
+
+def test_access_log_samples_success_but_keeps_errors_and_slow_requests():
+    handler = _CollectingHandler()
+    log = AccessLog(enabled=True, slow_ms=500, sample_rates={2: 0.0, 3: 0.0}, queue_size=100, handler=handler)
+
+    log.log_request(200, 12.0, lambda: {"path": "/fast"})
+    log.log_request(200, 800.0, lambda: {"path": "/slow"})
+    log.log_request(404, 3.0, lambda: {"path": "/missing"})
+    log.log_request(500, 3.0, lambda: {"path": "/broken"})
+    log.stop()
+
+    assert [line["path"] for line in handler.lines] == ["/slow", "/missing", "/broken"]
+    assert log.snapshot()["sampled_out"] == 1
+
+    disabled = AccessLog(enabled=False, slow_ms=500, sample_rates={}, queue_size=100, handler=handler)
+    disabled.log_request(500, 3.0, lambda: pytest.fail("entry built while disabled"))
+    assert disabled.snapshot()["enqueued"] == 0
+
+
+
+def test_access_log_writes_through_the_configured_access_logger():
+    access_logger = logging.getLogger("myduka.access")
+    kept, filtered = _CollectingHandler(), _CollectingHandler()
+    filtered.setLevel(logging.WARNING)
+    access_logger.addHandler(kept)
+    access_logger.addHandler(filtered)
+    try:
+        log = AccessLog(enabled=True, slow_ms=500, sample_rates={}, queue_size=100)
+        log.log_request(404, 3.0, lambda: {"path": "/missing"})
+        log.stop()
+    finally:
+        access_logger.removeHandler(kept)
+        access_logger.removeHandler(filtered)
+
+    assert kept.lines == [{"path": "/missing"}]
+    assert filtered.lines == []
+    assert not any(isinstance(handler, logging.StreamHandler) for handler in access_logger.handlers)
+
+def test_access_log_drops_instead_of_blocking_when_queue_is_full():
+    log = AccessLog(enabled=True, slow_ms=500, sample_rates={}, queue_size=2, handler=_CollectingHandler())
+    log._listener = object()  # keep the listener from draining the queue
+
+    for _ in range(5):
+        log.log_request(200, 1.0, lambda: {"path": "/"})
+
+    assert log.snapshot()["enqueued"] == 2
+    assert log.snapshot()["dropped"] == 3
+
+
 async def test_register_then_login_and_get_me(client):
     email = "merchant@myduka.com"
 
@@ -130,3 +297,30 @@ async def test_superuser_can_invite_admin_and_register_with_token(client, db, us
     assert register.status_code == 200, register.text
     assert register.json()["user"]["role"] == "admin"
     assert register.json()["user"]["store_id"] == store.id
+
+
+async def test_principal_cache_serves_repeat_requests_and_drops_deactivated_users(
+    client, user_factory, auth_headers
+):
+    admin = user_factory(role="admin")
+    clerk = user_factory(role="clerk")
+    before = (await client.get("/metrics")).json()["principal_cache"]
+
+    first = await client.get("/api/auth/me", headers=auth_headers(clerk))
+    second = await client.get("/api/auth/me", headers=auth_headers(clerk))
+    assert first.status_code == second.status_code == 200
+    stats = (await client.get("/metrics")).json()["principal_cache"]
+    assert stats["misses"] - before["misses"] == 1
+    assert stats["hits"] - before["hits"] == 1
+
+    response = await client.patch(
+        f"/api/users/{clerk.id}/deactivate",
+        json={"is_active": False},
+        headers=auth_headers(admin),
+    )
+    assert response.status_code == 200
+
+    blocked = await client.get("/api/auth/me", headers=auth_headers(clerk))
+    assert blocked.status_code == 403
+    after = (await client.get("/metrics")).json()["principal_cache"]
+    assert after["invalidations"] - before["invalidations"] == 1
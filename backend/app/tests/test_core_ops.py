@@ -1,9 +1,20 @@
 import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
 
+from app.core.database import Base, async_engine, engine
+from app.core.query_log import QueryLog, fingerprint
+from app.models.sale import Sale
+from benchmarks.datagen import GeneratorConfig, generate
 from app.models.inventory import Inventory
+from app.models.inventory_event import InventoryEvent
+from app.models.notification_counter import NotificationCounter
 from app.models.product import Product
+from app.models.purchase_order import PurchaseOrder
+from app.models.stock_level import StockLevel
 from app.models.store import Store
 from app.models.supplier import Supplier
+from app.services.notification_counter_service import find_unread_counter_drift
 
 
 @pytest.mark.anyio
@@ -71,3 +82,214 @@ async def test_receive_purchase_order_creates_inventory(client, db, user_factory
 
     inventory = db.query(Inventory).filter(Inventory.product_id == product.id).all()
     assert sum(item.quantity_in_stock for item in inventory) == 5
+
+
+@pytest.mark.anyio
+async def test_purchase_order_partial_receipts_insert_batches_in_bulk(client, db, user_factory, auth_headers):
+    store = Store(name="Receiving Store", location="Eldoret")
+    products = [
+        Product(name=f"Bulk Item {i}", sku=f"PO-BULK-{i}", buying_price=40, selling_price=60) for i in range(3)
+    ]
+    db.add_all([store, *products])
+    db.commit()
+    supplier = Supplier(name="Bulk Supplier", store_id=store.id)
+    db.add(supplier)
+    db.commit()
+    admin = user_factory(role="admin", store_id=store.id)
+    headers = auth_headers(admin)
+
+    created = await client.post(
+        "/api/purchase-orders/",
+        json={
+            "supplier_id": supplier.id,
+            "store_id": store.id,
+            "items": [{"product_id": product.id, "quantity": 10, "unit_cost": 40} for product in products],
+        },
+        headers=headers,
+    )
+    order = created.json()
+    items = order["items"]
+    receive_url = f"/api/purchase-orders/{order['id']}/receive"
+
+    too_many = await client.post(
+        receive_url, json={"lines": [{"item_id": items[0]["id"], "quantity": 11}]}, headers=headers
+    )
+    assert too_many.status_code == 400
+    foreign = await client.post(receive_url, json={"lines": [{"item_id": 999999, "quantity": 1}]}, headers=headers)
+    assert foreign.status_code == 404
+
+    partial = await client.post(
+        receive_url,
+        json={"lines": [{"item_id": items[0]["id"], "quantity": 4}, {"item_id": items[1]["id"], "quantity": 10}]},
+        headers=headers,
+    )
+    assert partial.status_code == 200
+    assert partial.json()["status"] == "partially_received"
+    assert [item["quantity_received"] for item in partial.json()["items"]] == [4, 10, 0]
+    assert partial.json()["received_at"] is None
+
+    rest = await client.post(f"/api/purchase-orders/{order['id']}/status", json={"status": "received"}, headers=headers)
+    assert rest.status_code == 200
+    assert rest.json()["status"] == "received"
+    assert [item["quantity_received"] for item in rest.json()["items"]] == [10, 10, 10]
+    again = await client.post(receive_url, json={}, headers=headers)
+    assert again.status_code == 400
+
+    db.expire_all()
+    batches = db.query(Inventory.product_id, Inventory.quantity_in_stock).order_by(Inventory.id).all()
+    assert [tuple(batch) for batch in batches] == [
+        (products[0].id, 4),
+        (products[1].id, 10),
+        (products[0].id, 6),
+        (products[2].id, 10),
+    ]
+    events = db.query(func.count(InventoryEvent.id)).filter(InventoryEvent.event_type == "purchase_order_received")
+    assert events.scalar() == 4
+    assert [db.get(StockLevel, (store.id, product.id)).quantity_in_stock for product in products] == [10, 10, 10]
+
+
+@pytest.mark.anyio
+async def test_create_purchase_order_resolves_products_in_one_query(client, db, user_factory, auth_headers):
+    store = Store(name="Wholesale Store", location="Thika")
+    products = [Product(name=f"Line {i}", sku=f"PO-LINE-{i}", buying_price=10, selling_price=15) for i in range(60)]
+    foreign = Product(name="Other Account", sku="PO-FOREIGN", buying_price=10, selling_price=15, merchant_id=999)
+    db.add_all([store, foreign, *products])
+    db.commit()
+    store.merchant_id = user_factory(email="po-owner@myduka.com", role="superuser").id
+    supplier = Supplier(name="Wholesale Supplier", store_id=store.id)
+    db.add(supplier)
+    db.commit()
+    headers = auth_headers(user_factory(role="admin", store_id=store.id))
+    product_ids = [product.id for product in products]
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def order(product_ids):
+        return {
+            "supplier_id": supplier.id,
+            "store_id": store.id,
+            "items": [{"product_id": product_id, "quantity": 2, "unit_cost": 10} for product_id in product_ids],
+        }
+
+    # The first request also warms per-process caches; compare two warm requests.
+    await client.post("/api/purchase-orders/", json=order(product_ids[:1]), headers=headers)
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        small = await client.post("/api/purchase-orders/", json=order(product_ids[:1]), headers=headers)
+        small_count = len(statements)
+        statements.clear()
+        large = await client.post("/api/purchase-orders/", json=order(product_ids), headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert small.status_code == large.status_code == 200
+    assert len(statements) == small_count
+    assert len(large.json()["items"]) == 60
+    assert large.json()["total_cost"] == 60 * 2 * 10
+    assert large.json()["items"][0]["unit_price"] == 15
+
+    missing = await client.post("/api/purchase-orders/", json=order([product_ids[0], 987654]), headers=headers)
+    assert missing.status_code == 404
+    assert "987654" in missing.json()["detail"]
+    wrong_account = await client.post("/api/purchase-orders/", json=order([foreign.id]), headers=headers)
+    assert wrong_account.status_code == 400
+
+
+def test_query_log_fingerprints_literals_and_flags_repeated_statements():
+    first, normalized = fingerprint("SELECT * FROM suppliers WHERE suppliers.id = 7 AND name = 'Acme'")
+    second, _ = fingerprint("SELECT *  FROM suppliers WHERE suppliers.id = 12 AND name = 'Other'")
+    assert first == second
+    assert normalized == "SELECT * FROM suppliers WHERE suppliers.id = ? AND name = ?"
+    assert fingerprint("SELECT 1 FROM t WHERE id IN (?, ?, ?)")[0] == fingerprint("SELECT 1 FROM t WHERE id IN (?)")[0]
+
+    log = QueryLog(slow_threshold_ms=50, n_plus_one_threshold=3, max_fingerprints=10)
+    counts = {}
+    for supplier_id in range(4):
+        log.record_statement(f"SELECT * FROM suppliers WHERE id = {supplier_id}", 1.0, "req-1", counts)
+    log.record_statement("SELECT * FROM purchase_orders", 75.0, "req-1", counts)
+
+    repeated, _ = fingerprint("SELECT * FROM suppliers WHERE id = 0")
+    assert log.finish_request("req-1", "GET /api/purchase-orders/", counts) == [repeated]
+    summary = log.summary()
+    assert [item["fingerprint"] for item in summary["n_plus_one_suspects"]] == [repeated]
+    assert summary["top_by_total_time"][0]["slow_calls"] == 1
+
+
+@pytest.mark.anyio
+async def test_list_purchase_orders_loads_suppliers_without_per_row_queries(client, db, user_factory, auth_headers):
+    store = Store(name="Bulk Store", location="Nakuru")
+    db.add(store)
+    db.commit()
+    admin = user_factory(role="admin", store_id=store.id)
+    headers = auth_headers(admin)
+
+    def add_orders(start, stop):
+        for index in range(start, stop):
+            supplier = Supplier(name=f"Supplier {index}", store_id=store.id)
+            db.add(supplier)
+            db.flush()
+            db.add(PurchaseOrder(supplier_id=supplier.id, store_id=store.id, created_by=admin.id))
+        db.commit()
+
+    async def list_orders():
+        statements = []
+        count = lambda *args: statements.append(args[2])  # noqa: E731
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", count)
+        try:
+            response = await client.get("/api/purchase-orders/", headers=headers)
+        finally:
+            for target in (engine, async_engine.sync_engine):
+                event.remove(target, "before_cursor_execute", count)
+        assert response.status_code == 200
+        return response.json(), len(statements)
+
+    add_orders(0, 2)
+    await list_orders()  # warm the principal cache so both measured requests do the same auth work
+    few, few_statements = await list_orders()
+    add_orders(2, 12)
+    many, many_statements = await list_orders()
+
+    assert len(few) == 2
+    assert {item["supplier_name"] for item in many} == {f"Supplier {i}" for i in range(12)}
+    assert many_statements == few_statements
+
+    forbidden = await client.get("/metrics/queries", headers=auth_headers(user_factory(role="clerk")))
+    assert forbidden.status_code == 403
+
+
+def test_synthetic_tenant_is_deterministic_and_never_oversells():
+    config = GeneratorConfig(
+        merchants=1,
+        stores_per_merchant=2,
+        products_per_merchant=10,
+        sales_per_store=300,
+        expenses_per_store=5,
+        notifications_per_user=2,
+    )
+
+    def snapshot():
+        with engine.connect() as conn:
+            received, in_stock = conn.execute(
+                select(func.sum(Inventory.quantity_received), func.sum(Inventory.quantity_in_stock))
+            ).one()
+            sold = conn.scalar(select(func.sum(Sale.quantity)))
+            totals = conn.scalar(select(func.sum(Sale.total_price)))
+        return received, in_stock, sold, totals
+
+    first = generate(engine, config)
+    first_snapshot = snapshot()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    second = generate(engine, config)
+
+    assert first.counts == second.counts
+    assert first.counts["stores"] == 2 and first.counts["products"] == 10
+    assert first_snapshot == snapshot()
+    received, in_stock, sold, _ = first_snapshot
+    assert 0 < sold and received - in_stock == sold
+    with Session(engine) as session:
+        assert find_unread_counter_drift(session) == []
+        assert session.scalar(select(func.sum(NotificationCounter.unread_count))) > 0
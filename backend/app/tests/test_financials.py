@@ -1,7 +1,10 @@
 import pytest
 
 from app.models.inventory import Inventory
+from app.models.inventory_event import InventoryEvent
 from app.models.product import Product
+from app.models.sale import Sale
+from app.models.stock_level import StockLevel
 from app.models.store import Store
 
 
@@ -58,3 +61,69 @@ async def test_sales_and_financial_summary(client, db, user_factory, auth_header
     summary = summary_resp.json()
     assert summary["total_sales"] > 0
     assert summary["total_expenses"] >= 50
+
+
+@pytest.mark.anyio
+async def test_basket_sale_is_all_or_nothing(client, db, user_factory, auth_headers):
+    store = Store(name="Till Store", location="Kisumu")
+    db.add(store)
+    db.commit()
+    products = [
+        Product(name=f"Basket item {i}", sku=f"BASKET-{i}", buying_price=10 * i, selling_price=15 * i)
+        for i in (1, 2, 3)
+    ]
+    db.add_all(products)
+    db.commit()
+    admin = user_factory(role="admin", store_id=store.id)
+    for product, quantity in zip(products, (10, 4, 1)):
+        db.add(
+            Inventory(
+                product_id=product.id,
+                store_id=store.id,
+                created_by=admin.id,
+                quantity_received=quantity,
+                quantity_in_stock=quantity,
+                quantity_spoilt=0,
+                payment_status="paid",
+                buying_price=product.buying_price,
+                selling_price=product.selling_price,
+            )
+        )
+    db.commit()
+    first, second, third = (product.id for product in products)
+
+    receipt = await client.post(
+        "/api/sales/basket",
+        json={
+            "store_id": store.id,
+            "lines": [
+                {"product_id": first, "quantity": 3},
+                {"product_id": second, "quantity": 2, "unit_price": 40},
+                {"product_id": first, "quantity": 1},
+            ],
+        },
+        headers=auth_headers(admin),
+    )
+    assert receipt.status_code == 200, receipt.text
+    body = receipt.json()
+    assert [line["product_id"] for line in body["lines"]] == [first, second, first]
+    assert body["total_quantity"] == 6
+    assert body["total_price"] == 3 * 15 + 2 * 40 + 1 * 15
+    assert body["total_cost"] == 4 * 10 + 2 * 20
+
+    short = await client.post(
+        "/api/sales/basket",
+        json={
+            "store_id": store.id,
+            "lines": [{"product_id": first, "quantity": 1}, {"product_id": third, "quantity": 2}],
+        },
+        headers=auth_headers(admin),
+    )
+    assert short.status_code == 400
+    assert short.json()["detail"] == f"Insufficient stock for product #{third}"
+
+    db.expire_all()
+    assert db.query(Sale).count() == 3
+    assert db.query(InventoryEvent).filter(InventoryEvent.event_type == "sale_recorded").count() == 3
+    levels = {level.product_id: level.quantity_in_stock for level in db.query(StockLevel).all()}
+    assert levels == {first: 6, second: 2, third: 1}
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func
+
+from app.models.idempotency_key import IdempotencyKey
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sale import Sale
+from app.models.stock_level import StockLevel
+from app.models.store import Store
+from app.models.supplier import Supplier
+
+pytestmark = pytest.mark.anyio
+
+
+def _stocked_store(db, admin_factory, quantity=20):
+    store = Store(name="Till Store", location="Mombasa")
+    product = Product(name="Sugar", sku="IDEM-001", buying_price=100.0, selling_price=150.0)
+    db.add_all([store, product])
+    db.commit()
+    admin = admin_factory(role="admin", store_id=store.id)
+    db.add(
+        Inventory(
+            product_id=product.id,
+            store_id=store.id,
+            created_by=admin.id,
+            quantity_received=quantity,
+            quantity_in_stock=quantity,
+            quantity_spoilt=0,
+            payment_status="paid",
+            buying_price=100.0,
+            selling_price=150.0,
+        )
+    )
+    db.commit()
+    return store, product, admin
+
+
+async def test_retried_sale_is_replayed_not_recorded_twice(client, db, user_factory, auth_headers):
+    store, product, admin = _stocked_store(db, user_factory)
+    headers = {**auth_headers(admin), "Idempotency-Key": "till-7-receipt-1"}
+    sale = {"store_id": store.id, "product_id": product.id, "quantity": 3}
+
+    first = await client.post("/api/sales/", json=sale, headers=headers)
+    retry = await client.post("/api/sales/", json=sale, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+    # Retries racing each other: one write wins, the rest replay it.
+    racing = {**auth_headers(admin), "Idempotency-Key": "till-7-receipt-2"}
+    responses = await asyncio.gather(*(client.post("/api/sales/", json=sale, headers=racing) for _ in range(5)))
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.json()["id"] for response in responses}) == 1
+
+    reused = await client.post("/api/sales/", json={**sale, "quantity": 4}, headers=headers)
+    assert reused.status_code == 409
+
+    db.expire_all()
+    assert db.query(func.count(Sale.id)).scalar() == 2
+    assert db.get(StockLevel, (store.id, product.id)).quantity_in_stock == 14
+    assert db.query(func.count(IdempotencyKey.key)).scalar() == 2
+
+
+async def test_retried_purchase_order_receipt_replays_instead_of_failing(client, db, user_factory, auth_headers):
+    store, product, admin = _stocked_store(db, user_factory, quantity=1)
+    supplier = Supplier(name="Retry Supplier", store_id=store.id)
+    db.add(supplier)
+    db.commit()
+    headers = auth_headers(admin)
+    order = await client.post(
+        "/api/purchase-orders/",
+        json={
+            "supplier_id": supplier.id,
+            "store_id": store.id,
+            "items": [{"product_id": product.id, "quantity": 10, "unit_cost": 90}],
+        },
+        headers=headers,
+    )
+    url = f"/api/purchase-orders/{order.json()['id']}/status"
+    keyed = {**headers, "Idempotency-Key": "po-receive-1"}
+
+    first = await client.post(url, json={"status": "received"}, headers=keyed)
+    retry = await client.post(url, json={"status": "received"}, headers=keyed)
+    unkeyed = await client.post(url, json={"status": "received"}, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert unkeyed.status_code == 400
+
+    db.expire_all()
+    assert db.get(StockLevel, (store.id, product.id)).quantity_in_stock == 11
+
+
+async def test_expired_key_is_reused_for_a_new_write(client, db, user_factory, auth_headers):
+    store, product, admin = _stocked_store(db, user_factory)
+    headers = {**auth_headers(admin), "Idempotency-Key": "till-7-receipt-3"}
+    sale = {"store_id": store.id, "product_id": product.id, "quantity": 2}
+
+    first = await client.post("/api/sales/", json=sale, headers=headers)
+    # Expired, but not yet swept.
+    db.query(IdempotencyKey).update({IdempotencyKey.expires_at: datetime(2000, 1, 1)})
+    db.commit()
+    again = await client.post("/api/sales/", json=sale, headers=headers)
+
+    assert first.status_code == again.status_code == 200
+    assert "Idempotent-Replayed" not in again.headers
+    assert again.json()["id"] != first.json()["id"]
+    db.expire_all()
+    stored = db.query(IdempotencyKey).one()
+    assert stored.expires_at > datetime(2000, 1, 1)
+    assert db.get(StockLevel, (store.id, product.id)).quantity_in_stock == 16
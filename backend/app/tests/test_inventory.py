@@ -1,8 +1,24 @@
+import json
+from datetime import datetime, timedelta, timezone
+
 import pytest
+from sqlalchemy import event
+
+from app.core.database import engine
 
+from app.core.config import settings
 from app.models.inventory import Inventory
+from app.models.inventory_event import InventoryEvent
+from app.models.notification import Notification
+from app.models.notification_outbox import NotificationOutbox
 from app.models.product import Product
+from app.models.stock_level import StockLevel
 from app.models.store import Store
+from app.services.depletion import STRATEGIES
+from app.services.inventory_import_service import ImportState, import_inventory_chunk
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.stock_level_service import find_stock_level_drift, rebuild_stock_levels
+from app.services.stock_service import decrease_stock, increase_stock
 
 pytestmark = pytest.mark.anyio
 
@@ -139,3 +155,303 @@ async def test_clerk_can_delete_own_inventory_record(client, db, user_factory, a
 
     assert response.status_code == 200
     assert response.json()["message"] == "Inventory record deleted successfully"
+
+
+async def test_stock_levels_follow_inventory_writes_and_sales(client, db, user_factory, auth_headers):
+    product, store = _seed_product_store(db, "LVL")
+    admin = user_factory(email="levels@myduka.com", role="admin", store_id=store.id)
+    headers = auth_headers(admin)
+
+    created = []
+    for quantity in (5, 8):
+        response = await client.post(
+            "/api/inventory/",
+            headers=headers,
+            json={
+                "product_id": product.id,
+                "store_id": store.id,
+                "quantity_received": quantity,
+                "quantity_in_stock": quantity,
+                "quantity_spoilt": 0,
+                "payment_status": "paid",
+                "buying_price": 100,
+                "selling_price": 150,
+            },
+        )
+        assert response.status_code == 201, response.text
+        created.append(response.json()["id"])
+
+    updated = await client.put(f"/api/inventory/{created[0]}", headers=headers, json={"quantity_in_stock": 3})
+    assert updated.status_code == 200
+    sale = await client.post(
+        "/api/sales/", headers=headers, json={"store_id": store.id, "product_id": product.id, "quantity": 6}
+    )
+    assert sale.status_code == 200, sale.text
+    oversell = await client.post(
+        "/api/sales/", headers=headers, json={"store_id": store.id, "product_id": product.id, "quantity": 6}
+    )
+    assert oversell.status_code == 400
+    deleted = await client.delete(f"/api/inventory/{created[1]}", headers=headers)
+    assert deleted.status_code == 200
+
+    levels = await client.get("/api/inventory/stock-levels", headers=headers)
+    assert levels.status_code == 200
+    # 5 + 8 received, the first row cut to 3, 6 sold, then the second row deleted.
+    remaining = sum(row.quantity_in_stock for row in db.query(Inventory).all())
+    assert [(row["product_id"], row["quantity_in_stock"]) for row in levels.json()] == [(product.id, remaining)]
+    assert find_stock_level_drift(db) == []
+
+
+async def test_stock_level_drift_is_reported_and_rebuilt(db, user_factory):
+    clerk = user_factory(email="drift@myduka.com", role="clerk")
+    product, store = _seed_product_store(db, "DRIFT")
+    db.add(
+        Inventory(
+            product_id=product.id,
+            store_id=store.id,
+            created_by=clerk.id,
+            quantity_received=12,
+            quantity_in_stock=12,
+            quantity_spoilt=0,
+            payment_status="paid",
+            buying_price=100,
+            selling_price=150,
+        )
+    )
+    db.commit()
+    assert db.get(StockLevel, (store.id, product.id)).quantity_in_stock == 12
+
+    db.query(StockLevel).update({StockLevel.quantity_in_stock: 4})
+    db.commit()
+    assert find_stock_level_drift(db) == [
+        {"store_id": store.id, "product_id": product.id, "expected": 12, "recorded": 4}
+    ]
+
+    assert rebuild_stock_levels(db) == 1
+    db.commit()
+    assert find_stock_level_drift(db) == []
+
+
+async def test_bulk_import_reports_bad_rows_and_notifies_once_per_store(
+    client, db, user_factory, auth_headers, monkeypatch
+):
+    monkeypatch.setattr(settings, "inventory_import_chunk_size", 2)
+    rice, store = _seed_product_store(db, "IMP1")
+    beans, other_store = _seed_product_store(db, "IMP2")
+    admin = user_factory(email="importer@myduka.com", role="admin", store_id=store.id)
+
+    header = "product_id,store_id,quantity_received,quantity_in_stock,quantity_spoilt,payment_status,buying_price,selling_price,remarks"
+    rows = [
+        f"{rice.id},{store.id},50,50,0,paid,100,150,first delivery",
+        f"{beans.id},{store.id},10,8,2,unpaid,90,140,",
+        f"999999,{store.id},5,5,0,paid,100,150,",
+        f"{rice.id},{store.id},5,9,0,paid,100,150,",
+        f"{rice.id},{other_store.id},5,5,0,unpaid,100,150,",
+        f"{beans.id},{store.id},3,3,0,unpaid,90,140,\"top-up, late\"",
+    ]
+    response = await client.post(
+        "/api/inventory/import",
+        content="\n".join([header, *rows]).encode(),
+        headers={**auth_headers(admin), "Content-Type": "text/csv"},
+    )
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["rows_received"] == 6
+    assert report["rows_imported"] == 3
+    assert [error["row"] for error in report["errors"]] == [3, 4, 5]
+    assert report["errors"][0]["error"] == "Product not found"
+    assert "cannot exceed quantity_received" in report["errors"][1]["error"]
+    assert report["errors"][2]["error"] == "Cannot access resources outside your assigned store"
+
+    assert db.query(Inventory).count() == 3
+    assert db.query(InventoryEvent).filter(InventoryEvent.event_type == "created").count() == 3
+    assert db.get(StockLevel, (store.id, beans.id)).quantity_in_stock == 11
+    assert find_stock_level_drift(db) == []
+    assert db.query(Notification).count() == 0  # queued in the outbox, not fanned out in the request
+    notification_dispatcher.drain()
+    notifications = db.query(Notification).filter(Notification.user_id == admin.id).all()
+    assert sorted(item.category for item in notifications) == ["low_stock", "unpaid_inventory"]
+    unpaid = next(item for item in notifications if item.category == "unpaid_inventory")
+    assert unpaid.message == "2 imported inventory records (11 units) are unpaid."
+
+    json_lines = await client.post(
+        "/api/inventory/import",
+        content=(
+            f'{{"product_id": {rice.id}, "store_id": {store.id}, "quantity_received": 4, '
+            f'"quantity_in_stock": 4, "quantity_spoilt": 0, "buying_price": 100, "selling_price": 150}}\n'
+            "not json\n"
+        ).encode(),
+        headers={**auth_headers(admin), "Content-Type": "application/x-ndjson"},
+    )
+    assert json_lines.status_code == 200
+    assert json_lines.json()["rows_imported"] == 1
+    assert json_lines.json()["errors"][0]["row"] == 2
+
+    unsupported = await client.post(
+        "/api/inventory/import", content=b"{}", headers={**auth_headers(admin), "Content-Type": "application/xml"}
+    )
+    assert unsupported.status_code == 415
+
+
+
+
+def test_import_alerts_commit_with_each_chunk_when_the_upload_stops(db, user_factory):
+    rice, store = _seed_product_store(db, "IMP4")
+    admin = user_factory(email="partial-importer@myduka.com", role="admin", store_id=store.id)
+    state = ImportState()
+
+    def import_chunk(quantity):
+        row = {
+            "product_id": rice.id,
+            "store_id": store.id,
+            "quantity_received": quantity,
+            "quantity_in_stock": quantity,
+            "quantity_spoilt": 0,
+            "payment_status": "unpaid",
+            "buying_price": 100,
+            "selling_price": 150,
+        }
+        import_inventory_chunk(db, actor=admin, records=[(1, row)], state=state)
+        db.commit()
+
+    import_chunk(2)
+    import_chunk(3)
+    held = db.query(NotificationOutbox.id, NotificationOutbox.next_attempt_at).one()
+    assert held.id == state.outbox_id and held.next_attempt_at is not None
+    # The upload breaks off here. Nothing goes out while the row is held...
+    notification_dispatcher.drain()
+    assert db.query(Notification).count() == 0
+
+    # ...and once the hold lapses the committed rows' alerts are sent, once.
+    db.query(NotificationOutbox).update({NotificationOutbox.next_attempt_at: datetime(2000, 1, 1)})
+    db.commit()
+    notification_dispatcher.drain()
+    unpaid = db.query(Notification).filter(Notification.category == "unpaid_inventory").one()
+    assert unpaid.message == "2 imported inventory records (5 units) are unpaid."
+
+    # A chunk committed after the lapse queues its own row with just its alerts.
+    import_chunk(4)
+    queued = db.query(NotificationOutbox).one()
+    assert queued.id == state.outbox_id and queued.next_attempt_at > datetime(2000, 1, 1)
+    assert json.loads(queued.payload)["unpaid_units"] == [[store.id, 4]]
+
+async def test_bulk_import_keeps_quoted_newlines_inside_one_row(client, db, user_factory, auth_headers):
+    rice, store = _seed_product_store(db, "IMP3")
+    admin = user_factory(email="multiline-importer@myduka.com", role="admin", store_id=store.id)
+
+    header = "product_id,store_id,quantity_received,quantity_in_stock,quantity_spoilt,buying_price,selling_price,remarks"
+    rows = [
+        f'{rice.id},{store.id},5,5,0,100,150,"Delivered late\r\n\r\nsecond crate ""damaged"""',
+        f"{rice.id},{store.id},3,3,0,100,150,single line",
+    ]
+    response = await client.post(
+        "/api/inventory/import",
+        content="\r\n".join([header, *rows]).encode(),
+        headers={**auth_headers(admin), "Content-Type": "text/csv"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["rows_received"] == 2
+    assert response.json()["errors"] == []
+    remarks = [item.remarks for item in db.query(Inventory).order_by(Inventory.id)]
+    assert remarks == ['Delivered late\n\nsecond crate "damaged"', "single line"]
+
+def test_stock_events_are_written_as_one_insert_per_transaction(db, user_factory):
+    clerk = user_factory(email="events@myduka.com", role="clerk")
+    products = [_seed_product_store(db, f"EV{i}")[0] for i in range(4)]
+    store = Store(name="Events", location="Nyeri")
+    db.add(store)
+    db.commit()
+
+    event_inserts = []
+
+    def count_event_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO inventory_events"):
+            event_inserts.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_event_inserts)
+    try:
+        for product in products:
+            increase_stock(db, store.id, product.id, 10, 100, 150, clerk.id, "purchase_order_received")
+        decrease_stock(db, store.id, products[0].id, 4, clerk.id, "sale_recorded")
+        db.commit()
+        assert len(event_inserts) == 1
+
+        increase_stock(db, store.id, products[1].id, 5, 100, 150, clerk.id, "purchase_order_received")
+        db.rollback()
+        db.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", count_event_inserts)
+
+    assert len(event_inserts) == 1
+    rows = db.query(InventoryEvent).order_by(InventoryEvent.id).all()
+    assert [(row.event_type, row.old_quantity_in_stock, row.new_quantity_in_stock) for row in rows] == [
+        ("purchase_order_received", 0, 10),
+        ("purchase_order_received", 0, 10),
+        ("purchase_order_received", 0, 10),
+        ("purchase_order_received", 0, 10),
+        ("sale_recorded", 10, 6),
+    ]
+
+
+async def test_merchant_depletion_strategy_picks_batches_and_reads_only_what_it_needs(
+    client, db, user_factory, auth_headers
+):
+    product, store = _seed_product_store(db, "DEPLETE")
+    merchant = user_factory(email="strategy-owner@myduka.com", role="superuser")
+    store.merchant_id = merchant.id
+    db.commit()
+    admin = user_factory(role="admin", store_id=store.id)
+    received = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    # Oldest batch is the most expensive; a long tail of later receipts follows.
+    costs = [120.0, 90.0, 100.0] + [95.0] * 200
+    for day, cost in enumerate(costs):
+        db.add(
+            Inventory(
+                product_id=product.id,
+                store_id=store.id,
+                created_by=admin.id,
+                quantity_received=5,
+                quantity_in_stock=5,
+                quantity_spoilt=0,
+                payment_status="paid",
+                buying_price=cost,
+                selling_price=150.0,
+                created_at=received + timedelta(days=day),
+            )
+        )
+    db.commit()
+    batch_ids = [row.id for row in db.query(Inventory.id).order_by(Inventory.created_at)]
+
+    assert len(db.execute(STRATEGIES["fifo"].batches_needed(store.id, product.id, 7)).all()) == 2
+
+    async def sell_and_depleted(quantity):
+        response = await client.post(
+            "/api/sales/",
+            json={"store_id": store.id, "product_id": product.id, "quantity": quantity},
+            headers=auth_headers(admin),
+        )
+        assert response.status_code == 200, response.text
+        db.expire_all()
+        return [row.id for row in db.query(Inventory.id).filter(Inventory.quantity_in_stock < 5).order_by(Inventory.id)]
+
+    # Default (lifo): newest receipt first.
+    assert await sell_and_depleted(1) == [batch_ids[-1]]
+
+    forbidden = await client.put(
+        f"/api/users/{admin.id}", json={"depletion_strategy": "fifo"}, headers=auth_headers(admin)
+    )
+    assert forbidden.status_code == 403
+    chosen = await client.put(
+        f"/api/users/{merchant.id}", json={"depletion_strategy": "fifo"}, headers=auth_headers(merchant)
+    )
+    assert chosen.json()["depletion_strategy"] == "fifo"
+    assert await sell_and_depleted(7) == sorted([batch_ids[0], batch_ids[1], batch_ids[-1]])
+
+    await client.put(
+        f"/api/users/{merchant.id}", json={"depletion_strategy": "highest_cost"}, headers=auth_headers(merchant)
+    )
+    # Batch 0 (120) is empty after FIFO; the 100 batch is next most expensive.
+    assert batch_ids[2] in await sell_and_depleted(1)
+    assert db.get(Inventory, batch_ids[2]).quantity_in_stock == 4
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.core.database import engine
+from app.models.inventory_event import InventoryEvent
+from app.models.notification import Notification
+from app.models.sale import Sale
+from app.services.depletion import STRATEGIES
+
+SINCE = func.datetime("now", "-30 days")
+
+HOT_QUERIES = {
+    **{
+        f"deplete_stock batches ({name})": strategy.batches_needed(store_id=1, product_id=2, quantity=5)
+        for name, strategy in STRATEGIES.items()
+    },
+    "notification inbox": select(Notification)
+    .where(Notification.user_id == 1)
+    .order_by(Notification.created_at.desc())
+    .limit(50),
+    "unread notifications": select(Notification)
+    .where(Notification.user_id == 1, Notification.is_read.is_(False))
+    .order_by(Notification.created_at.desc())
+    .limit(50),
+    "unread count": select(func.count(Notification.id)).where(
+        Notification.user_id == 1, Notification.is_read.is_(False)
+    ),
+    "store sales by time": select(Sale)
+    .where(Sale.store_id == 1, Sale.created_at >= SINCE)
+    .order_by(Sale.created_at.desc()),
+    "store inventory events by time": select(InventoryEvent)
+    .where(InventoryEvent.store_id == 1, InventoryEvent.created_at >= SINCE)
+    .order_by(InventoryEvent.created_at.desc()),
+    "product timeline in store": select(InventoryEvent)
+    .where(InventoryEvent.product_id == 2, InventoryEvent.store_id == 1)
+    .order_by(InventoryEvent.created_at.desc())
+    .limit(100),
+}
+
+
+def _query_plan(statement) -> list[str]:
+    compiled = statement.compile(dialect=engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(name):
+    if engine.dialect.name != "sqlite":
+        pytest.skip("EXPLAIN QUERY PLAN is SQLite-specific")
+
+    plan = _query_plan(HOT_QUERIES[name])
+
+    # Scans of subqueries (co-routines) read rows already produced by an inner SEARCH.
+    subqueries = {step.split(" ", 1)[1] for step in plan if step.startswith("CO-ROUTINE")}
+    full_scans = [
+        step
+        for step in plan
+        if step.startswith("SCAN") and "INDEX" not in step and step.split(" ", 1)[1] not in subqueries
+    ]
+    assert not full_scans, f"{name} falls back to a full table scan: {plan}"
+    assert any(step.startswith("SEARCH") for step in plan), f"{name} does not seek an index: {plan}"
@@ -1,5 +1,9 @@
 import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import engine
+from app.core.read_database import ReadSnapshot, get_read_db
 from app.models.inventory import Inventory
 from app.models.product import Product
 from app.models.store import Store
@@ -182,3 +186,48 @@ async def test_merchant_dashboard_requires_superuser(
     assert {"stats", "performance", "payment_summary", "stores", "admins"} <= set(
         payload.keys()
     )
+
+
+async def test_read_snapshot_stays_within_staleness_bound(db, tmp_path):
+    snapshot = ReadSnapshot(
+        source_path=engine.url.database,
+        snapshot_path=str(tmp_path / "read-snapshot.db"),
+        max_age_seconds=3600,
+    )
+    db.add(Store(name="First", location="Nairobi"))
+    db.commit()
+
+    async def store_count():
+        async with snapshot.lease() as bind, AsyncSession(bind=bind) as session:
+            return await session.scalar(select(func.count(Store.id)))
+
+    assert await store_count() == 1
+
+    db.add(Store(name="Second", location="Mombasa"))
+    db.commit()
+    assert await store_count() == 1
+
+    snapshot.max_age_seconds = 0
+    assert await store_count() == 2
+    assert snapshot.generation == 2
+
+    # A request holding the old snapshot can still connect after a rotation; the file goes when it is done.
+    old_file = tmp_path / "read-snapshot.db.3"
+    async with snapshot.lease() as old_bind:
+        assert await store_count() == 2
+        assert snapshot.generation == 4 and old_file.exists()
+        async with AsyncSession(bind=old_bind) as session:
+            assert await session.scalar(select(func.count(Store.id))) == 2
+    assert not old_file.exists()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["read-snapshot.db.4"]
+
+
+async def test_read_session_rejects_writes():
+    sessions = get_read_db()
+    session = await sessions.__anext__()
+    try:
+        session.add(Store(name="Nope", location="Nowhere"))
+        with pytest.raises(RuntimeError):
+            await session.flush()
+    finally:
+        await sessions.aclose()
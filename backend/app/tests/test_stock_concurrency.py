@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func
+
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sale import Sale
+from app.models.stock_level import StockLevel
+from app.models.store import Store
+from app.services.stock_level_service import find_stock_level_drift
+
+pytestmark = pytest.mark.anyio
+
+SALES = 300
+BATCHES = (40, 30, 50, 30)
+
+
+async def test_parallel_sales_never_oversell(client, db, user_factory, auth_headers):
+    store = Store(name="Busy Store", location="Nairobi")
+    product = Product(name="Maize Flour", sku="CONC-001", buying_price=100.0, selling_price=150.0)
+    db.add_all([store, product])
+    db.commit()
+    admin = user_factory(email="rush@myduka.com", role="admin", store_id=store.id)
+    for quantity in BATCHES:
+        db.add(
+            Inventory(
+                product_id=product.id,
+                store_id=store.id,
+                created_by=admin.id,
+                quantity_received=quantity,
+                quantity_in_stock=quantity,
+                quantity_spoilt=0,
+                payment_status="paid",
+                buying_price=100.0,
+                selling_price=150.0,
+            )
+        )
+    db.commit()
+    headers = auth_headers(admin)
+
+    async def sell():
+        return await client.post(
+            "/api/sales/",
+            json={"store_id": store.id, "product_id": product.id, "quantity": 1},
+            headers=headers,
+        )
+
+    responses = await asyncio.gather(*(sell() for _ in range(SALES)))
+
+    statuses = [response.status_code for response in responses]
+    assert set(statuses) <= {200, 400}, [r.text for r in responses if r.status_code not in {200, 400}][:3]
+    assert statuses.count(200) == sum(BATCHES)
+
+    db.expire_all()
+    assert db.query(func.min(Inventory.quantity_in_stock)).scalar() == 0
+    assert db.query(func.sum(Sale.quantity)).scalar() == sum(BATCHES)
+    assert db.get(StockLevel, (store.id, product.id)).quantity_in_stock == 0
+    assert find_stock_level_drift(db) == []
@@ -0,0 +1 @@
+"""Performance benchmarks for the MyDuka API (run with ``python -m benchmarks.<name>``)."""
@@ -0,0 +1,175 @@
+"""
+Per-request overhead of the access-log middleware.
+
+Drives a one-route FastAPI app with raw ASGI calls (no HTTP client in the
+loop) and reports mean microseconds per request for:
+
+- none: no logging middleware (baseline)
+- inline: the previous middleware, json.dumps + logger.info on the event loop
+- queue: AccessLog with every request kept, serialized on the listener thread
+- queue-sampled: AccessLog keeping 1% of 2xx
+- disabled: AccessLog switched off
+
+Log output goes to /dev/null. --sink-latency-us adds a sleep to every write
+to model a slow or back-pressured log sink (a full stderr pipe, a congested
+disk): the inline middleware pays it on every request, the queue does not.
+Each mode runs --repeats times and the fastest run is reported.
+
+    python -m benchmarks.access_log_overhead --requests 20000
+    python -m benchmarks.access_log_overhead --requests 5000 --sink-latency-us 200
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+
+from benchmarks.common import print_table, use_scratch_database
+
+use_scratch_database("access-log")
+
+from app.core.access_log import AccessLog  # noqa: E402
+
+
+class _SlowSinkHandler(logging.StreamHandler):
+    def __init__(self, latency_s: float):
+        super().__init__(open(os.devnull, "w"))
+        self.latency_s = latency_s
+
+    def emit(self, record):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        super().emit(record)
+
+
+def build_app(mode: str, sink_latency_s: float):
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    if mode == "none":
+        return app, None
+
+    if mode == "inline":
+        inline_logger = logging.getLogger("bench.inline")
+        inline_logger.handlers = [_SlowSinkHandler(sink_latency_s)]
+        inline_logger.setLevel(logging.INFO)
+        inline_logger.propagate = False
+
+        @app.middleware("http")
+        async def inline_logging(request: Request, call_next):
+            request_id = str(uuid.uuid4())
+            start = time.perf_counter()
+            response = await call_next(request)
+            inline_logger.info(
+                json.dumps(
+                    {
+                        "request_id": request_id,
+                        "method": request.method,
+                        "path": request.url.path,
+                        "status_code": response.status_code,
+                        "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                    }
+                )
+            )
+            return response
+
+        return app, None
+
+    access_log = AccessLog(
+        enabled=mode != "disabled",
+        slow_ms=1000,
+        sample_rates={2: 0.01 if mode == "queue-sampled" else 1.0},
+        queue_size=100_000,
+        handler=_SlowSinkHandler(sink_latency_s),
+    )
+
+    @app.middleware("http")
+    async def queued_logging(request: Request, call_next):
+        request_id = str(uuid.uuid4())
+        start = time.perf_counter()
+        response = await call_next(request)
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        access_log.log_request(
+            response.status_code,
+            duration_ms,
+            lambda: {
+                "request_id": request_id,
+                "method": request.method,
+                "path": request.url.path,
+                "status_code": response.status_code,
+                "duration_ms": duration_ms,
+            },
+        )
+        return response
+
+    return app, access_log
+
+
+async def drive(app, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        return None
+
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--sink-latency-us", type=float, default=0.0)
+    args = parser.parse_args()
+
+    rows = []
+    baseline_us = None
+    for mode in ("none", "inline", "queue", "queue-sampled", "disabled"):
+        runs = []
+        for _ in range(args.repeats):
+            app, access_log = build_app(mode, args.sink_latency_us / 1_000_000)
+            runs.append(asyncio.run(drive(app, args.requests)))
+            if access_log is not None:
+                access_log.stop()
+        per_request_us = min(runs) / args.requests * 1_000_000
+        baseline_us = baseline_us if baseline_us is not None else per_request_us
+        rows.append(
+            {
+                "mode": mode,
+                "requests": args.requests,
+                "us_per_request": round(per_request_us, 1),
+                "overhead_us": round(per_request_us - baseline_us, 1),
+            }
+        )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Shared helpers for benchmark scripts.
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+
+def use_scratch_database(name: str) -> Path:
+    """
+    Point the app at a throwaway sqlite file.
+
+    Must be called before anything under ``app`` or ``main`` is imported,
+    because settings and engines are created at import time.
+    """
+    path = Path(tempfile.gettempdir()) / f"myduka-bench-{name}.db"
+    if path.exists():
+        path.unlink()
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["DATABASE_DRIVER"] = "sqlite"
+    os.environ["DEBUG"] = "false"
+    os.environ["SECRET_KEY"] = "benchmark-secret-key"
+    os.environ["SEED_DEMO_USERS"] = "false"
+    os.environ.setdefault("ACCESS_LOG_ENABLED", "false")
+    return path
+
+
+def asgi_client(app) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://bench")
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(label: str, latencies_ms: list[float], elapsed_s: float) -> dict:
+    ordered = sorted(latencies_ms)
+    return {
+        "scenario": label,
+        "requests": len(ordered),
+        "throughput_rps": round(len(ordered) / elapsed_s, 1) if elapsed_s else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+    }
+
+
+async def timed(coro_factory, latencies_ms: list[float]):
+    start = time.perf_counter()
+    result = await coro_factory()
+    latencies_ms.append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def print_table(rows: list[dict]) -> None:
+    if not rows:
+        return
+    headers = list(rows[0].keys())
+    widths = {key: max(len(key), *(len(str(row[key])) for row in rows)) for key in headers}
+    print("  ".join(key.ljust(widths[key]) for key in headers))
+    for row in rows:
+        print("  ".join(str(row[key]).ljust(widths[key]) for key in headers))
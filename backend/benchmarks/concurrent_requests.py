@@ -0,0 +1,160 @@
+"""
+Concurrent-request throughput: sync Session routes vs the AsyncSession path.
+
+Long aggregate scans run in a loop while unread-count polls and /health probes
+are in flight. On the sync path every query blocks the event loop, so even
+requests that never touch the database queue behind the scans; on the async
+path they interleave. Raw SQLite poll throughput can be lower on the async
+path (aiosqlite hops to a worker thread per statement); the win is that one
+slow query no longer stalls the rest of the worker.
+
+The legacy handlers open and close their own Session. With Depends(get_db)
+the session is only closed after the response is sent, so once more requests
+are in flight than the sync pool holds (pool_size + max_overflow), a blocking
+pool checkout freezes the loop that would release those connections and every
+request stalls until pool_timeout.
+
+    python -m benchmarks.concurrent_requests --requests 400 --slow 4
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import asgi_client, print_table, summarize, timed, use_scratch_database
+
+use_scratch_database("concurrency")
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from fastapi import Depends  # noqa: E402
+
+from app.core.database import Base, SessionLocal, engine, get_async_db  # noqa: E402
+from app.core.security import create_access_token, hash_password  # noqa: E402
+from app.models.notification import Notification  # noqa: E402
+from app.models.user import User  # noqa: E402
+from main import app  # noqa: E402
+
+SLOW_SCAN = text(
+    "WITH RECURSIVE seq(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM seq WHERE x < :n) "
+    "SELECT count(*) FROM seq"
+)
+
+
+@app.get("/bench/legacy/unread-count")
+async def legacy_unread_count(user_id: int):
+    # Mirrors the pre-async handler: blocking auth lookup and count on the event loop.
+    with SessionLocal() as db:
+        db.get(User, user_id)
+        count = (
+            db.query(Notification)
+            .filter(Notification.user_id == user_id, Notification.is_read.is_(False))
+            .count()
+        )
+    return {"unread_count": count}
+
+
+@app.get("/bench/legacy/slow-scan")
+async def legacy_slow_scan(n: int):
+    with SessionLocal() as db:
+        return {"rows": db.execute(SLOW_SCAN, {"n": n}).scalar()}
+
+
+@app.get("/bench/async/slow-scan")
+async def async_slow_scan(n: int, db: AsyncSession = Depends(get_async_db)):
+    return {"rows": await db.scalar(SLOW_SCAN, {"n": n})}
+
+
+def seed(notifications: int) -> int:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(
+            email="bench-admin@myduka.com",
+            first_name="Bench",
+            last_name="Admin",
+            hashed_password=hash_password("bench12345"),
+            role="admin",
+            is_active=True,
+        )
+        db.add(user)
+        db.commit()
+        user_id = user.id
+        db.bulk_save_objects(
+            [
+                Notification(
+                    user_id=user_id,
+                    category="low_stock",
+                    title="Low stock alert",
+                    message=f"Bench notification {index}",
+                    is_read=index % 3 == 0,
+                )
+                for index in range(notifications)
+            ]
+        )
+        db.commit()
+        return user_id
+    finally:
+        db.close()
+
+
+async def run_scenario(label, client, poll_request, slow_request, args):
+    poll_latencies: list[float] = []
+    health_latencies: list[float] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    done = asyncio.Event()
+
+    async def fire(request, latencies):
+        async with semaphore:
+            response = await timed(request, latencies)
+            response.raise_for_status()
+
+    async def scan_loop():
+        while not done.is_set():
+            (await slow_request()).raise_for_status()
+
+    scanners = [asyncio.create_task(scan_loop()) for _ in range(args.slow)]
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(fire(poll_request, poll_latencies) for _ in range(args.requests)),
+        *(fire(lambda: client.get("/health"), health_latencies) for _ in range(args.requests)),
+    )
+    elapsed = time.perf_counter() - start
+    done.set()
+    await asyncio.gather(*scanners)
+    return [
+        summarize(f"{label} unread-count", poll_latencies, elapsed),
+        summarize(f"{label} /health", health_latencies, elapsed),
+    ]
+
+
+async def main(args) -> None:
+    user_id = seed(args.notifications)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+    async with asgi_client(app) as client:
+        before = await run_scenario(
+            "before (sync Session):",
+            client,
+            lambda: client.get("/bench/legacy/unread-count", params={"user_id": user_id}),
+            lambda: client.get("/bench/legacy/slow-scan", params={"n": args.scan_rows}),
+            args,
+        )
+        after = await run_scenario(
+            "after (AsyncSession):",
+            client,
+            lambda: client.get("/api/notifications/unread-count", headers=headers),
+            lambda: client.get("/bench/async/slow-scan", params={"n": args.scan_rows}),
+            args,
+        )
+    print_table(before + after)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="unread-count polls (and /health probes) to send")
+    parser.add_argument("--concurrency", type=int, default=50, help="max requests in flight")
+    parser.add_argument("--slow", type=int, default=4, help="scan loops running during the measurement")
+    parser.add_argument("--scan-rows", type=int, default=300_000, help="rows per aggregate scan")
+    parser.add_argument("--notifications", type=int, default=2_000, help="notifications seeded for the user")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,422 @@
+"""
+Deterministic large-tenant data generator.
+
+Builds merchants x stores x products with inventory batches, sales drawn
+from that stock, the matching inventory_events, suppliers, expenses, supply
+requests and notifications. The same seed and counts always produce the
+same rows (timestamps are offsets from a fixed anchor date), so benchmark
+runs are comparable over time.
+
+Rows are written with Core multi-row inserts and explicit primary keys, so
+millions of rows load in minutes on SQLite. Every generated user's password
+is ``password123``.
+
+    python -m benchmarks.datagen --merchants 4 --stores 5 --products 500 \\
+        --batches 4 --sales 20000 --database-url sqlite:////tmp/myduka-large.db
+"""
+import argparse
+import os
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+
+ANCHOR = datetime(2026, 1, 1)
+PASSWORD = "password123"
+CATEGORIES = ("Rent", "Utilities", "Wages", "Transport", "Repairs", "Marketing")
+STORE_TOWNS = ("Nairobi", "Mombasa", "Kisumu", "Nakuru", "Eldoret", "Thika", "Nyeri", "Machakos")
+
+
+@dataclass
+class GeneratorConfig:
+    merchants: int = 2
+    stores_per_merchant: int = 3
+    products_per_merchant: int = 200
+    clerks_per_store: int = 3
+    # Inventory rows (delivery batches) per store x product.
+    batches_per_store_product: int = 2
+    sales_per_store: int = 2000
+    expenses_per_store: int = 100
+    supply_requests_per_store: int = 20
+    notifications_per_user: int = 30
+    history_days: int = 180
+    seed: int = 42
+    batch_size: int = 5000
+
+
+@dataclass
+class GeneratedTenant:
+    """Ids the benchmark suite needs to drive requests."""
+
+    counts: dict = field(default_factory=dict)
+    merchant_ids: list = field(default_factory=list)
+    store_ids_by_merchant: dict = field(default_factory=dict)
+    admin_id_by_store: dict = field(default_factory=dict)
+    clerk_ids_by_store: dict = field(default_factory=dict)
+    product_ids_by_merchant: dict = field(default_factory=dict)
+
+
+class _Writer:
+    """Buffers rows per table and flushes them as multi-row inserts."""
+
+    def __init__(self, conn, batch_size: int):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.buffers: dict = {}
+        self.counts: dict = {}
+
+    def add(self, table, row: dict) -> None:
+        buffer = self.buffers.setdefault(table, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(table)
+
+    def flush(self, table=None) -> None:
+        tables = [table] if table is not None else list(self.buffers)
+        for current in tables:
+            rows = self.buffers.get(current)
+            if rows:
+                self.conn.execute(current.insert(), rows)
+                self.counts[current.name] = self.counts.get(current.name, 0) + len(rows)
+                self.buffers[current] = []
+
+
+def _at(rng: random.Random, days: int) -> datetime:
+    return ANCHOR - timedelta(seconds=rng.randrange(days * 86400))
+
+
+def generate(engine, config: GeneratorConfig) -> GeneratedTenant:
+    """Insert a synthetic tenant into an empty schema and return the ids it used."""
+    from app.core.security import hash_password
+    from app.models.expense import Expense
+    from app.models.inventory import Inventory
+    from app.models.inventory_event import InventoryEvent
+    from app.models.notification import Notification
+    from app.models.product import Product
+    from app.models.sale import Sale
+    from app.models.store import Store
+    from app.models.supplier import Supplier
+    from app.models.supply_request import SupplyRequest
+    from app.models.user import User
+    from app.services.notification_counter_service import repair_unread_counters
+    from app.services.stock_level_service import rebuild_stock_levels
+
+    rng = random.Random(config.seed)
+    hashed_password = hash_password(PASSWORD)
+    tenant = GeneratedTenant()
+    ids = {"user": 0, "store": 0, "product": 0, "inventory": 0, "event": 0}
+
+    def next_id(kind: str) -> int:
+        ids[kind] += 1
+        return ids[kind]
+
+    def user_row(role: str, email: str, store_id=None) -> dict:
+        created = _at(rng, config.history_days)
+        return {
+            "id": next_id("user"),
+            "email": email,
+            "first_name": role.title(),
+            "last_name": str(ids["user"]),
+            "hashed_password": hashed_password,
+            "role": role,
+            "is_active": True,
+            "store_id": store_id,
+            "created_at": created,
+            "updated_at": created,
+        }
+
+    with engine.begin() as conn:
+        writer = _Writer(conn, config.batch_size)
+        users, stores, products = User.__table__, Store.__table__, Product.__table__
+        inventory, events, sales = Inventory.__table__, InventoryEvent.__table__, Sale.__table__
+
+        for m in range(config.merchants):
+            merchant = user_row("superuser", f"merchant{m}@bench.myduka.com")
+            writer.add(users, merchant)
+            merchant_id = merchant["id"]
+            tenant.merchant_ids.append(merchant_id)
+
+            catalog = []
+            for p in range(config.products_per_merchant):
+                buying = round(rng.uniform(20, 2000), 2)
+                row = {
+                    "id": next_id("product"),
+                    "merchant_id": merchant_id,
+                    "name": f"Product {m}-{p}",
+                    "description": None,
+                    "sku": f"M{m}-P{p:06d}",
+                    "buying_price": buying,
+                    "selling_price": round(buying * rng.uniform(1.1, 1.6), 2),
+                    "is_active": True,
+                    "created_at": ANCHOR,
+                    "updated_at": ANCHOR,
+                }
+                writer.add(products, row)
+                catalog.append(row)
+            tenant.product_ids_by_merchant[merchant_id] = [row["id"] for row in catalog]
+
+            tenant.store_ids_by_merchant[merchant_id] = []
+            for s in range(config.stores_per_merchant):
+                store_id = next_id("store")
+                tenant.store_ids_by_merchant[merchant_id].append(store_id)
+                writer.add(
+                    stores,
+                    {
+                        "id": store_id,
+                        "merchant_id": merchant_id,
+                        "name": f"Store {m}-{s}",
+                        "location": STORE_TOWNS[store_id % len(STORE_TOWNS)],
+                        "is_active": True,
+                        "created_at": ANCHOR,
+                        "updated_at": ANCHOR,
+                    },
+                )
+                admin = user_row("admin", f"admin{store_id}@bench.myduka.com", store_id)
+                writer.add(users, admin)
+                tenant.admin_id_by_store[store_id] = admin["id"]
+                clerks = [
+                    user_row("clerk", f"clerk{store_id}-{c}@bench.myduka.com", store_id)
+                    for c in range(config.clerks_per_store)
+                ]
+                for clerk in clerks:
+                    writer.add(users, clerk)
+                clerk_ids = [clerk["id"] for clerk in clerks] or [admin["id"]]
+                tenant.clerk_ids_by_store[store_id] = clerk_ids
+
+                # Parents go out before the child rows that reference them (Postgres checks FKs).
+                for table in (users, products, stores):
+                    writer.flush(table)
+
+                for n in range(3):
+                    writer.add(
+                        Supplier.__table__,
+                        {
+                            "store_id": store_id,
+                            "name": f"Supplier {store_id}-{n}",
+                            "is_active": True,
+                            "created_at": ANCHOR,
+                            "updated_at": ANCHOR,
+                        },
+                    )
+
+                # Stock batches; remaining quantities are tracked so sales never oversell.
+                stock = {}
+                for product in catalog:
+                    batches = []
+                    for _ in range(config.batches_per_store_product):
+                        received = rng.randint(20, 200)
+                        created = _at(rng, config.history_days)
+                        row = {
+                            "id": next_id("inventory"),
+                            "product_id": product["id"],
+                            "store_id": store_id,
+                            "created_by": rng.choice(clerk_ids),
+                            "quantity_received": received,
+                            "quantity_in_stock": received,
+                            "quantity_spoilt": 0,
+                            "payment_status": "paid" if rng.random() < 0.7 else "unpaid",
+                            "buying_price": product["buying_price"],
+                            "selling_price": product["selling_price"],
+                            "remarks": None,
+                            "created_at": created,
+                            "updated_at": created,
+                        }
+                        batches.append(row)
+                        writer.add(
+                            events,
+                            {
+                                "id": next_id("event"),
+                                "inventory_id": row["id"],
+                                "product_id": product["id"],
+                                "store_id": store_id,
+                                "actor_id": row["created_by"],
+                                "event_type": "created",
+                                "old_quantity_in_stock": 0,
+                                "new_quantity_in_stock": received,
+                                "old_payment_status": None,
+                                "new_payment_status": row["payment_status"],
+                                "details": "Synthetic delivery",
+                                "created_at": created,
+                            },
+                        )
+                    stock[product["id"]] = batches
+
+                for _ in range(config.sales_per_store):
+                    product = rng.choice(catalog)
+                    quantity = rng.randint(1, 5)
+                    batch = next((b for b in stock[product["id"]] if b["quantity_in_stock"] >= quantity), None)
+                    if batch is None:
+                        continue
+                    old_quantity = batch["quantity_in_stock"]
+                    batch["quantity_in_stock"] = old_quantity - quantity
+                    sold_at = _at(rng, config.history_days)
+                    actor_id = admin["id"]
+                    writer.add(
+                        sales,
+                        {
+                            "store_id": store_id,
+                            "product_id": product["id"],
+                            "created_by": actor_id,
+                            "quantity": quantity,
+                            "unit_price": product["selling_price"],
+                            "unit_cost": product["buying_price"],
+                            "total_price": round(product["selling_price"] * quantity, 2),
+                            "total_cost": round(product["buying_price"] * quantity, 2),
+                            "notes": None,
+                            "created_at": sold_at,
+                        },
+                    )
+                    writer.add(
+                        events,
+                        {
+                            "id": next_id("event"),
+                            "inventory_id": batch["id"],
+                            "product_id": product["id"],
+                            "store_id": store_id,
+                            "actor_id": actor_id,
+                            "event_type": "sale_recorded",
+                            "old_quantity_in_stock": old_quantity,
+                            "new_quantity_in_stock": batch["quantity_in_stock"],
+                            "old_payment_status": batch["payment_status"],
+                            "new_payment_status": batch["payment_status"],
+                            "details": "Sale recorded",
+                            "created_at": sold_at,
+                        },
+                    )
+                for batches in stock.values():
+                    for row in batches:
+                        writer.add(inventory, row)
+
+                for _ in range(config.expenses_per_store):
+                    incurred = _at(rng, config.history_days)
+                    writer.add(
+                        Expense.__table__,
+                        {
+                            "store_id": store_id,
+                            "created_by": admin["id"],
+                            "category": rng.choice(CATEGORIES),
+                            "description": None,
+                            "amount": round(rng.uniform(100, 50000), 2),
+                            "incurred_at": incurred,
+                            "created_at": incurred,
+                        },
+                    )
+                for _ in range(config.supply_requests_per_store):
+                    requested = _at(rng, config.history_days)
+                    writer.add(
+                        SupplyRequest.__table__,
+                        {
+                            "product_id": rng.choice(catalog)["id"],
+                            "store_id": store_id,
+                            "requested_by": rng.choice(clerk_ids),
+                            "quantity_requested": rng.randint(10, 100),
+                            "reason": None,
+                            "status": rng.choice(("pending", "pending", "approved", "declined")),
+                            "created_at": requested,
+                            "updated_at": requested,
+                        },
+                    )
+                for user_id in [admin["id"], *clerk_ids]:
+                    for _ in range(config.notifications_per_user):
+                        writer.add(
+                            Notification.__table__,
+                            {
+                                "user_id": user_id,
+                                "store_id": store_id,
+                                "product_id": rng.choice(catalog)["id"],
+                                "category": "low_stock",
+                                "title": "Low stock",
+                                "message": "Synthetic alert",
+                                "is_read": rng.random() < 0.6,
+                                "created_at": _at(rng, config.history_days),
+                            },
+                        )
+        writer.flush()
+        # Core inserts bypass the ORM listeners that maintain stock_levels and notification_counters.
+        rebuild_stock_levels(conn)
+        repair_unread_counters(conn)
+        if engine.dialect.name == "postgresql":
+            # Explicit ids leave serial sequences behind; move them past the generated rows.
+            for table in writer.counts:
+                conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+                )
+    tenant.counts = dict(sorted(writer.counts.items()))
+    return tenant
+
+
+def tenant_from_database(engine) -> GeneratedTenant:
+    """Rebuild the id map of a previously generated tenant (counts are left empty)."""
+    from sqlalchemy import select
+
+    from app.models.product import Product
+    from app.models.store import Store
+    from app.models.user import User
+
+    tenant = GeneratedTenant()
+    with engine.connect() as conn:
+        tenant.merchant_ids = list(
+            conn.scalars(select(User.id).where(User.role == "superuser").order_by(User.id))
+        )
+        for merchant_id in tenant.merchant_ids:
+            tenant.store_ids_by_merchant[merchant_id] = list(
+                conn.scalars(select(Store.id).where(Store.merchant_id == merchant_id).order_by(Store.id))
+            )
+            tenant.product_ids_by_merchant[merchant_id] = list(
+                conn.scalars(select(Product.id).where(Product.merchant_id == merchant_id).order_by(Product.id))
+            )
+        for user_id, role, store_id in conn.execute(
+            select(User.id, User.role, User.store_id).where(User.role.in_(("admin", "clerk"))).order_by(User.id)
+        ):
+            if role == "admin":
+                tenant.admin_id_by_store.setdefault(store_id, user_id)
+            else:
+                tenant.clerk_ids_by_store.setdefault(store_id, []).append(user_id)
+    for store_id, admin_id in tenant.admin_id_by_store.items():
+        tenant.clerk_ids_by_store.setdefault(store_id, [admin_id])
+    return tenant
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a scratch SQLite file")
+    parser.add_argument("--merchants", type=int, default=GeneratorConfig.merchants)
+    parser.add_argument("--stores", type=int, default=GeneratorConfig.stores_per_merchant, help="per merchant")
+    parser.add_argument("--products", type=int, default=GeneratorConfig.products_per_merchant, help="per merchant")
+    parser.add_argument("--batches", type=int, default=GeneratorConfig.batches_per_store_product)
+    parser.add_argument("--sales", type=int, default=GeneratorConfig.sales_per_store, help="per store")
+    parser.add_argument("--seed", type=int, default=GeneratorConfig.seed)
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+        os.environ["DATABASE_DRIVER"] = args.database_url.split(":", 1)[0].split("+", 1)[0]
+        os.environ.setdefault("DEBUG", "false")
+    else:
+        from benchmarks.common import use_scratch_database
+
+        print(f"Writing to {use_scratch_database('datagen')}")
+
+    from app.core.database import Base, engine
+    import main as _app  # noqa: F401  (registers every model)
+
+    config = GeneratorConfig(
+        merchants=args.merchants,
+        stores_per_merchant=args.stores,
+        products_per_merchant=args.products,
+        batches_per_store_product=args.batches,
+        sales_per_store=args.sales,
+        seed=args.seed,
+    )
+    Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    tenant = generate(engine, config)
+    print(f"config: {asdict(config)}")
+    for table, count in tenant.counts.items():
+        print(f"{table:>20}: {count}")
+    print(f"generated in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
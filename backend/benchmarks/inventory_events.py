@@ -0,0 +1,170 @@
+"""
+Cost of writing inventory timeline events on multi-line operations.
+
+Drives the ASGI app through httpx and reports, per operation size, the mean
+latency and SQL statements per request for:
+
+- po_receipt: POST /api/purchase-orders/{id}/status {"status": "received"}
+  on an order with N lines
+- basket_sale: POST /api/sales/basket with N lines
+
+Each runs in two modes:
+
+- batched: the buffered event writer (one multi-row INSERT per commit)
+- per_row: the previous behaviour, one ORM InventoryEvent per stock change,
+  with increase_stock flushing every new inventory row for its id
+
+    python -m benchmarks.inventory_events --lines 10 50 200 --repeats 5
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event
+
+from benchmarks.common import asgi_client, print_table, use_scratch_database
+
+use_scratch_database("inventory-events")
+
+from app.core.database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.core.security import create_access_token, hash_password  # noqa: E402
+from app.models.inventory_event import InventoryEvent  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.store import Store  # noqa: E402
+from app.models.supplier import Supplier  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.routes import sales as sales_routes  # noqa: E402
+from app.services import event_writer, stock_service  # noqa: E402
+from main import app  # noqa: E402
+
+
+def _record_per_row(db, *, inventory=None, **values):
+    """The pre-batching behaviour: one ORM object per event, flushing new inventory for its id."""
+    if inventory is not None:
+        db.flush()
+        values["inventory_id"] = inventory.id
+    db.add(InventoryEvent(**values))
+
+
+def use_mode(mode: str) -> None:
+    recorder = event_writer.record_inventory_event if mode == "batched" else _record_per_row
+    stock_service.record_inventory_event = recorder
+    sales_routes.record_inventory_event = recorder
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def seed(products: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        store = Store(name="Bench Store", location="Nairobi")
+        db.add(store)
+        db.flush()
+        supplier = Supplier(name="Bench Supplier", store_id=store.id)
+        admin = User(
+            email="bench-admin@myduka.com",
+            first_name="Bench",
+            last_name="Admin",
+            hashed_password=hash_password("password123"),
+            role="admin",
+            store_id=store.id,
+            is_active=True,
+        )
+        catalog = [
+            Product(name=f"Item {i}", sku=f"EVT-{i}", buying_price=50, selling_price=80) for i in range(products)
+        ]
+        db.add_all([supplier, admin, *catalog])
+        db.commit()
+        return store.id, supplier.id, admin.id, [product.id for product in catalog]
+    finally:
+        db.close()
+
+
+async def run(lines_options: list[int], repeats: int) -> list[dict]:
+    store_id, supplier_id, admin_id, product_ids = seed(max(lines_options))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': admin_id})}"}
+    counter = StatementCounter()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+    rows = []
+    async with asgi_client(app) as client:
+
+        async def po_receipt(lines: int):
+            created = await client.post(
+                "/api/purchase-orders/",
+                json={
+                    "supplier_id": supplier_id,
+                    "store_id": store_id,
+                    "items": [
+                        {"product_id": product_id, "quantity": 20, "unit_cost": 50, "unit_price": 80}
+                        for product_id in product_ids[:lines]
+                    ],
+                },
+                headers=headers,
+            )
+            return lambda: client.post(
+                f"/api/purchase-orders/{created.json()['id']}/status",
+                json={"status": "received"},
+                headers=headers,
+            )
+
+        async def basket_sale(lines: int):
+            return lambda: client.post(
+                "/api/sales/basket",
+                json={
+                    "store_id": store_id,
+                    "lines": [{"product_id": product_id, "quantity": 1} for product_id in product_ids[:lines]],
+                },
+                headers=headers,
+            )
+
+        for operation_name, prepare in (("po_receipt", po_receipt), ("basket_sale", basket_sale)):
+            for lines in lines_options:
+                for mode in ("per_row", "batched"):
+                    use_mode(mode)
+                    elapsed = []
+                    statements = []
+                    for _ in range(repeats):
+                        # Purchase orders are synchronous routes on the sync engine; count both.
+                        sync_counter = StatementCounter()
+                        event.listen(engine, "before_cursor_execute", sync_counter)
+                        send = await prepare(lines)
+                        sync_counter.count = 0
+                        counter.count = 0
+                        started = time.perf_counter()
+                        response = await send()
+                        elapsed.append((time.perf_counter() - started) * 1000)
+                        event.remove(engine, "before_cursor_execute", sync_counter)
+                        assert response.status_code == 200, response.text
+                        statements.append(counter.count + sync_counter.count)
+                    rows.append(
+                        {
+                            "operation": operation_name,
+                            "lines": lines,
+                            "mode": mode,
+                            "mean_ms": round(sum(elapsed) / len(elapsed), 2),
+                            "sql_statements": round(sum(statements) / len(statements)),
+                        }
+                    )
+    event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+    use_mode("batched")
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    print_table(asyncio.run(run(args.lines, args.repeats)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Benchmark suite over a synthetic large tenant.
+
+Generates a deterministic tenant (benchmarks.datagen) in a scratch database,
+or reuses --database-url, then drives the ASGI app through httpx with
+--concurrency workers per scenario:
+
+- admin, clerk and merchant dashboards, and the clerk overview
+- every analytics endpoint
+- unread-count polling
+- sale creation, one product per call and as a 20-line basket
+- stock transfers (create, approve, complete as one operation)
+
+Each scenario reports throughput and p50/p95/p99 latency. --output writes the
+results with the run configuration as JSON; --baseline compares against an
+earlier JSON file and exits non-zero when any scenario's p95 grows by more
+than --max-regression-pct, so the suite can gate changes.
+
+    python -m benchmarks.load_suite --scale medium --output bench.json
+    python -m benchmarks.load_suite --scale medium --baseline bench.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+from benchmarks.common import asgi_client, print_table, summarize, use_scratch_database
+from benchmarks.datagen import GeneratorConfig
+
+SCALES = {
+    "small": GeneratorConfig(merchants=1, stores_per_merchant=2, products_per_merchant=100, sales_per_store=1000),
+    "medium": GeneratorConfig(merchants=3, stores_per_merchant=4, products_per_merchant=500, sales_per_store=10000),
+    "large": GeneratorConfig(
+        merchants=5,
+        stores_per_merchant=8,
+        products_per_merchant=2000,
+        batches_per_store_product=5,
+        sales_per_store=50000,
+    ),
+}
+
+BASKET_LINES = 20
+
+ANALYTICS_ENDPOINTS = (
+    "store-performance",
+    "top-products",
+    "slow-movers",
+    "payment-trend",
+    "financial-summary",
+    "expenses-by-category",
+    "sales-trend",
+)
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def build_scenarios(tenant, headers_for) -> dict:
+    """Map scenario name -> async callable(client) performing one operation."""
+    merchant_id = tenant.merchant_ids[0]
+    store_ids = tenant.store_ids_by_merchant[merchant_id]
+    store_id = store_ids[0]
+    admin = headers_for(tenant.admin_id_by_store[store_id])
+    clerk = headers_for(tenant.clerk_ids_by_store[store_id][0])
+    merchant = headers_for(merchant_id)
+    products = itertools.cycle(tenant.product_ids_by_merchant[merchant_id])
+
+    def get(path, headers):
+        async def run(client):
+            return await client.get(path, headers=headers)
+
+        return run
+
+    async def create_sale(client):
+        return await client.post(
+            "/api/sales/",
+            json={"store_id": store_id, "product_id": next(products), "quantity": 1},
+            headers=admin,
+        )
+
+    async def basket_sale(client):
+        return await client.post(
+            "/api/sales/basket",
+            json={
+                "store_id": store_id,
+                "lines": [{"product_id": next(products), "quantity": 1} for _ in range(BASKET_LINES)],
+            },
+            headers=admin,
+        )
+
+    async def transfer_stock(client):
+        created = await client.post(
+            "/api/stock-transfers/",
+            json={
+                "from_store_id": store_ids[0],
+                "to_store_id": store_ids[1 % len(store_ids)],
+                "product_id": next(products),
+                "quantity": 1,
+            },
+            headers=merchant,
+        )
+        if created.status_code != 200:
+            return created
+        path = f"/api/stock-transfers/{created.json()['id']}/status"
+        approved = await client.post(path, json={"status": "approved"}, headers=merchant)
+        if approved.status_code != 200:
+            return approved
+        return await client.post(path, json={"status": "completed"}, headers=merchant)
+
+    scenarios = {
+        "admin_dashboard": get("/api/reports/admin/dashboard", admin),
+        "clerk_dashboard": get("/api/reports/clerk/dashboard", clerk),
+        "clerk_overview": get("/api/reports/clerk/overview", clerk),
+        "merchant_dashboard": get("/api/reports/merchant/dashboard", merchant),
+        "unread_count": get("/api/notifications/unread-count", clerk),
+    }
+    for endpoint in ANALYTICS_ENDPOINTS:
+        scenarios[f"analytics_{endpoint.replace('-', '_')}"] = get(f"/api/analytics/{endpoint}", merchant)
+    scenarios["create_sale"] = create_sale
+    scenarios["basket_sale"] = basket_sale
+    if len(store_ids) > 1:
+        scenarios["stock_transfer"] = transfer_stock
+    return scenarios
+
+
+async def run_scenario(app, name: str, operation, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    failures = 0
+    remaining = iter(range(requests))
+
+    async def worker(client):
+        nonlocal failures
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await operation(client)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                failures += 1
+
+    async with asgi_client(app) as client:
+        await operation(client)  # warm caches and connections
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {**summarize(name, latencies, elapsed), "failures": failures}
+
+
+def compare(results: list[dict], baseline_path: str, max_regression_pct: float) -> bool:
+    with open(baseline_path) as handle:
+        baseline = {row["scenario"]: row for row in json.load(handle)["results"]}
+    ok = True
+    rows = []
+    for row in results:
+        before = baseline.get(row["scenario"])
+        if before is None or not before["p95_ms"]:
+            continue
+        change = (row["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        regressed = change > max_regression_pct
+        ok = ok and not regressed
+        rows.append(
+            {
+                "scenario": row["scenario"],
+                "baseline_p95_ms": before["p95_ms"],
+                "p95_ms": row["p95_ms"],
+                "change_pct": round(change, 1),
+                "status": "REGRESSED" if regressed else "ok",
+            }
+        )
+    print()
+    print_table(rows)
+    return ok
+
+
+async def main_async(args) -> int:
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+        os.environ["DATABASE_DRIVER"] = args.database_url.split(":", 1)[0].split("+", 1)[0]
+        os.environ.setdefault("DEBUG", "false")
+        os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+        os.environ.setdefault("ACCESS_LOG_ENABLED", "false")
+    else:
+        use_scratch_database(f"suite-{args.scale}")
+
+    from sqlalchemy import func, select
+
+    from app.core.database import Base, engine
+    from app.core.security import create_access_token
+    from app.models.user import User
+    from benchmarks.datagen import generate, tenant_from_database
+    from main import app
+
+    config = SCALES[args.scale]
+    config.seed = args.seed
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        populated = conn.scalar(select(func.count(User.id))) > 0
+    if populated:
+        tenant = tenant_from_database(engine)
+    else:
+        started = time.perf_counter()
+        tenant = generate(engine, config)
+        print(f"generated {sum(tenant.counts.values())} rows in {time.perf_counter() - started:.1f}s")
+
+    def headers_for(user_id: int) -> dict:
+        return {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+
+    scenarios = build_scenarios(tenant, headers_for)
+    selected = [name for name in scenarios if not args.only or name in args.only]
+    results = []
+    for name in selected:
+        results.append(await run_scenario(app, name, scenarios[name], args.requests, args.concurrency))
+        print(f"  {name}: p95 {results[-1]['p95_ms']} ms", file=sys.stderr)
+    print_table(results)
+
+    if args.output:
+        payload = {
+            "meta": {
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+                "git_revision": _git_revision(),
+                "python": platform.python_version(),
+                "database": engine.dialect.name,
+                "scale": args.scale,
+                "generator": asdict(config),
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as handle:
+            json.dump(payload, handle, indent=2)
+        print(f"\nwrote {args.output}")
+
+    if args.baseline and not compare(results, args.baseline, args.max_regression_pct):
+        return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=GeneratorConfig.seed)
+    parser.add_argument("--database-url", help="reuse an existing (generated) database instead of a scratch one")
+    parser.add_argument("--requests", type=int, default=200, help="operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare p95 against a previous results JSON")
+    parser.add_argument("--max-regression-pct", type=float, default=20.0)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
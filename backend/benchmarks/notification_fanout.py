@@ -0,0 +1,168 @@
+"""
+Cost of notification-heavy write paths with and without the recipient cache.
+
+Each write queues store alerts in the notification outbox; the dispatcher then
+resolves each store's recipients (active admins + merchant) and inserts the
+notifications. Per operation and mode this reports the mean request latency,
+the mean time to deliver the queued alerts and the SQL statements per alert
+delivered:
+
+- unpaid_receipt: POST /api/inventory/ with an unpaid batch below its
+  threshold (one unpaid and one low-stock alert)
+- supply_request: POST /api/supply-requests/ (one pending-request alert)
+
+Modes: cached (recipient cache on) and uncached (TTL 0, one recipient query
+per alert).
+
+    python -m benchmarks.notification_fanout --stores 5 --admins 4 --operations 200
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event
+
+from benchmarks.common import asgi_client, print_table, use_scratch_database
+
+use_scratch_database("notification-fanout")
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.core.security import create_access_token, hash_password  # noqa: E402
+from app.models.notification import Notification  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.store import Store  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.notification_dispatcher import notification_dispatcher  # noqa: E402
+from app.services.recipient_cache import recipient_cache  # noqa: E402
+from main import app  # noqa: E402
+
+
+def seed(stores: int, admins: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        password = hash_password("password123")
+
+        def user(email: str, role: str, store_id=None) -> User:
+            return User(
+                email=email,
+                first_name="Bench",
+                last_name=role.title(),
+                hashed_password=password,
+                role=role,
+                store_id=store_id,
+                is_active=True,
+            )
+
+        merchant = user("bench-merchant@myduka.com", "superuser")
+        db.add(merchant)
+        db.flush()
+        store_rows = [Store(name=f"Store {i}", location="Nairobi", merchant_id=merchant.id) for i in range(stores)]
+        db.add_all(store_rows)
+        db.flush()
+        clerks = []
+        for store in store_rows:
+            db.add_all([user(f"bench-admin-{store.id}-{i}@myduka.com", "admin", store.id) for i in range(admins)])
+            clerk = user(f"bench-clerk-{store.id}@myduka.com", "clerk", store.id)
+            db.add(clerk)
+            clerks.append(clerk)
+        product = Product(
+            name="Bench Item", sku="FANOUT-1", buying_price=50, selling_price=80, merchant_id=merchant.id
+        )
+        db.add(product)
+        db.commit()
+        return [(store.id, clerk.id) for store, clerk in zip(store_rows, clerks)], product.id
+    finally:
+        db.close()
+
+
+def use_mode(mode: str) -> None:
+    recipient_cache.ttl_seconds = 60 if mode == "cached" else 0
+    recipient_cache.clear()
+
+
+def notifications_written() -> int:
+    db = SessionLocal()
+    try:
+        return db.query(Notification).count()
+    finally:
+        db.close()
+
+
+async def run(stores: int, admins: int, operations: int) -> list[dict]:
+    store_clerks, product_id = seed(stores, admins)
+    statements = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    def unpaid_receipt(store_id: int):
+        return "/api/inventory/", {
+            "product_id": product_id,
+            "store_id": store_id,
+            "quantity_received": 2,
+            "quantity_in_stock": 2,
+            "quantity_spoilt": 0,
+            "payment_status": "unpaid",
+            "buying_price": 50,
+            "selling_price": 80,
+        }
+
+    def supply_request(store_id: int):
+        return "/api/supply-requests/", {
+            "product_id": product_id,
+            "store_id": store_id,
+            "quantity_requested": 10,
+            "reason": "Benchmark restock",
+        }
+
+    rows = []
+    async with asgi_client(app) as client:
+        for operation_name, build in (("unpaid_receipt", unpaid_receipt), ("supply_request", supply_request)):
+            for mode in ("uncached", "cached"):
+                use_mode(mode)
+                before = notifications_written()
+                request_ms = []
+                for index in range(operations):
+                    store_id, clerk_id = store_clerks[index % len(store_clerks)]
+                    path, payload = build(store_id)
+                    headers = {"Authorization": f"Bearer {create_access_token({'sub': clerk_id})}"}
+                    started = time.perf_counter()
+                    response = await client.post(path, json=payload, headers=headers)
+                    request_ms.append((time.perf_counter() - started) * 1000)
+                    assert response.status_code == 201, response.text
+
+                statements = 0
+                event.listen(engine, "before_cursor_execute", count)
+                started = time.perf_counter()
+                delivered = notification_dispatcher.drain()
+                deliver_ms = (time.perf_counter() - started) * 1000
+                event.remove(engine, "before_cursor_execute", count)
+                rows.append(
+                    {
+                        "operation": operation_name,
+                        "mode": mode,
+                        "operations": operations,
+                        "alerts": delivered,
+                        "notifications": notifications_written() - before,
+                        "request_mean_ms": round(sum(request_ms) / len(request_ms), 2),
+                        "deliver_ms": round(deliver_ms, 2),
+                        "sql_per_alert": round(statements / delivered, 2) if delivered else 0,
+                    }
+                )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stores", type=int, default=5)
+    parser.add_argument("--admins", type=int, default=4, help="active admins per store")
+    parser.add_argument("--operations", type=int, default=200, help="writes per operation and mode")
+    args = parser.parse_args()
+    print_table(asyncio.run(run(args.stores, args.admins, args.operations)))
+
+
+if __name__ == "__main__":
+    main()
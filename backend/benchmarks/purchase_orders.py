@@ -0,0 +1,112 @@
+"""
+Latency of creating large purchase orders.
+
+Creates orders of N lines through POST /api/purchase-orders/ and reports
+p50/p95 latency and SQL statements per request. Statements should stay flat
+as lines grow (one product IN query, one executemany for the lines); the
+latency column is checked against --budget-ms.
+
+    python -m benchmarks.purchase_orders --lines 10 100 1000 --repeats 10
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event
+
+from benchmarks.common import asgi_client, percentile, print_table, use_scratch_database
+
+use_scratch_database("purchase-orders")
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.core.security import create_access_token, hash_password  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.store import Store  # noqa: E402
+from app.models.supplier import Supplier  # noqa: E402
+from app.models.user import User  # noqa: E402
+from main import app  # noqa: E402
+
+
+def seed(products: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        store = Store(name="Bench Store", location="Nairobi")
+        db.add(store)
+        db.flush()
+        supplier = Supplier(name="Bench Supplier", store_id=store.id)
+        admin = User(
+            email="bench-admin@myduka.com",
+            first_name="Bench",
+            last_name="Admin",
+            hashed_password=hash_password("password123"),
+            role="admin",
+            store_id=store.id,
+            is_active=True,
+        )
+        catalog = [
+            Product(name=f"Item {i}", sku=f"PO-{i}", buying_price=50, selling_price=80) for i in range(products)
+        ]
+        db.add_all([supplier, admin, *catalog])
+        db.commit()
+        return store.id, supplier.id, admin.id, [product.id for product in catalog]
+    finally:
+        db.close()
+
+
+async def run(lines_options: list[int], repeats: int, budget_ms: float) -> list[dict]:
+    store_id, supplier_id, admin_id, product_ids = seed(max(lines_options))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': admin_id})}"}
+    statements = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    rows = []
+    async with asgi_client(app) as client:
+        for lines in lines_options:
+            payload = {
+                "supplier_id": supplier_id,
+                "store_id": store_id,
+                "items": [
+                    {"product_id": product_id, "quantity": 5, "unit_cost": 50} for product_id in product_ids[:lines]
+                ],
+            }
+            await client.post("/api/purchase-orders/", json=payload, headers=headers)  # warm-up
+            latencies, per_request = [], []
+            for _ in range(repeats):
+                statements = 0
+                started = time.perf_counter()
+                response = await client.post("/api/purchase-orders/", json=payload, headers=headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.text
+                per_request.append(statements)
+            ordered = sorted(latencies)
+            p95 = percentile(ordered, 95)
+            rows.append(
+                {
+                    "lines": lines,
+                    "p50_ms": round(percentile(ordered, 50), 2),
+                    "p95_ms": round(p95, 2),
+                    "sql_statements": max(per_request),
+                    "within_budget": p95 <= budget_ms,
+                }
+            )
+    event.remove(engine, "before_cursor_execute", count)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=500.0, help="p95 latency allowed per order")
+    args = parser.parse_args()
+    print_table(asyncio.run(run(args.lines, args.repeats, args.budget_ms)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Worker boot time: importing every router and model, then running the lifespan.
+
+Each boot runs in a fresh interpreter so module imports are cold. Scenarios:
+
+- import: ``import main`` only (settings, engines, all models and routers).
+- first boot: lifespan against an empty database (create_all, stamp, seed).
+- warm boot: lifespan against a database already at the Alembic head, which
+  is what every autoscaled worker hits after the first.
+- legacy boot: the work main.py used to do at import on every boot
+  (create_all, PRAGMA/ALTER checks, seed_demo_users) against the same
+  populated database, for comparison.
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.common import print_table, use_scratch_database
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+mode = sys.argv[1]
+if mode == "lifespan":
+    async def boot():
+        async with main.app.router.lifespan_context(main.app):
+            pass
+    asyncio.run(boot())
+elif mode == "legacy":
+    from app.core.database import Base, SessionLocal, engine
+    from app.services.schema_service import _patch_legacy_sqlite_columns
+    from app.services.seed_service import seed_demo_users
+    Base.metadata.create_all(bind=engine)
+    _patch_legacy_sqlite_columns()
+    db = SessionLocal()
+    try:
+        seed_demo_users(db)
+    finally:
+        db.close()
+finished = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000, "startup_ms": (finished - imported) * 1000}))
+"""
+
+
+def boot(mode: str) -> dict:
+    env = {**os.environ, "SEED_DEMO_USERS": "true"}
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, mode],
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize_boots(label: str, boots: list[dict]) -> dict:
+    imports = [b["import_ms"] for b in boots]
+    startups = [b["startup_ms"] for b in boots]
+    return {
+        "scenario": label,
+        "runs": len(boots),
+        "import_ms_median": round(statistics.median(imports), 1),
+        "startup_ms_median": round(statistics.median(startups), 1),
+        "total_ms_median": round(statistics.median(i + s for i, s in zip(imports, startups)), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    database = use_scratch_database("startup")
+
+    rows = [summarize_boots("import", [boot("import") for _ in range(args.runs)])]
+    database.unlink(missing_ok=True)
+    rows.append(summarize_boots("first boot (empty db)", [boot("lifespan")]))
+    rows.append(summarize_boots("warm boot (at head)", [boot("lifespan") for _ in range(args.runs)]))
+    rows.append(summarize_boots("legacy boot (import-time DDL)", [boot("legacy") for _ in range(args.runs)]))
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
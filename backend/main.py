@@ -6,20 +6,37 @@ import json
 import logging
 import time
 import uuid
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi import Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+from app.core.access_log import access_log
 from app.core.config import settings
-from app.core.database import Base, SessionLocal, engine
-from app.services.seed_service import seed_demo_users
+from app.core.database import async_engine, engine
+from app.core.dependencies import check_permission
+from app.core.pool_telemetry import pool_snapshot
+from app.core.principal_cache import principal_cache
+from app.core.query_log import query_log
+from app.core.request_metrics import render_prometheus, request_metrics
+from app.core.read_database import read_path_status, replica_engine
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.notification_broker import notification_broker
+from app.services.recipient_cache import recipient_cache
+from app.services.schema_service import prepare_database
+from app.services.threshold_cache import threshold_cache
 
 # Import all models to register them with SQLAlchemy
 from app.models import (
+    idempotency_key,
     inventory,
     inventory_event,
     notification,
+    notification_counter,
+    notification_outbox,
     purchase_order,
     product,
     refresh_token,
@@ -28,6 +45,7 @@ from app.models import (
     expense,
     stock_transfer,
     supplier,
+    stock_level,
     stock_threshold,
     store,
     supply_request,
@@ -45,32 +63,34 @@ METRICS = {
     "requests_error": 0,
 }
 
-# Create database tables (only if database is available)
-try:
-    if not settings.debug and settings.secret_key == "your-secret-key-change-this-in-production":
-        raise RuntimeError("SECRET_KEY must be set in non-debug environments.")
-    Base.metadata.create_all(bind=engine)
-    if settings.database_driver == "sqlite":
-        with engine.begin() as conn:
-            store_cols = {
-                row[1] for row in conn.execute(text("PRAGMA table_info(stores)")).fetchall()
-            }
-            if "merchant_id" not in store_cols:
-                conn.execute(text("ALTER TABLE stores ADD COLUMN merchant_id INTEGER"))
-            product_cols = {
-                row[1] for row in conn.execute(text("PRAGMA table_info(products)")).fetchall()
-            }
-            if "merchant_id" not in product_cols:
-                conn.execute(text("ALTER TABLE products ADD COLUMN merchant_id INTEGER"))
-    if settings.seed_demo_users:
-        db = SessionLocal()
-        try:
-            seed_demo_users(db)
-        finally:
-            db.close()
-except Exception as e:
-    print(f"Warning: Could not create database tables: {e}")
-    print("Make sure PostgreSQL is running and the database credentials are correct.")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepare the schema once per boot; a database already at head skips DDL and seeding."""
+    try:
+        if not settings.debug and settings.secret_key == "your-secret-key-change-this-in-production":
+            raise RuntimeError("SECRET_KEY must be set in non-debug environments.")
+        started = time.perf_counter()
+        outcome = await run_in_threadpool(prepare_database)
+        logger.info(
+            json.dumps(
+                {
+                    "event": "schema_ready",
+                    "outcome": outcome,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                }
+            )
+        )
+    except Exception as e:
+        print(f"Warning: Could not create database tables: {e}")
+        print("Make sure PostgreSQL is running and the database credentials are correct.")
+    await notification_broker.start()
+    notification_dispatcher.start()
+    yield
+    await notification_dispatcher.stop()
+    await notification_broker.stop()
+    access_log.stop()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -79,7 +99,8 @@ app = FastAPI(
     description="An inventory management system for multi-store operations",
     openapi_url="/api/openapi.json",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    lifespan=lifespan,
 )
 
 # Configure CORS (allow frontend to communicate)
@@ -97,6 +118,7 @@ async def request_logging_middleware(request: Request, call_next):
     request_id = str(uuid.uuid4())
     start = time.perf_counter()
     status_code = 500
+    stats = request_metrics.start(request_id)
     try:
         response = await call_next(request)
         status_code = response.status_code
@@ -104,19 +126,23 @@ async def request_logging_middleware(request: Request, call_next):
         return response
     finally:
         duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        route = request.scope.get("route")
+        request_metrics.finish(request.method, getattr(route, "path", None), status_code, duration_ms, stats)
         METRICS["requests_total"] += 1
         if status_code >= 400:
             METRICS["requests_error"] += 1
-        logger.info(
-            json.dumps(
-                {
-                    "request_id": request_id,
-                    "method": request.method,
-                    "path": request.url.path,
-                    "status_code": status_code,
-                    "duration_ms": duration_ms,
-                }
-            )
+        access_log.log_request(
+            status_code,
+            duration_ms,
+            lambda: {
+                "request_id": request_id,
+                "method": request.method,
+                "path": request.url.path,
+                "status_code": status_code,
+                "duration_ms": duration_ms,
+                "sql_statements": stats.sql_statements,
+                "db_time_ms": round(stats.db_time_ms, 2),
+            },
         )
 
 # Include routers
@@ -172,9 +198,37 @@ async def metrics():
     return {
         "requests_total": METRICS["requests_total"],
         "requests_error": METRICS["requests_error"],
+        "db_pool": pool_snapshot(
+            [engine, async_engine.sync_engine]
+            + ([replica_engine.sync_engine] if replica_engine is not None else [])
+        ),
+        "read_path": read_path_status(),
+        "principal_cache": principal_cache.snapshot(),
+        "http": request_metrics.summary(),
+        "access_log": access_log.snapshot(),
+        "notification_outbox": notification_dispatcher.snapshot(),
+        "threshold_cache": threshold_cache.snapshot(),
+        "recipient_cache": recipient_cache.snapshot(),
+        "notification_stream": notification_broker.snapshot(),
     }
 
 
+@app.get("/metrics/queries")
+async def query_metrics(limit: int = 50, current_user=Depends(check_permission("admin"))):
+    """SQL fingerprints ranked by total time, with suspected N+1 patterns (this worker)."""
+    _ = current_user
+    return query_log.summary(limit=limit)
+
+
+@app.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request metrics in Prometheus text format, merged across workers."""
+    return PlainTextResponse(
+        render_prometheus(request_metrics.aggregate()),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -6,6 +6,7 @@ import {
   getStoredUser,
   logoutSession,
   normalizeRole,
+  subscribeNotifications,
 } from "../services/api";
 import { notificationsApi } from "../services/api";
 
@@ -141,18 +142,28 @@ export default function PageShell({ title, subtitle, children, links, sidebarCon
   };
 
   useEffect(() => {
-    let active = true;
-    (async () => {
-      try {
-        const countRes = await notificationsApi.unreadCount();
-        if (active) setUnreadCount(countRes.data?.unread_count ?? 0);
-      } catch {
-        // Ignore notification errors to avoid blocking layout.
+    // The stream sends the unread count on connect and pushes changes, so nothing polls.
+    const unsubscribe = subscribeNotifications((event, data) => {
+      if (event === "unread_count") {
+        setUnreadCount(data.unread_count ?? 0);
+      } else if (event === "notification") {
+        setNotifications((prev) =>
+          [data, ...prev.filter((item) => item.id !== data.id)].slice(0, 8)
+        );
+      } else if (event === "read") {
+        setNotifications((prev) =>
+          prev.map((item) =>
+            data.ids === null || data.ids.includes(item.id) ? { ...item, is_read: true } : item
+          )
+        );
+      } else if (event === "resync") {
+        notificationsApi
+          .list({ limit: 8 })
+          .then((res) => setNotifications(res.data || []))
+          .catch(() => {});
       }
-    })();
-    return () => {
-      active = false;
-    };
+    });
+    return unsubscribe;
   }, []);
 
   useEffect(() => {
@@ -228,7 +239,10 @@ export default function PageShell({ title, subtitle, children, links, sidebarCon
                               : "border-[#34D399]/40 bg-[#F0FDF4]"
                           }`}
                         >
-                          <p className="text-xs font-semibold text-[#064E3B]">{item.title}</p>
+                          <p className="text-xs font-semibold text-[#064E3B]">
+                            {item.title}
+                            {item.occurrences > 1 ? ` (x${item.occurrences})` : ""}
+                          </p>
                           <p className="text-xs text-[#6B7280]">{item.message}</p>
                         </button>
                       ))
@@ -277,7 +277,7 @@ export default function PurchaseOrders() {
                             </button>
                           </>
                         ) : null}
-                        {order.status === "sent" ? (
+                        {order.status === "sent" || order.status === "partially_received" ? (
                           <button
                             onClick={() => updateStatus(order.id, "received")}
                             className="rounded bg-[#D1FAE5] px-2 py-1 text-xs text-[#15803D]"
@@ -108,8 +108,39 @@ export const authApi = {
   logout(refreshToken) {
     return api.post("/api/auth/logout", { refresh_token: refreshToken });
   },
+  refresh(refreshToken) {
+    return api.post("/api/auth/refresh", { refresh_token: refreshToken });
+  },
 };
 
+// Refresh tokens are single-use (the server rotates them), so concurrent
+// callers share one in-flight refresh. Resolves true with a new session saved,
+// false when the refresh token is missing or rejected; rejects on network errors.
+let refreshInFlight = null;
+
+export function refreshAccessToken() {
+  if (!refreshInFlight) {
+    const refreshToken = getStoredRefreshToken();
+    refreshInFlight = (
+      refreshToken
+        ? authApi.refresh(refreshToken).then(
+            ({ data }) => {
+              saveAuthSession(data.access_token, data.user, data.refresh_token);
+              return true;
+            },
+            (error) => {
+              if (error.response?.status === 401) return false;
+              throw error;
+            }
+          )
+        : Promise.resolve(false)
+    ).finally(() => {
+      refreshInFlight = null;
+    });
+  }
+  return refreshInFlight;
+}
+
 export const reportApi = {
   adminDashboard() {
     return api.get("/api/reports/admin/dashboard");
@@ -142,6 +173,82 @@ export const notificationsApi = {
   },
 };
 
+// Server-sent events from /api/notifications/stream, read with fetch so the
+// bearer token can be sent. Reconnects with Last-Event-ID (the server replays
+// missed unread notifications) and backs off while the server is unreachable.
+// When the access token expires (401) it refreshes the session and reconnects;
+// it stops only if the session cannot be refreshed or access is forbidden.
+// Returns a function that closes the stream.
+export function subscribeNotifications(onEvent) {
+  const controller = new AbortController();
+  let lastEventId = null;
+  let retryMs = 3000;
+  let failures = 0;
+  let refreshed = false;
+
+  const dispatch = (block) => {
+    let event = "message";
+    const data = [];
+    block.split("\n").forEach((line) => {
+      if (line.startsWith(":")) return;
+      const separator = line.indexOf(":");
+      const field = separator === -1 ? line : line.slice(0, separator);
+      const value = separator === -1 ? "" : line.slice(separator + 1).replace(/^ /, "");
+      if (field === "event") event = value;
+      else if (field === "data") data.push(value);
+      else if (field === "id") lastEventId = value;
+      else if (field === "retry" && Number(value) > 0) retryMs = Number(value);
+    });
+    if (data.length) onEvent(event, JSON.parse(data.join("\n")));
+  };
+
+  const connect = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        const headers = { Accept: "text/event-stream" };
+        const token = getStoredToken();
+        if (token) headers.Authorization = `Bearer ${token}`;
+        if (lastEventId) headers["Last-Event-ID"] = lastEventId;
+        const response = await fetch(`${api.defaults.baseURL}/api/notifications/stream`, {
+          headers,
+          signal: controller.signal,
+        });
+        if (response.status === 401) {
+          // A token that is rejected right after a refresh will not recover.
+          if (refreshed || !(await refreshAccessToken())) return;
+          refreshed = true;
+          continue;
+        }
+        if (response.status === 403) return;
+        if (!response.ok || !response.body) throw new Error(`stream status ${response.status}`);
+        failures = 0;
+        refreshed = false;
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = "";
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += value.replace(/\r\n/g, "\n");
+          let boundary = buffer.indexOf("\n\n");
+          while (boundary !== -1) {
+            dispatch(buffer.slice(0, boundary));
+            buffer = buffer.slice(boundary + 2);
+            boundary = buffer.indexOf("\n\n");
+          }
+        }
+      } catch {
+        if (controller.signal.aborted) return;
+        failures += 1;
+      }
+      const delay = Math.min(retryMs * 2 ** failures, 60000);
+      await new Promise((resolve) => setTimeout(resolve, delay));
+    }
+  };
+
+  connect();
+  return () => controller.abort();
+}
+
 export const messagesApi = {
   recipients() {
     return api.get("/api/messages/recipients");